@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.core.auth import require_scope, ServiceTokenPayload
+from app.core.profiling import list_profiles, load_profile
+from app.utils.blocking import run_blocking
+
+admin_router = APIRouter(tags=["Admin"])
+
+require_profiles_scope = require_scope("admin:profiles")
+
+
+@admin_router.get("/profiles")
+async def list_profile_reports(
+    limit: int = Query(50, ge=1, le=500),
+    service: ServiceTokenPayload = Depends(require_profiles_scope),
+):
+    """
+    List the most recent profiling reports, newest first.
+
+    - **limit**: Maximum number of reports to return
+    """
+    return {"profiles": await run_blocking(list_profiles, limit)}
+
+
+@admin_router.get("/profiles/{profile_id}")
+async def get_profile_report(
+    profile_id: str,
+    service: ServiceTokenPayload = Depends(require_profiles_scope),
+):
+    """
+    Get one profiling report: stack samples, top functions and SQL statements.
+
+    - **profile_id**: The id from the listing
+    """
+    report = await run_blocking(load_profile, profile_id)
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return report
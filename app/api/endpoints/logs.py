@@ -0,0 +1,59 @@
+from typing import Annotated, List
+from fastapi import APIRouter, HTTPException, Query, Security, status
+from app.core.auth import ServiceTokenPayload
+from app.core.config import settings
+from app.core.rate_limit_dependency import rate_limit_dependency
+from app.db.nosql.models import LogQuery, LogStats, NotificationLogEntry
+from app.services.delivery_log import delivery_log
+from app.services.delivery_stats import delivery_stats, parse_period
+from app.utils.blocking import run_blocking
+
+logs_router = APIRouter(tags=["Delivery Logs"])
+
+
+@logs_router.get("/", response_model=List[NotificationLogEntry])
+async def query_delivery_events(
+    log_query: Annotated[LogQuery, Query()],
+    service: ServiceTokenPayload = Security(rate_limit_dependency, scopes=["notifications:read"]),
+):
+    """
+    Search per-recipient delivery events, newest first.
+
+    - **notification_id** / **recipient_id**: Events of one notification or recipient
+    - **channel** / **status**: e.g. every failed SMS
+    - **start_date** / **end_date**: Time range (ISO format; end exclusive)
+    - **limit** / **offset**: Pagination (limit at most 1000)
+    """
+    return await run_blocking(delivery_log.query, log_query)
+
+
+@logs_router.get("/stats", response_model=LogStats)
+async def delivery_stats_summary(
+    period: str = Query("1h", pattern=r"^\d+[mhd]$", description='e.g. "15m", "24h", "7d"'),
+    service: ServiceTokenPayload = Security(rate_limit_dependency, scopes=["notifications:read"]),
+):
+    """
+    Delivery totals over the last `period`: sent/failed counts, per-channel
+    and per-status breakdowns and approximate distinct recipients.
+
+    - **success_count**: recipients sent to
+    - **failure_count**: recipients whose delivery finally failed (not
+      retryable, or dead-lettered once retries ran out), each counted once
+      however many attempts failed before
+    - **total_logs** and the breakdowns: events, one per recipient and
+      attempt, so `status_breakdown["failed"]` counts failed attempts
+
+    Served from the worker's per-minute and per-hour rollups in Redis, never
+    from the notification tables, so it is cheap enough for dashboards that
+    refresh every few seconds.
+    """
+    try:
+        window = parse_period(period)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if window.days >= settings.DELIVERY_STATS_HOUR_RETENTION_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"period must be shorter than {settings.DELIVERY_STATS_HOUR_RETENTION_DAYS}d",
+        )
+    return await run_blocking(delivery_stats.stats, window, period)
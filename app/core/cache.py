@@ -1,7 +1,9 @@
 import json
 from typing import Optional, Any
-from app.core.redis_client import get_redis_client
+import redis
+from app.core.redis_client import LazyRedis
 from app.core.config import settings
+from app.core.metrics import CACHE_DURATION, CACHE_REQUESTS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,9 +14,10 @@ class Cache:
     Redis-based cache for notification data.
     """
 
+    redis = LazyRedis()
+
     def __init__(self, ttl_seconds: int = None):
         self.ttl = ttl_seconds or settings.CACHE_TTL_SECONDS
-        self.redis = get_redis_client()
 
     def _key(self, prefix: str, identifier: str) -> str:
         return f"cache:{prefix}:{identifier}"
@@ -26,14 +29,20 @@ class Cache:
 
         key = self._key(prefix, identifier)
         try:
-            value = self.redis.get(key)
+            with CACHE_DURATION.labels("get").time():
+                value = self.redis.get(key)
             if value:
-                return json.loads(value)
+                decoded = json.loads(value)
+                CACHE_REQUESTS.labels("get", "hit").inc()
+                return decoded
+            CACHE_REQUESTS.labels("get", "miss").inc()
             return None
         except redis.RedisError as e:
+            CACHE_REQUESTS.labels("get", "error").inc()
             logger.warning("Cache get error", extra={"key": key, "error": str(e)})
             return None
         except json.JSONDecodeError as e:
+            CACHE_REQUESTS.labels("get", "error").inc()
             logger.warning("Cache decode error", extra={"key": key, "error": str(e)})
             return None
 
@@ -45,9 +54,12 @@ class Cache:
         key = self._key(prefix, identifier)
         ttl = ttl or self.ttl
         try:
-            self.redis.setex(key, ttl, json.dumps(value, default=str))
+            with CACHE_DURATION.labels("set").time():
+                self.redis.setex(key, ttl, json.dumps(value, default=str))
+            CACHE_REQUESTS.labels("set", "ok").inc()
             return True
         except redis.RedisError as e:
+            CACHE_REQUESTS.labels("set", "error").inc()
             logger.warning("Cache set error", extra={"key": key, "error": str(e)})
             return False
 
@@ -0,0 +1,43 @@
+import asyncio
+import httpx
+from typing import Optional
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get or create the shared async HTTP client.
+    Connections are pooled and kept alive between requests, so provider calls
+    skip the TCP/TLS handshake. The pool belongs to the running event loop;
+    a new client is created if the loop changed.
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client():
+    """Close pooled connections on shutdown."""
+    global _http_client, _http_client_loop
+    if _http_client:
+        # A client from another (finished) loop can't be closed from this one
+        if _http_client_loop is asyncio.get_running_loop():
+            await _http_client.aclose()
+        _http_client = None
+        _http_client_loop = None
@@ -1,7 +1,28 @@
+import atexit
+import copy
 import logging
+import logging.handlers
+import queue
 import sys
 import json
+import threading
+import time
 from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # optional: faster encoding when installed
+    orjson = None
+
+# Attributes every LogRecord has; anything else came from `extra={...}`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(data, default=str, separators=(",", ":"))
 
 
 class JSONFormatter(logging.Formatter):
@@ -9,21 +30,108 @@ class JSONFormatter(logging.Formatter):
 
     def format(self, record: logging.LogRecord) -> str:
         log_data = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
+        # Fields passed as `extra={...}` are set as record attributes
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                log_data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_data["exception"] = record.exc_text
+        return _dumps(log_data)
+
+
+class _BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread. Only the message is rendered here;
+    encoding and I/O happen on the listener. When the queue is full the
+    record is dropped rather than blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
         if record.exc_info:
-            log_data["exception"] = self.formatException(record.exc_info)
-        if hasattr(record, "extra"):
-            log_data.update(record.extra)
-        return json.dumps(log_data)
+            # Render now so the traceback (and its frames) isn't kept alive in the queue
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # The first record through after an overflow reports how many were lost
+        dropped, self.dropped = self.dropped, 0
+        if dropped:
+            record.log_records_dropped = dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped = dropped + 1
+
 
+class RateSampler(logging.Filter):
+    """
+    Per-logger token bucket for INFO-and-below lines: at most `rate` records
+    per second (bursts up to `burst`). Warnings and errors always pass. The
+    next record that passes carries `sampled_out`, the count skipped since.
+    """
 
-def configure_logging(log_level: str = "INFO") -> None:
-    """Configure application logging."""
-    level = getattr(logging, log_level.upper(), logging.INFO)
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        super().__init__()
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._skipped = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                self._skipped += 1
+                return False
+            self._tokens -= 1
+            if self._skipped:
+                record.sampled_out, self._skipped = self._skipped, 0
+        return True
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(log_level: Optional[str] = None) -> None:
+    """
+    Configure application logging.
+    Loggers put records on a bounded in-memory queue; a background listener
+    formats them as JSON and writes them to stdout, so request and message
+    handling never wait on encoding or I/O.
+    """
+    from app.core.config import settings
+
+    global _listener
+    level = getattr(logging, (log_level or settings.LOG_LEVEL).upper(), logging.INFO)
 
     handler = logging.StreamHandler(sys.stdout)
     handler.setLevel(level)
@@ -32,10 +140,24 @@ def configure_logging(log_level: str = "INFO") -> None:
     formatter = JSONFormatter()
     handler.setFormatter(formatter)
 
+    stop_logging()
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.unregister(stop_logging)
+    atexit.register(stop_logging)
+
     # Configure root logger
-    logging.basicConfig(level=level, handlers=[handler])
+    logging.basicConfig(level=level, handlers=[_BoundedQueueHandler(log_queue)], force=True)
+
+    # Sample the per-message info lines of the hot paths
+    for name, rate in settings.LOG_SAMPLE_RATES.items():
+        sampled = logging.getLogger(name)
+        for existing in [f for f in sampled.filters if isinstance(f, RateSampler)]:
+            sampled.removeFilter(existing)
+        sampled.addFilter(RateSampler(rate))
 
     # Set specific logger levels
     logging.getLogger("uvicorn").setLevel(logging.WARNING)
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
-    logging.getLogger("celery").setLevel(logging.INFO)
\ No newline at end of file
+    logging.getLogger("celery").setLevel(logging.INFO)
@@ -0,0 +1,135 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from app.core.tracing import tracer
+from app.utils.exceptions import PartialFailureException
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Buckets for in-process and Redis calls (sub-millisecond to a second)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Buckets for provider sends and queue lag (tens of ms to minutes)
+SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# API
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "API request latency by route template.",
+    ["method", "route", "status"],
+)
+RATE_LIMIT_DECISIONS = Counter(
+    "rate_limit_decisions_total", "Rate-limit checks by result (allowed, limited).", ["result"],
+)
+RATE_LIMIT_DURATION = Histogram(
+    "rate_limit_check_duration_seconds", "Time spent in the Redis token-bucket check.", buckets=FAST_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache operations by result (hit, miss, error, ok).", ["operation", "result"],
+)
+CACHE_DURATION = Histogram(
+    "cache_operation_duration_seconds", "Cache operation latency.", ["operation"], buckets=FAST_BUCKETS,
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the SQLAlchemy pool.")
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time to get a connection from the pool (waiting or connecting).",
+    buckets=FAST_BUCKETS + (2.5, 5.0, 10.0, 30.0),
+)
+DB_QUERIES_PER_UNIT = Histogram(
+    "db_queries_per_unit", "SQL statements per API request or worker message.", ["kind"],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250),
+)
+DB_QUERY_BUDGET_VIOLATIONS = Counter(
+    "db_query_budget_violations_total", "Units of work over their query budget (budget) or repeating a statement (repeated).",
+    ["kind", "reason"],
+)
+DB_READS = Counter(
+    "db_reads_total", "Repository reads by target (replica, primary, or primary_fallback after a replica miss).",
+    ["target"],
+)
+DB_REPLICA_LAG = Gauge("db_replica_lag_seconds", "Replication lag of the read replica at the last check.")
+PUBLISH_DURATION = Histogram(
+    "queue_publish_duration_seconds", "Time to publish a notification to RabbitMQ.", ["result"],
+    buckets=FAST_BUCKETS,
+)
+
+# Worker
+CONSUMER_PROCESSING_DURATION = Histogram(
+    "consumer_processing_duration_seconds", "Time to process one queued notification.",
+    ["channel", "outcome"], buckets=SLOW_BUCKETS,
+)
+CONSUMER_QUEUE_LAG = Histogram(
+    "consumer_queue_lag_seconds", "Time from publish to the consumer picking the message up.",
+    ["channel"], buckets=SLOW_BUCKETS,
+)
+CONSUMER_RETRIES = Counter("consumer_retries_total", "Messages republished to a retry queue.", ["channel"])
+CONSUMER_DEAD_LETTERS = Counter("consumer_dead_letters_total", "Messages dead-lettered after retries.", ["channel"])
+CHANNEL_SEND_DURATION = Histogram(
+    "channel_send_duration_seconds", "Channel service send_notification latency.",
+    ["channel", "provider", "outcome"], buckets=SLOW_BUCKETS,
+)
+CHANNEL_SEND_RECIPIENTS = Counter(
+    "channel_send_recipients_total", "Recipients handled by channel services, by outcome.",
+    ["channel", "provider", "outcome"],
+)
+DELIVERY_LOG_EVENTS = Counter(
+    "delivery_log_events_total", "Delivery events by result (written, dropped when the buffer is full, failed).",
+    ["result"],
+)
+DELIVERY_LOG_WRITE_DURATION = Histogram(
+    "delivery_log_write_duration_seconds", "Time to bulk-insert one batch of delivery events.", buckets=SLOW_BUCKETS,
+)
+
+
+# Set while an instrumented send runs, so sends it delegates to (a failover
+# service's primary or fallback provider) aren't counted or traced again
+_send_in_progress: ContextVar[bool] = ContextVar("channel_send_in_progress", default=False)
+
+
+def observe_send(channel: str):
+    """
+    Decorator for IChannelService.send_notification: records latency and
+    recipient counts per channel and provider, with outcome success, partial
+    or error taken from the per-recipient result, and traces the send as a
+    span. Only the outermost decorated send of a call is instrumented.
+    """
+    def decorator(func):
+        provider = func.__qualname__.split(".")[0]
+
+        @wraps(func)
+        async def wrapper(self, subject, content, recipients, *args, **kwargs):
+            if _send_in_progress.get():
+                return await func(self, subject, content, recipients, *args, **kwargs)
+            token = _send_in_progress.set(True)
+            started = time.perf_counter()
+            outcome, sent, failed = "error", 0, len(recipients)
+            with tracer.start_as_current_span("channel.send", attributes={
+                "channel": channel, "provider": provider, "recipients": len(recipients)
+            }) as span:
+                try:
+                    result = await func(self, subject, content, recipients, *args, **kwargs)
+                    sent, failed = len(result["successful_recipients"]), len(result["failed_recipients"])
+                    outcome = "success" if not failed else "partial" if sent else "error"
+                    return result
+                except PartialFailureException as e:
+                    outcome, sent, failed = "partial", len(e.successful_recipients), len(e.failed_recipients)
+                    raise
+                finally:
+                    _send_in_progress.reset(token)
+                    span.set_attributes({"outcome": outcome, "failed_recipients": failed})
+                    CHANNEL_SEND_DURATION.labels(channel, provider, outcome).observe(time.perf_counter() - started)
+                    if sent:
+                        CHANNEL_SEND_RECIPIENTS.labels(channel, provider, "sent").inc(sent)
+                    if failed:
+                        CHANNEL_SEND_RECIPIENTS.labels(channel, provider, "failed").inc(failed)
+        return wrapper
+    return decorator
+
+
+def start_metrics_server(port: Optional[int]) -> None:
+    """Expose /metrics on its own port (for processes without an HTTP app, e.g. the worker)."""
+    if not port:
+        return
+    start_http_server(port)
+    logger.info("Metrics exporter listening", extra={"port": port})
@@ -0,0 +1,202 @@
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+from app.core.config import settings
+from app.db.sql.instrumentation import start_recording, stop_recording
+import logging
+
+logger = logging.getLogger(__name__)
+
+_PROFILE_ID = re.compile(r"^[\w-]+$")
+
+
+def _collapse(frame) -> str:
+    """A stack as `module:function;module:function` from the outermost frame in."""
+    names = []
+    while frame is not None:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """
+    Statistical profiler: a background thread records the target thread's
+    stack every `interval` seconds. Unlike cProfile it doesn't hook every
+    call, so the profiled request runs at close to its normal speed.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+            del frame
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+
+class Profile:
+    """
+    One profiled unit of work (an API request or a worker message): stack
+    samples of the calling thread plus the SQL run in the calling context.
+    For a request the sampled thread is the event loop, so stacks can include
+    other requests that were running concurrently; the SQL figures can't.
+    """
+
+    def __init__(self, kind: str, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{kind}-{uuid.uuid4().hex[:8]}"
+        self.kind = kind
+        self.name = name
+        self.attributes = dict(attributes or {})
+
+    def start(self) -> "Profile":
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self._queries, self._token = start_recording()
+        self._sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL_MS / 1000).start()
+        return self
+
+    def stop(self, **attributes) -> Dict[str, Any]:
+        """Stop sampling and recording (in the context that started) and return the report."""
+        duration = time.perf_counter() - self._started
+        self._sampler.stop()
+        stop_recording(self._token)
+        stacks = self._sampler.stacks
+        # Samples where the function itself (not a callee) was running
+        leaf = Counter()
+        for stack, count in stacks.items():
+            leaf[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "attributes": {**self.attributes, **attributes},
+            "sql": self._queries.summary(),
+            "samples": sum(stacks.values()),
+            "interval_ms": settings.PROFILING_INTERVAL_MS,
+            "top_functions": [{"function": name, "samples": count} for name, count in leaf.most_common(20)],
+            # Collapsed stacks (stack -> samples), the input format of flamegraph.pl and speedscope
+            "stacks": dict(stacks.most_common()),
+        }
+
+
+def request_profile(method: str, path: str, headers: Mapping[str, str]) -> Optional[Profile]:
+    """
+    Start a profile for this request if profiling is on and it is sampled
+    (PROFILING_SAMPLE_RATE) or carries PROFILING_HEADER set to the secret.
+    """
+    if not settings.PROFILING_ENABLED:
+        return None
+    secret = settings.PROFILING_HEADER_SECRET
+    forced = bool(secret) and hmac.compare_digest(
+        headers.get(settings.PROFILING_HEADER, "").encode(), secret.encode()
+    )
+    if not forced and random.random() >= settings.PROFILING_SAMPLE_RATE:
+        return None
+    return Profile("request", f"{method} {path}", {"forced": forced}).start()
+
+
+def message_profile(payload: Dict[str, Any]) -> Optional[Profile]:
+    """Start a profile for a worker message whose payload matches every PROFILING_MESSAGE_FILTER field."""
+    filters = settings.PROFILING_MESSAGE_FILTER
+    if not settings.PROFILING_ENABLED or not filters:
+        return None
+    if any(str(payload.get(field)) != str(value) for field, value in filters.items()):
+        return None
+    return Profile("message", f"notification {payload.get('id')}", {
+        "channel": str(payload.get("channel")),
+        "attempt": payload.get("attempt", 0) + 1,
+    }).start()
+
+
+def _output_dir() -> Path:
+    return Path(settings.PROFILING_OUTPUT_DIR)
+
+
+def save_profile(report: Dict[str, Any]) -> Optional[Path]:
+    """
+    Write a report to PROFILING_OUTPUT_DIR, keeping at most PROFILING_MAX_FILES.
+    A failed write is logged, not raised, so it never fails the profiled work.
+    """
+    directory = _output_dir()
+    path = directory / f"{report['id']}.json"
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so the listing never reads a partial file
+        partial = path.with_suffix(".tmp")
+        partial.write_text(json.dumps(report, default=str))
+        os.replace(partial, path)
+
+        saved = sorted(directory.glob("*.json"))
+        for stale in saved[:max(0, len(saved) - settings.PROFILING_MAX_FILES)]:
+            stale.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning("Failed to save profile", extra={"profile_id": report["id"], "error": str(e)})
+        return None
+    logger.info("Profile saved", extra={
+        "profile_id": report["id"],
+        "profile_name": report["name"],
+        "duration_ms": report["duration_ms"],
+        "sql_count": report["sql"]["count"],
+    })
+    return path
+
+
+def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """Summaries of the most recent profiles, newest first."""
+    summaries = []
+    # Ids start with a UTC timestamp, so name order is time order
+    for path in sorted(_output_dir().glob("*.json"), reverse=True)[:limit]:
+        try:
+            report = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # pruned or being replaced meanwhile
+        summaries.append({
+            "id": report["id"],
+            "kind": report["kind"],
+            "name": report["name"],
+            "started_at": report["started_at"],
+            "duration_ms": report["duration_ms"],
+            "samples": report["samples"],
+            "sql_count": report["sql"]["count"],
+            "sql_ms": report["sql"]["total_ms"],
+            "attributes": report["attributes"],
+        })
+    return summaries
+
+
+def load_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    """A full report by id, or None."""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    path = _output_dir() / f"{profile_id}.json"
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
@@ -2,6 +2,7 @@ from fastapi import HTTPException, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.rate_limiter import check_rate_limit
 from app.core.auth import verify_service_token, ServiceTokenPayload
+from app.core.metrics import RATE_LIMIT_DECISIONS, RATE_LIMIT_DURATION
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,7 +25,9 @@ async def rate_limit_dependency(
     payload = verify_service_token(credentials.credentials)
 
     # Check rate limit
-    allowed, remaining = check_rate_limit(payload.service_id)
+    with RATE_LIMIT_DURATION.time():
+        allowed, remaining = check_rate_limit(payload.service_id)
+    RATE_LIMIT_DECISIONS.labels("allowed" if allowed else "limited").inc()
 
     if not allowed:
         logger.warning("Rate limit exceeded", extra={
@@ -1,11 +1,60 @@
 import time
 from typing import Tuple
-from app.core.redis_client import get_redis_client
+import redis
+from app.core.redis_client import LazyRedis
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Lua script for atomic token bucket, shared by the API rate limiter and the
+# outbound provider limiter. Takes `requested` tokens if available; otherwise
+# returns how long (ms) until they will be. A `blocked_until` field (set when
+# a provider asks us to back off) refuses all takes until it passes.
+# Returns {allowed, remaining_tokens, wait_ms}.
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local requested = tonumber(ARGV[4] or '1')
+local ttl = tonumber(ARGV[5] or '120')
+
+local bucket = redis.call('HMGET', key, 'tokens', 'last_refill', 'blocked_until')
+local tokens = tonumber(bucket[1])
+local last_refill = tonumber(bucket[2])
+local blocked_until = tonumber(bucket[3])
+
+if tokens == nil then
+    tokens = capacity
+    last_refill = now
+end
+
+if blocked_until ~= nil and now < blocked_until then
+    return {0, math.floor(tokens), math.ceil((blocked_until - now) * 1000)}
+end
+
+-- Refill tokens based on elapsed time
+local elapsed = now - last_refill
+local tokens_to_add = elapsed * refill_rate
+tokens = math.min(capacity, tokens + tokens_to_add)
+last_refill = now
+
+local allowed = 0
+local wait_ms = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+else
+    wait_ms = math.ceil((requested - tokens) / refill_rate * 1000)
+end
+
+redis.call('HSET', key, 'tokens', tokens, 'last_refill', last_refill)
+redis.call('EXPIRE', key, ttl)  -- Expire after inactivity
+
+return {allowed, math.floor(tokens), wait_ms}
+"""
+
 
 class RateLimiter:
     """
@@ -23,7 +72,19 @@ class RateLimiter:
         self.capacity = (requests_per_minute or settings.RATE_LIMIT_REQUESTS_PER_MINUTE) + \
                         (burst or settings.RATE_LIMIT_BURST)
         self.refill_rate = requests_per_minute or settings.RATE_LIMIT_REQUESTS_PER_MINUTE  # tokens per second
-        self.redis = get_redis_client()
+        self._token_bucket = None
+
+    def _reset_script(self, client: redis.Redis) -> None:
+        self._token_bucket = None
+
+    redis = LazyRedis(on_change=_reset_script)
+
+    @property
+    def token_bucket(self):
+        # Runs by EVALSHA (the script is preloaded at startup), falling back to EVAL once
+        if self._token_bucket is None:
+            self._token_bucket = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+        return self._token_bucket
 
     def _key(self, service_id: str) -> str:
         return f"rate_limit:{service_id}"
@@ -39,48 +100,14 @@ class RateLimiter:
         key = self._key(service_id)
         now = time.time()
 
-        # Lua script for atomic token bucket
-        lua_script = """
-        local key = KEYS[1]
-        local capacity = tonumber(ARGV[1])
-        local refill_rate = tonumber(ARGV[2])
-        local now = tonumber(ARGV[3])
-
-        local bucket = redis.call('HMGET', key, 'tokens', 'last_refill')
-        local tokens = tonumber(bucket[1])
-        local last_refill = tonumber(bucket[2])
-
-        if tokens == nil then
-            tokens = capacity
-            last_refill = now
-        end
-
-        -- Refill tokens based on elapsed time
-        local elapsed = now - last_refill
-        local tokens_to_add = elapsed * refill_rate
-        tokens = math.min(capacity, tokens + tokens_to_add)
-        last_refill = now
-
-        local allowed = 0
-        if tokens >= 1 then
-            tokens = tokens - 1
-            allowed = 1
-        end
-
-        redis.call('HMSET', key, 'tokens', tokens, 'last_refill', last_refill)
-        redis.call('EXPIRE', key, 120)  -- Expire after 2 min of inactivity
-
-        return {allowed, math.floor(tokens)}
-        """
-
         try:
-            result = self.redis.eval(
-                lua_script,
-                1,
-                key,
-                self.capacity,
-                self.refill_rate / 60.0,  # convert per-minute to per-second
-                now,
+            result = self.token_bucket(
+                keys=[key],
+                args=[
+                    self.capacity,
+                    self.refill_rate / 60.0,  # convert per-minute to per-second
+                    now,
+                ],
             )
             allowed = bool(result[0])
             remaining = int(result[1])
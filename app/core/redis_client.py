@@ -1,5 +1,5 @@
 import redis
-from typing import Optional
+from typing import Any, Callable, Optional
 from app.core.config import settings
 import logging
 
@@ -25,4 +25,34 @@ def close_redis_client():
     global _redis_client
     if _redis_client:
         _redis_client.close()
-        _redis_client = None
\ No newline at end of file
+        _redis_client = None
+
+class LazyRedis:
+    """
+    Class attribute holding a Redis client that is fetched with
+    get_redis_client() on first use, so importing or constructing the owner
+    opens no client. Assigning a client (e.g. a fake in tests) replaces it.
+    `on_change(owner, client)` runs whenever the client is set either way,
+    for owners that derive state from it such as registered scripts.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[Any, redis.Redis], None]] = None):
+        self.on_change = on_change
+        self.attribute = "_redis"
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.attribute = f"_{name}"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        client = instance.__dict__.get(self.attribute)
+        if client is None:
+            client = get_redis_client()
+            self.__set__(instance, client)
+        return client
+
+    def __set__(self, instance, client) -> None:
+        instance.__dict__[self.attribute] = client
+        if self.on_change is not None:
+            self.on_change(instance, client)
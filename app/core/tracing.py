@@ -0,0 +1,81 @@
+from typing import Any, Dict, Optional
+from opentelemetry import context as otel_context, trace
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Spans are no-ops until configure_tracing() installs an SDK provider, so
+# instrumented code costs next to nothing with tracing disabled
+tracer = trace.get_tracer("notification_system")
+
+# W3C trace context (traceparent / tracestate), carried in HTTP and AMQP headers
+_propagator = TraceContextTextMapPropagator()
+_provider = None
+
+
+def configure_tracing(service_name: str) -> None:
+    """
+    Install the SDK tracer provider for this process when TRACING_ENABLED.
+    Traces are head-sampled (TRACING_SAMPLE_RATIO of new traces; downstream
+    spans follow the caller's decision) and exported in batches to
+    TRACING_FILE_PATH as JSON lines, or to an OTLP/HTTP collector.
+    """
+    global _provider
+    if not settings.TRACING_ENABLED or _provider is not None:
+        return
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(_create_exporter()))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    logger.info("Tracing enabled", extra={
+        "service": service_name,
+        "exporter": settings.TRACING_EXPORTER,
+        "sample_ratio": settings.TRACING_SAMPLE_RATIO,
+    })
+
+
+def _create_exporter():
+    if settings.TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    return ConsoleSpanExporter(
+        out=open(settings.TRACING_FILE_PATH, "a", buffering=1),
+        formatter=lambda span: span.to_json(indent=None) + "\n",
+    )
+
+
+def shutdown_tracing() -> None:
+    """Flush buffered spans on shutdown."""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+
+
+def inject_context(headers: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Add the current trace context to message headers (returns the dict)."""
+    headers = {} if headers is None else headers
+    _propagator.inject(headers)
+    return headers
+
+
+def extract_context(headers: Optional[Dict[str, Any]]) -> otel_context.Context:
+    """Trace context from incoming headers; an empty context starts a new trace."""
+    if not isinstance(headers, dict):
+        return otel_context.Context()
+    # AMQP header values may arrive as bytes
+    carrier = {k: v.decode() if isinstance(v, bytes) else v for k, v in headers.items()}
+    return _propagator.extract(carrier, context=otel_context.Context())
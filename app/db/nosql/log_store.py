@@ -0,0 +1,193 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.db.nosql.models import NotificationLogEntry, LogQuery
+from app.utils.interfaces import IDeliveryLogStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive datetimes (the model's default) are UTC."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+class MongoDeliveryLogStore(IDeliveryLogStore):
+    """
+    Events in a MongoDB collection. Indexes cover every LogQuery filter with
+    the newest-first sort, plus a TTL index that expires old events.
+    """
+
+    def __init__(self, url: Optional[str] = None, database: Optional[str] = None,
+                 collection: Optional[str] = None):
+        self.url = url or settings.MONGODB_URL
+        self.database = database or settings.DELIVERY_LOG_DATABASE
+        self.collection_name = collection or settings.DELIVERY_LOG_COLLECTION
+        self._client = None
+
+    @property
+    def collection(self):
+        # Connects on first use; the client is thread-safe and pools connections
+        if self._client is None:
+            from pymongo import MongoClient
+
+            self._client = MongoClient(self.url, tz_aware=True, serverSelectionTimeoutMS=5000)
+        return self._client[self.database][self.collection_name]
+
+    def ensure_indexes(self) -> None:
+        from pymongo import ASCENDING, DESCENDING, IndexModel
+
+        indexes = [
+            IndexModel([("notification_id", ASCENDING), ("timestamp", DESCENDING)]),
+            IndexModel([("recipient_id", ASCENDING), ("timestamp", DESCENDING)],
+                       partialFilterExpression={"recipient_id": {"$type": "number"}}),
+            IndexModel([("channel", ASCENDING), ("status", ASCENDING), ("timestamp", DESCENDING)]),
+            IndexModel([("status", ASCENDING), ("timestamp", DESCENDING)]),
+        ]
+        if settings.DELIVERY_LOG_RETENTION_DAYS > 0:
+            indexes.append(IndexModel(
+                [("timestamp", ASCENDING)], expireAfterSeconds=settings.DELIVERY_LOG_RETENTION_DAYS * 86400,
+            ))
+        else:
+            indexes.append(IndexModel([("timestamp", ASCENDING)]))
+        self.collection.create_indexes(indexes)
+
+    def insert_many(self, entries: List[NotificationLogEntry]) -> None:
+        # Unordered: one bad document doesn't stop the rest of the batch
+        documents = [{
+            **entry.model_dump(),
+            "channel": entry.channel.value,
+            "status": entry.status.value,
+            "timestamp": _utc(entry.timestamp),
+        } for entry in entries]
+        self.collection.insert_many(documents, ordered=False)
+
+    def query(self, query: LogQuery) -> List[NotificationLogEntry]:
+        filters: Dict[str, Any] = {}
+        for field in ("notification_id", "recipient_id", "channel", "status"):
+            value = getattr(query, field)
+            if value is not None:
+                filters[field] = value.value if hasattr(value, "value") else value
+        if query.start_date or query.end_date:
+            filters["timestamp"] = {}
+            if query.start_date:
+                filters["timestamp"]["$gte"] = _utc(query.start_date)
+            if query.end_date:
+                filters["timestamp"]["$lt"] = _utc(query.end_date)
+        cursor = (self.collection.find(filters, {"_id": False})
+                  .sort("timestamp", -1).skip(query.offset).limit(query.limit))
+        return [NotificationLogEntry(**document) for document in cursor]
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+class SQLiteDeliveryLogStore(IDeliveryLogStore):
+    """
+    Events in a local SQLite file (or ":memory:"), for development and tests.
+    One connection shared under a lock between the writer thread and readers.
+    """
+
+    COLUMNS = ("notification_id", "recipient_id", "channel", "status", "message", "timestamp",
+               "external_id", "error_message", "retry_count", "response_data")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.DELIVERY_LOG_SQLITE_PATH
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS delivery_events ("
+                "id INTEGER PRIMARY KEY, notification_id TEXT NOT NULL, recipient_id INTEGER, "
+                "channel TEXT NOT NULL, status TEXT NOT NULL, message TEXT NOT NULL, "
+                "timestamp REAL NOT NULL, external_id TEXT, error_message TEXT, "
+                "retry_count INTEGER, response_data TEXT)"
+            )
+        return self._connection
+
+    def ensure_indexes(self) -> None:
+        with self._lock:
+            for name, columns in (
+                ("idx_events_notification", "notification_id, timestamp DESC"),
+                ("idx_events_recipient", "recipient_id, timestamp DESC"),
+                ("idx_events_channel_status", "channel, status, timestamp DESC"),
+                ("idx_events_status", "status, timestamp DESC"),
+                ("idx_events_timestamp", "timestamp DESC"),
+            ):
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON delivery_events ({columns})")
+            self.connection.commit()
+
+    def insert_many(self, entries: List[NotificationLogEntry]) -> None:
+        rows = [(
+            entry.notification_id, entry.recipient_id, entry.channel.value, entry.status.value, entry.message,
+            _utc(entry.timestamp).timestamp(), entry.external_id, entry.error_message, entry.retry_count,
+            json.dumps(entry.response_data, default=str) if entry.response_data is not None else None,
+        ) for entry in entries]
+        with self._lock:
+            self.connection.executemany(
+                f"INSERT INTO delivery_events ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                rows,
+            )
+            self.connection.commit()
+
+    def _where(self, query: LogQuery) -> Tuple[str, list]:
+        clauses, params = [], []
+        for field in ("notification_id", "recipient_id", "channel", "status"):
+            value = getattr(query, field)
+            if value is not None:
+                clauses.append(f"{field} = ?")
+                params.append(value.value if hasattr(value, "value") else value)
+        if query.start_date:
+            clauses.append("timestamp >= ?")
+            params.append(_utc(query.start_date).timestamp())
+        if query.end_date:
+            clauses.append("timestamp < ?")
+            params.append(_utc(query.end_date).timestamp())
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, query: LogQuery) -> List[NotificationLogEntry]:
+        where, params = self._where(query)
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM delivery_events{where} "
+                "ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+                params + [query.limit, query.offset],
+            ).fetchall()
+        entries = []
+        for row in rows:
+            values = dict(zip(self.COLUMNS, row))
+            values["timestamp"] = datetime.fromtimestamp(values["timestamp"], timezone.utc)
+            if values["response_data"] is not None:
+                values["response_data"] = json.loads(values["response_data"])
+            entries.append(NotificationLogEntry(**values))
+        return entries
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def create_log_store() -> Optional[IDeliveryLogStore]:
+    """The store DELIVERY_LOG_BACKEND selects, or None when the log is off."""
+    backend = settings.DELIVERY_LOG_BACKEND
+    if backend == "mongodb":
+        return MongoDeliveryLogStore()
+    if backend == "sqlite":
+        return SQLiteDeliveryLogStore()
+    if backend != "none":
+        logger.warning("Unknown delivery log backend, event log disabled", extra={"backend": backend})
+    return None
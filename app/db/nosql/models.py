@@ -19,7 +19,7 @@ class NotificationLogEntry(BaseModel):
     """Single log entry for notification events"""
     
     # Core identifiers
-    notification_id: int = Field(..., description="Reference to SQL notification ID")
+    notification_id: str = Field(..., description="Reference to SQL notification ID")
     recipient_id: Optional[int] = Field(None, description="Reference to SQL recipient ID")
     
     # Event details
@@ -34,6 +34,8 @@ class NotificationLogEntry(BaseModel):
     external_id: Optional[str] = Field(None, description="External service tracking ID")
     error_message: Optional[str] = Field(None, description="Error message if failed")
     retry_count: Optional[int] = Field(default=0, description="Current retry attempt")
+    # Read by the stats rollups only; not stored or returned
+    final: bool = Field(default=False, exclude=True, description="No further attempt follows this event")
     
     # Response data from external services (for debugging)
     response_data: Optional[Dict[str, Any]] = Field(None, description="Response from external service")
@@ -47,7 +49,7 @@ class NotificationLogEntry(BaseModel):
 class LogQuery(BaseModel):
     """Query parameters for searching logs"""
     
-    notification_id: Optional[int] = None
+    notification_id: Optional[str] = None
     recipient_id: Optional[int] = None
     channel: Optional[LogChannel] = None
     status: Optional[LogStatus] = None
@@ -64,5 +66,6 @@ class LogStats(BaseModel):
     failure_count: int
     channel_breakdown: Dict[str, int]
     status_breakdown: Dict[str, int]
+    unique_recipients: Optional[int] = Field(None, description="Approximate distinct recipients")
     time_period: str
     generated_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
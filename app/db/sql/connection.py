@@ -1,28 +1,200 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
-from typing import Generator
+from sqlalchemy.pool import QueuePool
+from typing import Callable, Generator, Optional
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKOUTS, DB_POOL_CHECKOUT_WAIT, DB_REPLICA_LAG
+from app.db.sql.instrumentation import install_query_hooks
+import logging
 
-# Initialize settings
+logger = logging.getLogger(__name__)
 
-if settings.DATABASE_URL is None:
-    raise ValueError("DATABASE_URL must be set")
+_engine: Optional[Engine] = None
+_replica_engine: Optional[Engine] = None
 
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    # For PostgreSQL
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.DEBUG,  # Set to True to log SQL queries
-    # For SQLite, uncomment the line below and comment the above lines
-    # connect_args={"check_same_thread": False}
-)
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def _create_engine(url: str, pool_size: int, max_overflow: int) -> Engine:
+    # SQLite uses a single-connection pool without sizing options
+    pool_options = {} if url.startswith("sqlite") else {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "poolclass": TimedQueuePool,
+    }
+    engine = create_engine(
+        url,
+        # For PostgreSQL
+        pool_pre_ping=True,
+        pool_recycle=300,
+        echo=settings.DEBUG,  # Set to True to log SQL queries
+        # For SQLite, uncomment the line below and comment the above lines
+        # connect_args={"check_same_thread": False}
+        **pool_options,
+    )
+    event.listen(engine, "checkout", lambda *args: DB_POOL_CHECKOUTS.inc())
+    # Per-request / per-message query counts and timings (profiling)
+    install_query_hooks(engine)
+    return engine
+
+
+def get_engine() -> Engine:
+    """
+    Get or create the SQLAlchemy engine.
+    Created on first use (or during app warm-up) rather than at import, so
+    importing models and repositories stays cheap.
+    """
+    global _engine
+    if _engine is None:
+        if settings.DATABASE_URL is None:
+            raise ValueError("DATABASE_URL must be set")
+        _engine = _create_engine(settings.DATABASE_URL, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+    return _engine
+
+
+def get_replica_engine() -> Optional[Engine]:
+    """The read replica's engine (its own pool), or None when DATABASE_REPLICA_URL is unset."""
+    global _replica_engine
+    if _replica_engine is None and settings.DATABASE_REPLICA_URL:
+        _replica_engine = _create_engine(
+            settings.DATABASE_REPLICA_URL, settings.DB_REPLICA_POOL_SIZE, settings.DB_REPLICA_MAX_OVERFLOW,
+        )
+    return _replica_engine
+
+
+def replica_lag_seconds(connection: Connection) -> float:
+    """
+    How far the replica's replay is behind. A replica that has replayed all
+    the WAL it received counts as current, even if the primary has been idle
+    since its last transaction.
+    """
+    if connection.dialect.name != "postgresql":
+        return 0.0
+    lag = connection.execute(text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    )).scalar()
+    return float(lag or 0.0)
+
+
+class ReplicaMonitor:
+    """
+    Whether the replica may serve reads: reachable and no more than
+    DB_REPLICA_MAX_LAG_SECONDS behind. Measured at most once per
+    DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS; callers in between reuse the
+    last answer, so routing a read costs no extra round trip.
+    """
+
+    def __init__(self, engine_factory: Callable[[], Optional[Engine]] = get_replica_engine):
+        self._engine_factory = engine_factory
+        self._lock = threading.Lock()
+        self._checked_at: Optional[float] = None
+        self._usable = False
+
+    def usable(self) -> bool:
+        now = time.monotonic()
+        if self._fresh(now):
+            return self._usable
+        with self._lock:
+            if not self._fresh(now):
+                self._usable = self._check()
+                self._checked_at = now
+        return self._usable
+
+    def _fresh(self, now: float) -> bool:
+        return self._checked_at is not None and now - self._checked_at < settings.DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS
+
+    def _check(self) -> bool:
+        engine = self._engine_factory()
+        if engine is None:
+            return False
+        try:
+            with engine.connect() as connection:
+                lag = replica_lag_seconds(connection)
+        except Exception as e:
+            if self._usable:
+                logger.warning("Read replica unreachable, reading from the primary", extra={"error": str(e)})
+            return False
+        DB_REPLICA_LAG.set(lag)
+        usable = lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+        if usable and not self._usable:
+            logger.info("Read replica in use", extra={"lag_seconds": round(lag, 3)})
+        elif not usable and self._usable:
+            logger.warning("Read replica lagging, reading from the primary", extra={"lag_seconds": round(lag, 3)})
+        return usable
+
+    def reset(self) -> None:
+        with self._lock:
+            self._checked_at, self._usable = None, False
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def dispose_engine():
+    """Close pooled connections on shutdown."""
+    global _engine, _replica_engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+        # Rebind on the next session instead of reusing the disposed engine
+        SessionLocal.configure(bind=None)
+    if _replica_engine is not None:
+        _replica_engine.dispose()
+        _replica_engine = None
+        ReplicaSessionLocal.configure(bind=None)
+        replica_monitor.reset()
+
+
+def __getattr__(name: str):
+    # `engine` is still importable, but only created when asked for
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker that binds to the engine when the first session is made."""
+
+    def __init__(self, engine_factory: Callable[[], Engine] = get_engine, **kw):
+        super().__init__(**kw)
+        self.engine_factory = engine_factory
+
+    def __call__(self, **local_kw) -> Session:
+        if self.kw.get("bind") is None:
+            self.configure(bind=self.engine_factory())
+        return super().__call__(**local_kw)
+
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+
+# Sessions on the read replica, for read-only queries
+ReplicaSessionLocal = _LazySessionmaker(get_replica_engine, autocommit=False, autoflush=False)
+
+
+def open_replica_session() -> Optional[Session]:
+    """
+    A session on the read replica, or None when there is no replica or it is
+    unreachable or lagging (the caller then reads from the primary). The
+    caller closes it.
+    """
+    if not settings.DATABASE_REPLICA_URL or not replica_monitor.usable():
+        return None
+    return ReplicaSessionLocal()
 
 # Base class for models
 Base = declarative_base()
@@ -44,7 +216,7 @@ def create_tables():
     Call this during application startup.
     """
     # from app.db.sql.models import Base as ModelsBase
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
 
 def drop_tables():
     """
@@ -52,4 +224,4 @@ def drop_tables():
     Use with caution - only for development/testing.
     """
     # from app.db.sql.models import Base as ModelsBase
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+    Base.metadata.drop_all(bind=get_engine())
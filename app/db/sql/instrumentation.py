@@ -0,0 +1,158 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.metrics import DB_QUERIES_PER_UNIT, DB_QUERY_BUDGET_VIOLATIONS
+from app.utils.exceptions import QueryBudgetExceededException
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The recorder for the current request or worker message, if any. Context
+# variables follow the work into tasks and threadpool calls, so concurrent
+# requests each see only their own queries.
+_current_recorder: ContextVar[Optional["QueryRecorder"]] = ContextVar("query_recorder", default=None)
+
+
+class QueryRecorder:
+    """
+    SQL statements executed while the recorder is active, with their durations.
+    Recorders nest: a statement is also recorded by every enclosing recorder,
+    so a profile or a test budget inside a request doesn't hide queries from
+    the request's own count.
+    """
+
+    def __init__(self, parent: Optional["QueryRecorder"] = None):
+        self.parent = parent
+        self.queries: List[Tuple[str, float]] = []
+
+    def record(self, statement: str, duration: float) -> None:
+        recorder = self
+        while recorder is not None:
+            recorder.queries.append((statement, duration))
+            recorder = recorder.parent
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(duration for _, duration in self.queries)
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """
+        Statements run at least `threshold` times, the usual sign of an N+1
+        (one query per row in a loop). A batched executemany counts once.
+        """
+        counts: Dict[str, int] = {}
+        for statement, _ in self.queries:
+            counts[statement] = counts.get(statement, 0) + 1
+        return {statement: n for statement, n in counts.items() if n >= threshold}
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        """Totals plus the `top` statements by time spent, grouped by SQL text."""
+        grouped: Dict[str, List[float]] = {}
+        for statement, duration in self.queries:
+            grouped.setdefault(statement, []).append(duration)
+        statements = sorted(grouped.items(), key=lambda item: sum(item[1]), reverse=True)
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "statements": [
+                {"sql": sql, "count": len(durations), "total_ms": round(sum(durations) * 1000, 3)}
+                for sql, durations in statements[:top]
+            ],
+        }
+
+
+def start_recording() -> Tuple[QueryRecorder, Token]:
+    """Start recording this context's statements; pass the token to stop_recording."""
+    recorder = QueryRecorder(parent=_current_recorder.get())
+    return recorder, _current_recorder.set(recorder)
+
+
+def stop_recording(token: Token) -> None:
+    _current_recorder.reset(token)
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryRecorder]:
+    """Record every statement run in this context (on engines with the hooks installed)."""
+    recorder, token = start_recording()
+    try:
+        yield recorder
+    finally:
+        stop_recording(token)
+
+
+def check_query_budget(recorder: QueryRecorder, kind: str, unit: str) -> None:
+    """
+    Compare a finished request or message with its budget: SQL_QUERY_BUDGETS
+    for `unit` (e.g. "POST /api/v1/notifications/" or "message email"),
+    else SQL_QUERY_BUDGET_DEFAULT, and no statement repeated
+    SQL_REPEATED_STATEMENT_THRESHOLD times. Violations are logged and counted;
+    with SQL_BUDGET_STRICT (the test suite) they raise.
+    """
+    DB_QUERIES_PER_UNIT.labels(kind).observe(recorder.count)
+    budget = settings.SQL_QUERY_BUDGETS.get(unit, settings.SQL_QUERY_BUDGET_DEFAULT)
+    repeated = recorder.repeated(settings.SQL_REPEATED_STATEMENT_THRESHOLD)
+    if recorder.count <= budget and not repeated:
+        return
+    if recorder.count > budget:
+        DB_QUERY_BUDGET_VIOLATIONS.labels(kind, "budget").inc()
+    if repeated:
+        DB_QUERY_BUDGET_VIOLATIONS.labels(kind, "repeated").inc()
+    logger.warning("Query budget exceeded", extra={
+        "unit": unit,
+        "query_count": recorder.count,
+        "query_budget": budget,
+        "query_ms": round(recorder.total_seconds * 1000, 3),
+        "repeated_statements": repeated,
+    })
+    if settings.SQL_BUDGET_STRICT:
+        raise QueryBudgetExceededException(unit, recorder.count, budget, repeated)
+
+
+@contextmanager
+def query_budget(max_queries: int, unit: str = "block") -> Iterator[QueryRecorder]:
+    """
+    Fail if the block runs more than `max_queries` statements or repeats one
+    SQL_REPEATED_STATEMENT_THRESHOLD times. For tests that pin a code path's
+    round-trip count: `with query_budget(5): await service.create_notification(...)`.
+    """
+    with record_queries() as recorder:
+        yield recorder
+    repeated = recorder.repeated(settings.SQL_REPEATED_STATEMENT_THRESHOLD)
+    if recorder.count > max_queries or repeated:
+        raise QueryBudgetExceededException(unit, recorder.count, max_queries, repeated)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_recorder.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recorder = _current_recorder.get()
+    started = conn.info.get("query_started")
+    if recorder is not None and started:
+        recorder.record(statement, time.perf_counter() - started.pop())
+
+
+def _handle_error(exception_context):
+    # A failed statement gets no after_cursor_execute; drop its start time
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def install_query_hooks(engine: Engine) -> None:
+    """Time statements on `engine`; without an active recorder the hooks do nothing."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Text, DateTime, Boolean, Enum as SQLEnum, Index
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum as SQLEnum, Index, PrimaryKeyConstraint, Uuid
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from datetime import datetime
-import uuid
+from datetime import datetime, timezone
+from typing import Optional
 from app.api.schemas.common import Priority, Channel, Status  # More specific import
+from app.utils.ids import new_notification_id
 from .connection import Base
 
 # Enums
@@ -27,56 +30,102 @@ from .connection import Base
 #     FAILED = "failed"
 #     CANCELLED = "cancelled"
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _sqlite_rowid_key(table) -> Optional[Column]:
+    """
+    The autoincrementing id of a composite (id, created_at) primary key.
+    SQLite can only autoincrement a single-column integer key, and it's
+    never partitioned, so there the id alone is the key.
+    """
+    columns = list(table.primary_key.columns)
+    if len(columns) > 1 and columns[0].autoincrement is True:
+        return columns[0]
+    return None
+
+
+@compiles(CreateColumn, "sqlite")
+def _sqlite_create_column(create, compiler, **kw):
+    column = create.element
+    if column is _sqlite_rowid_key(column.table):
+        return f"{compiler.preparer.format_column(column)} INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT"
+    return compiler.visit_create_column(create, **kw)
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def _sqlite_primary_key(constraint, compiler, **kw):
+    if _sqlite_rowid_key(constraint.table) is not None:
+        return None
+    return compiler.visit_primary_key_constraint(constraint, **kw)
+
+
+# Both tables are partitioned by month on created_at (PostgreSQL), so it is
+# part of their primary keys; its value is set on insert so the ORM knows
+# the full key. There is no database-level foreign key between them (see
+# the partitioning migration); the relationships join on notification_id.
+
 class Notification(Base):
     __tablename__ = "notifications"
     
-    id = Column(String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
-    sender_user_id = Column(Integer, nullable=True, index=True)  # Reference to external user service
+    # Time-ordered UUIDv7, native UUID on PostgreSQL; still a string in Python and the API
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_notification_id)
+    sender_user_id = Column(Integer, nullable=True)  # Reference to external user service
     subject = Column(String(255), nullable=True)
-    priority = Column(SQLEnum(Priority), nullable=False, index=True)
+    priority = Column(SQLEnum(Priority), nullable=False)
     channel = Column(SQLEnum(Channel), nullable=False)
     content = Column(Text, nullable=False)
     # template = Column(String(100), nullable=True)
-    status = Column(SQLEnum(Status), default=Status.PENDING, index=True)
-    scheduled_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    status = Column(SQLEnum(Status), default=Status.PENDING)
+    scheduled_at = Column(DateTime(timezone=True), nullable=True)
     sent_at = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=_utcnow, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
-    recipients = relationship("NotificationRecipient", back_populates="notification", cascade="all, delete-orphan")
+    recipients = relationship(
+        "NotificationRecipient", back_populates="notification", cascade="all, delete-orphan",
+        primaryjoin="Notification.id == foreign(NotificationRecipient.notification_id)",
+    )
     
+    # One index per query pattern (see app/tests/test_query_plans.py); the
+    # primary key serves lookups and status updates by id
     __table_args__ = (
-        Index('idx_notification_status_priority', 'status', 'priority'),
-        Index('idx_notification_scheduled_at', 'scheduled_at'),
-        Index('idx_notification_sender', 'sender_user_id'),
+        # list_notifications: newest first
+        Index('idx_notification_created_at', 'created_at'),
     )
 
 class NotificationRecipient(Base):
     __tablename__ = "notification_recipients"
     
-    id = Column(Integer, primary_key=True, index=True)
-    notification_id = Column(String(36), ForeignKey("notifications.id"), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    notification_id = Column(Uuid(as_uuid=False), nullable=False)
     
     # Store recipient info directly (from external user service or provided directly)
-    user_id = Column(Integer, nullable=True, index=True)  # Reference to external user service
-    email = Column(String(255), nullable=True, index=True)
-    phone_number = Column(String(20), nullable=True, index=True)
+    user_id = Column(Integer, nullable=True)  # Reference to external user service
+    email = Column(String(255), nullable=True)
+    phone_number = Column(String(20), nullable=True)
     push_token = Column(String(500), nullable=True)
     
-    status = Column(SQLEnum(Status), default=Status.PENDING, index=True)
+    status = Column(SQLEnum(Status), default=Status.PENDING)
     delivered_at = Column(DateTime(timezone=True), nullable=True)
     failed_reason = Column(Text, nullable=True)
     retry_count = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=_utcnow, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
-    notification = relationship("Notification", back_populates="recipients")
+    notification = relationship(
+        "Notification", back_populates="recipients",
+        primaryjoin="Notification.id == foreign(NotificationRecipient.notification_id)",
+    )
     
     __table_args__ = (
+        # Recipients of a notification and their per-status counts
         Index('idx_recipient_notification_status', 'notification_id', 'status'),
-        Index('idx_recipient_user_id', 'user_id'),
     )
 
 # class NotificationTemplate(Base):
@@ -0,0 +1,216 @@
+"""
+Monthly range partitions of the notification tables (PostgreSQL).
+
+After the partitioning migration, `notifications` and
+`notification_recipients` are partitioned by month on `created_at`. The
+worker (periodically) and the `ensure` command keep
+DB_PARTITION_PREMAKE_MONTHS future partitions created ahead of inserts; a
+DEFAULT partition catches rows for any month that still has none. The
+retention command detaches and drops whole months older than
+DB_PARTITION_RETENTION_DAYS, which avoids row-by-row DELETEs and the vacuum
+work they leave behind:
+
+    python -m app.db.sql.partitions ensure
+    python -m app.db.sql.partitions retention --older-than-days 365 [--dry-run]
+
+On other databases, or before the migration has run, every function here
+is a no-op.
+"""
+import argparse
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Children before parents when dropping
+PARTITIONED_TABLES = ("notification_recipients", "notifications")
+
+# Serialises partition DDL across worker processes and the CLI
+_MAINTENANCE_LOCK_KEY = 4735021
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+_PARTITION_NAME = re.compile(rf"^(?:{'|'.join(PARTITIONED_TABLES)})_(?:p\d{{4}}_\d{{2}}|legacy|default)$")
+
+
+class Partition(NamedTuple):
+    name: str
+    upper: Optional[datetime]  # exclusive; None for MAXVALUE or DEFAULT
+    is_default: bool = False
+
+
+def month_start(moment: datetime, offset: int = 0) -> datetime:
+    """First instant (UTC) of the month `offset` months after `moment`'s."""
+    moment = moment.astimezone(timezone.utc) if moment.tzinfo else moment
+    months = moment.year * 12 + moment.month - 1 + offset
+    return datetime(months // 12, months % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start:%Y_%m}"
+
+
+def is_partition_name(name: str) -> bool:
+    """Whether `name` is one of the partitions of the notification tables (not in the models)."""
+    return _PARTITION_NAME.match(name) is not None
+
+
+def upper_bound(bound_expression: str) -> Optional[datetime]:
+    """The exclusive upper bound of a `pg_get_expr(relpartbound)` expression."""
+    match = _UPPER_BOUND.search(bound_expression)
+    return datetime.fromisoformat(match.group(1)) if match else None
+
+
+def expired_partitions(partitions: List[Partition], cutoff: datetime) -> List[Partition]:
+    """Partitions whose every row is older than `cutoff`."""
+    return [p for p in partitions if p.upper is not None and p.upper <= cutoff]
+
+
+def is_partitioned(connection: Connection, table: str) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"), {"table": table}
+    ).first() is not None
+
+
+def list_partitions(connection: Connection, table: str) -> List[Partition]:
+    rows = connection.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+    ), {"table": table}).all()
+    return [Partition(name, upper_bound(bound), bound == "DEFAULT") for name, bound in rows]
+
+
+def _engine(engine: Optional[Engine]) -> Engine:
+    if engine is not None:
+        return engine
+    from app.db.sql.connection import get_engine
+
+    return get_engine()
+
+
+def _create_partition(connection: Connection, table: str, start: datetime, end: datetime,
+                      default: Optional[str]) -> str:
+    name = partition_name(table, start)
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    if default is None:
+        connection.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} {bounds}"))
+        return name
+    # Rows for this month may already have landed in the default partition;
+    # PostgreSQL refuses the new partition until they are moved into it
+    in_range = {"start": start, "end": end}
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {name} (LIKE {table} INCLUDING DEFAULTS)"))
+    connection.execute(text(
+        f"INSERT INTO {name} SELECT * FROM {default} WHERE created_at >= :start AND created_at < :end"
+    ), in_range)
+    connection.execute(text(f"DELETE FROM {default} WHERE created_at >= :start AND created_at < :end"), in_range)
+    connection.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}"))
+    return name
+
+
+def ensure_partitions(engine: Optional[Engine] = None, months_ahead: Optional[int] = None,
+                      now: Optional[datetime] = None) -> List[str]:
+    """
+    Create any missing partition up to `months_ahead` months out; returns the
+    new ones. Partitions are contiguous, so this continues from the end of
+    the last one (the migration's legacy partition covers everything before
+    it), filling in any months missed while nothing ran; their rows are
+    moved out of the default partition. Runs under a transaction-scoped
+    advisory lock, and lists the partitions only once it holds it, so
+    concurrent workers don't create the same month twice.
+    """
+    months_ahead = settings.DB_PARTITION_PREMAKE_MONTHS if months_ahead is None else months_ahead
+    now = now or datetime.now(timezone.utc)
+    horizon = month_start(now, months_ahead + 1)
+    created = []
+    with _engine(engine).begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _MAINTENANCE_LOCK_KEY})
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(connection, table):
+                continue
+            partitions = list_partitions(connection, table)
+            default = next((p.name for p in partitions if p.is_default), None)
+            start = max((p.upper for p in partitions if p.upper), default=None) or month_start(now)
+            while start < horizon:
+                end = month_start(start, 1)
+                created.append(_create_partition(connection, table, start, end, default))
+                start = end
+    if created:
+        logger.info("Created notification partitions", extra={"partitions": created})
+    return created
+
+
+def _drop_partition(engine: Engine, table: str, partition: Partition, concurrently: bool) -> None:
+    if concurrently:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition.name} CONCURRENTLY"))
+            connection.execute(text(f"DROP TABLE {partition.name}"))
+        return
+    with engine.begin() as connection:
+        connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition.name}"))
+        connection.execute(text(f"DROP TABLE {partition.name}"))
+
+
+def drop_expired_partitions(engine: Optional[Engine] = None, older_than_days: Optional[int] = None,
+                            now: Optional[datetime] = None, dry_run: bool = False) -> List[str]:
+    """
+    Detach and drop every partition that ends more than `older_than_days`
+    ago; returns their names. Without a default partition this uses DETACH
+    ... CONCURRENTLY (PostgreSQL 14+), autocommitted since it can't run in a
+    transaction, which doesn't block inserts into the current month.
+    PostgreSQL refuses CONCURRENTLY when the table has a default partition,
+    so then each month is detached and dropped in one short transaction,
+    which blocks writes to the table until it commits.
+    """
+    older_than_days = settings.DB_PARTITION_RETENTION_DAYS if older_than_days is None else older_than_days
+    if older_than_days <= 0:
+        logger.info("Partition retention disabled")
+        return []
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)
+    engine = _engine(engine)
+    expired = []
+    with engine.connect() as connection:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(connection, table):
+                continue
+            partitions = list_partitions(connection, table)
+            has_default = any(p.is_default for p in partitions)
+            expired.extend((table, p, has_default) for p in expired_partitions(partitions, cutoff))
+    dropped = []
+    for table, partition, has_default in expired:
+        if not dry_run:
+            _drop_partition(engine, table, partition, concurrently=not has_default)
+        logger.info("Dropped expired partition", extra={
+            "partition": partition.name, "upper_bound": partition.upper.isoformat(), "dry_run": dry_run,
+        })
+        dropped.append(partition.name)
+    return dropped
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from app.core.logging_config import configure_logging
+
+    parser = argparse.ArgumentParser(prog="python -m app.db.sql.partitions", description="Manage monthly notification partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure = commands.add_parser("ensure", help="create partitions for the coming months")
+    ensure.add_argument("--months-ahead", type=int)
+    retention = commands.add_parser("retention", help="detach and drop expired partitions")
+    retention.add_argument("--older-than-days", type=int)
+    retention.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    if args.command == "ensure":
+        names = ensure_partitions(months_ahead=args.months_ahead)
+    else:
+        names = drop_expired_partitions(older_than_days=args.older_than_days, dry_run=args.dry_run)
+    print("\n".join(names) or "nothing to do")
+
+
+if __name__ == "__main__":
+    main()
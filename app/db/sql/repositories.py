@@ -1,17 +1,57 @@
 
 from datetime import datetime, timezone
-from typing import List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
+from .connection import open_replica_session
 from .models import Notification, NotificationRecipient
+from app.core.metrics import DB_READS
+from app.utils.ids import canonical_uuid
 from app.utils.interfaces import INotificationRepository
 from app.api.schemas import Status
-from app.core.cache import cache
 
-class NotificationRepository(INotificationRepository):
-    """Concrete implementation of notification repository"""
+T = TypeVar("T")
+
+def _cache():
+    # Imported on first use: the repository (and anything importing the SQL
+    # layer) should not pull in Redis just to be imported
+    from app.core.cache import cache
+    return cache
+
 
-    def __init__(self, db_session: Session):
+class NotificationRepository(INotificationRepository):
+    """
+    Concrete implementation of notification repository.
+    Status lookups and listings read from the replica when one is configured
+    and current (see open_replica_session); everything else, and every read
+    with read_from_replica=False, uses the primary session.
+    """
+
+    def __init__(self, db_session: Session, read_from_replica: bool = True):
         self.db = db_session
+        self.read_from_replica = read_from_replica
+
+    def _read(self, query: Callable[[Session], T], fallback_on_miss: bool = False) -> T:
+        """
+        Run a read-only query on a short-lived replica session, or on the
+        primary session when the replica is off, lagging or down. Rows come
+        back detached from the replica, so treat them as read-only. With
+        fallback_on_miss, an empty result is retried on the primary, for rows
+        written moments ago that the replica hasn't replayed yet.
+        """
+        replica = open_replica_session() if self.read_from_replica else None
+        if replica is None:
+            DB_READS.labels("primary").inc()
+            return query(self.db)
+        try:
+            result = query(replica)
+        finally:
+            replica.close()
+        DB_READS.labels("replica").inc()
+        if fallback_on_miss and not result:
+            DB_READS.labels("primary_fallback").inc()
+            return query(self.db)
+        return result
 
     def create_notification(self, notification_data: dict) -> Notification:
         notification = Notification(**notification_data)
@@ -26,25 +66,36 @@ class NotificationRepository(INotificationRepository):
             recipient_data['notification_id'] = notification_id
             recipient = NotificationRecipient(**recipient_data)
             recipients.append(recipient)
-            self.db.add(recipient)
 
+        # Flush once so every recipient gets its primary key; the worker
+        # tracks delivery outcomes per recipient id.
+        self.db.add_all(recipients)
+        self.db.flush()
         return recipients
 
     def get_notification_by_id(self, notification_id: str) -> Optional[Notification]:
         """Get notification by ID with caching."""
+        # A malformed id can't match (and PostgreSQL would reject it as a UUID)
+        notification_id = canonical_uuid(notification_id)
+        if notification_id is None:
+            return None
+
+        def lookup(session: Session) -> Optional[Notification]:
+            return session.query(Notification).filter(Notification.id == notification_id).first()
+
         # Try cache first
-        cached = cache.get("notification", notification_id)
+        cached = _cache().get("notification", notification_id)
         if cached:
             # Return notification from DB (cached data is for response enrichment only)
-            notification = self.db.query(Notification).filter(Notification.id == notification_id).first()
+            notification = self._read(lookup, fallback_on_miss=True)
             return notification
 
         # Cache miss - fetch from DB
-        notification = self.db.query(Notification).filter(Notification.id == notification_id).first()
+        notification = self._read(lookup, fallback_on_miss=True)
 
         if notification:
             # Cache the status for quick lookup
-            cache.set("notification", notification_id, {
+            _cache().set("notification", notification_id, {
                 "id": notification.id,
                 "status": notification.status.value,
                 "created_at": notification.created_at.isoformat() if notification.created_at else None,
@@ -55,28 +106,40 @@ class NotificationRepository(INotificationRepository):
 
     def get_recipients_by_notification_id(self, notification_id: str) -> List[NotificationRecipient]:
         """Get all recipients for a given notification"""
-        return self.db.query(NotificationRecipient).filter(NotificationRecipient.notification_id == notification_id).all()
+        notification_id = canonical_uuid(notification_id)
+        if notification_id is None:
+            return []
+        return self._read(lambda session: session.query(NotificationRecipient).filter(
+            NotificationRecipient.notification_id == notification_id).all())
 
     def list_notifications(self, page: int, page_size: int) -> Tuple[List[Notification], int]:
         """List all notifications with pagination"""
 
-        query = self.db.query(Notification).order_by(Notification.created_at.desc())
+        def page_of(session: Session) -> Tuple[List[Notification], int]:
+            query = session.query(Notification).order_by(Notification.created_at.desc())
+
+            total_count = query.count()
 
-        total_count = query.count()
+            notifications = query.offset((page - 1) * page_size).limit(page_size).all()
 
-        notifications = query.offset((page - 1) * page_size).limit(page_size).all()
+            return notifications, total_count
 
-        return notifications, total_count
+        return self._read(page_of)
 
     def update_notification_status(self, notification_id: str, status: Status, failure_reason: Optional[str] = None) -> bool:
         """Update notification status"""
+        notification_id = canonical_uuid(notification_id)
+        if notification_id is None:
+            return False
         try:
             update_data = {"status": status, "updated_at": datetime.now(timezone.utc)}
+            if status == Status.SENT:
+                update_data["sent_at"] = update_data["updated_at"]
 
             self.db.query(Notification).filter(Notification.id == notification_id).update(update_data)
 
             # Invalidate cache on status update
-            cache.delete("notification", notification_id)
+            _cache().delete("notification", notification_id)
 
             return True
         except Exception:
@@ -95,3 +158,61 @@ class NotificationRepository(INotificationRepository):
         except Exception:
             self.db.rollback()
             return False
+
+    def bulk_update_recipient_status(self, recipient_ids: List[int], status: Status, failure_reason: Optional[str] = None) -> int:
+        """Update status for many recipients with a single UPDATE statement.
+
+        Sets delivered_at for successful deliveries and bumps retry_count for
+        failures. Returns the number of rows updated.
+        """
+        if not recipient_ids:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        update_data = {"status": status, "updated_at": now}
+        if status in (Status.SENT, Status.DELIVERED):
+            update_data["delivered_at"] = now
+            update_data["failed_reason"] = None
+        elif status == Status.FAILED:
+            update_data["failed_reason"] = failure_reason
+            update_data["retry_count"] = func.coalesce(NotificationRecipient.retry_count, 0) + 1
+
+        return (
+            self.db.query(NotificationRecipient)
+            .filter(NotificationRecipient.id.in_(recipient_ids))
+            .update(update_data, synchronize_session=False)
+        )
+
+    def bulk_fail_recipients(self, failure_reasons: Dict[int, Optional[str]]) -> int:
+        """Mark many recipients FAILED, each with its own reason, in a single UPDATE.
+
+        Reasons are free text that differs per recipient (provider replies,
+        per-token errors), so they are written with one CASE on the id rather
+        than one UPDATE per distinct reason. Returns the number of rows updated.
+        """
+        if not failure_reasons:
+            return 0
+
+        return (
+            self.db.query(NotificationRecipient)
+            .filter(NotificationRecipient.id.in_(list(failure_reasons)))
+            .update({
+                "status": Status.FAILED,
+                "updated_at": datetime.now(timezone.utc),
+                "failed_reason": case(failure_reasons, value=NotificationRecipient.id),
+                "retry_count": func.coalesce(NotificationRecipient.retry_count, 0) + 1,
+            }, synchronize_session=False)
+        )
+
+    def get_recipient_status_counts(self, notification_id: str) -> Dict[Status, int]:
+        """Count recipients of a notification grouped by status"""
+        notification_id = canonical_uuid(notification_id)
+        if notification_id is None:
+            return {}
+        rows = (
+            self.db.query(NotificationRecipient.status, func.count(NotificationRecipient.id))
+            .filter(NotificationRecipient.notification_id == notification_id)
+            .group_by(NotificationRecipient.status)
+            .all()
+        )
+        return {status: count for status, count in rows}
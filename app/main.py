@@ -1,10 +1,24 @@
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import logging
 
 from app.api.endpoints.notification import notification_router
 from app.api.endpoints.auth import router as auth_router
+from app.api.endpoints.admin import admin_router
+from app.api.endpoints.logs import logs_router
+from app.core.config import settings
 from app.core.logging_config import configure_logging
+from app.core.metrics import HTTP_REQUEST_DURATION
+from app.core.profiling import request_profile, save_profile
+from app.core.tracing import configure_tracing, extract_context, tracer
+from app.db.sql.instrumentation import check_query_budget, start_recording, stop_recording
+from opentelemetry.trace import SpanKind
+from app.services.health import health_monitor
+from app.services.lifecycle import warm_up, shut_down
+from app.utils.blocking import run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -14,11 +28,24 @@ configure_logging()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup: open pools and load scripts before taking traffic, so the
+    # first requests after a deploy don't pay for connection setup
     logger.info("Application startup")
+    configure_tracing("notification-api")
+    app.state.ready = False
+    app.state.warmup = await warm_up() if settings.WARMUP_ENABLED else {}
+    if settings.HEALTH_MONITOR_ENABLED:
+        health_monitor.start()
+    app.state.ready = True
+    logger.info("Application ready", extra={
+        "warmup_failures": {step: error for step, error in app.state.warmup.items() if error}
+    })
     yield
     # Shutdown
     logger.info("Application shutting down")
+    app.state.ready = False
+    await health_monitor.stop()
+    await shut_down()
 
 
 app = FastAPI(
@@ -36,8 +63,51 @@ app = FastAPI(
     },
 )
 
+
+def _route_template(request: Request) -> str:
+    """
+    Label requests by route template (/api/v1/notifications/{notification_id})
+    rather than the raw path, to keep the series count bounded.
+    """
+    # FastAPI releases that include routers without copying their routes set
+    # scope["route"] to the router-relative route; the effective route
+    # context they add carries the full, prefixed template
+    context = request.scope.get("fastapi", {}).get("effective_route_context")
+    route = context if context is not None else request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    queries, queries_token = start_recording()
+    # Opt-in: sampled or explicitly requested (PROFILING_* settings)
+    profile = request_profile(request.method, request.url.path, request.headers)
+    # Join the caller's trace when it sends a traceparent header
+    with tracer.start_as_current_span(
+        f"HTTP {request.method}", context=extract_context(dict(request.headers)), kind=SpanKind.SERVER,
+    ) as span:
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            route = _route_template(request)
+            span.update_name(f"HTTP {request.method} {route}")
+            span.set_attributes({"http.route": route, "http.response.status_code": status_code})
+            HTTP_REQUEST_DURATION.labels(request.method, route, str(status_code)).observe(time.perf_counter() - started)
+            if profile is not None:
+                await run_blocking(save_profile, profile.stop(route=route, status=status_code))
+            stop_recording(queries_token)
+            span.set_attribute("db.query_count", queries.count)
+            check_query_budget(queries, "request", f"{request.method} {route}")
+
+
 app.include_router(notification_router, prefix="/api/v1/notifications", tags=["Notifications"])
 app.include_router(auth_router, prefix="/api/v1/auth", tags=["Auth"])
+app.include_router(logs_router, prefix="/api/v1/logs", tags=["Delivery Logs"])
+app.include_router(admin_router, prefix="/api/v1/admin", tags=["Admin"])
 
 @app.get("/")
 async def read_root():
@@ -47,6 +117,32 @@ async def read_health():
     return {"status": "healthy", "version": "1.0.0"}
 
 
+@app.get("/ready")
+async def read_ready(request: Request):
+    """Readiness from the last background health check; 503 takes the replica out of rotation."""
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse({"ready": False, "reasons": ["warming up"]}, status_code=503)
+    readiness = health_monitor.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+
+@app.get("/health/deep")
+async def read_deep_health():
+    """Per-dependency status and latency from the last background health check."""
+    checks = health_monitor.results
+    healthy = bool(checks) and all(check["status"] == "up" for check in checks.values())
+    return JSONResponse(
+        {"status": "healthy" if healthy else "unhealthy", "version": "1.0.0", "checks": checks},
+        status_code=200 if healthy else 503,
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
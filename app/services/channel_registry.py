@@ -0,0 +1,134 @@
+import importlib
+import threading
+from importlib.metadata import entry_points
+from typing import Callable, Dict, List, Optional, Union
+from app.api.schemas import Channel
+from app.utils.interfaces import IChannelService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Entry point group third-party packages use to add or replace a channel
+# provider, e.g. in their pyproject.toml:
+#   [project.entry-points."notification_system.channels"]
+#   push = "my_package.push:ApnsChannelService"
+ENTRY_POINT_GROUP = "notification_system.channels"
+
+# Built-in providers as "module:attribute" specs, so nothing is imported
+# until a channel is first used
+BUILTIN_CHANNELS: Dict[Channel, str] = {
+    Channel.EMAIL: "app.services.channel_services:create_email_service",
+    Channel.SMS: "app.services.channel_services:SMSChannelService",
+    Channel.PUSH: "app.services.channel_services:PushChannelService",
+}
+
+ChannelSpec = Union[str, Callable[[], IChannelService]]
+
+
+def _resolve(spec: ChannelSpec) -> Callable[[], IChannelService]:
+    if callable(spec):
+        return spec
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class ChannelRegistry:
+    """
+    Channel services by channel, created on first use.
+    Providers are registered as "module:attribute" specs (a class or factory
+    function), from the built-ins and the `notification_system.channels`
+    entry points, so a process only imports the provider SDKs it actually
+    sends through. Call warm_up() to build them ahead of the first message.
+    """
+
+    def __init__(self, specs: Optional[Dict[Channel, ChannelSpec]] = None, group: Optional[str] = ENTRY_POINT_GROUP):
+        self._specs: Dict[Channel, ChannelSpec] = dict(BUILTIN_CHANNELS if specs is None else specs)
+        self._group = group
+        self._discovered = group is None
+        self._services: Dict[Channel, IChannelService] = {}
+        self._lock = threading.Lock()
+
+    def _discover(self) -> None:
+        if self._discovered:
+            return
+        for entry_point in entry_points(group=self._group):
+            try:
+                channel = Channel(entry_point.name)
+            except ValueError:
+                logger.warning("Ignoring channel entry point for unknown channel", extra={"entry_point": entry_point.name})
+                continue
+            self._specs[channel] = entry_point.value
+            logger.info("Channel provider registered from entry point", extra={
+                "channel": channel.value, "provider": entry_point.value
+            })
+        self._discovered = True
+
+    def register(self, channel: Channel, spec: ChannelSpec) -> None:
+        """Register (or replace) the provider for a channel."""
+        with self._lock:
+            self._discover()
+            self._specs[Channel(channel)] = spec
+            self._services.pop(Channel(channel), None)
+
+    def channels(self) -> List[Channel]:
+        """Channels that have a provider."""
+        with self._lock:
+            self._discover()
+            return list(self._specs)
+
+    def get(self, channel: Channel) -> IChannelService:
+        """Get the service for a channel, importing and creating it on first use."""
+        try:
+            channel = Channel(channel)
+        except ValueError:
+            raise ValueError(f"Unsupported channel: {channel}")
+        service = self._services.get(channel)
+        if service is not None:
+            return service
+        with self._lock:
+            self._discover()
+            if channel not in self._services:
+                spec = self._specs.get(channel)
+                if spec is None:
+                    raise ValueError(f"Unsupported channel: {channel}")
+                self._services[channel] = _resolve(spec)()
+                logger.info("Channel service loaded", extra={"channel": channel.value})
+            return self._services[channel]
+
+    def warm_up(self, channels: Optional[List[Channel]] = None) -> Dict[Channel, Optional[str]]:
+        """
+        Create channel services up front. A provider that fails to load (e.g.
+        missing credentials) is logged and reported, not raised.
+        Returns {channel: error message or None}.
+        """
+        results: Dict[Channel, Optional[str]] = {}
+        for channel in channels or self.channels():
+            try:
+                self.get(channel)
+                results[channel] = None
+            except Exception as e:
+                logger.warning("Channel service failed to load", extra={"channel": str(channel), "error": str(e)})
+                results[channel] = str(e)
+        return results
+
+    def reset(self) -> None:
+        """Drop created services; they are re-created on next use."""
+        with self._lock:
+            self._services.clear()
+
+
+channel_registry = ChannelRegistry()
+
+
+class ChannelServiceFactory:
+    """Factory for creating channel services based on the channel type."""
+
+    @classmethod
+    def create_service(cls, channel: Channel) -> Optional[IChannelService]:
+        """Create a channel service based on the channel type."""
+        return channel_registry.get(channel)
+
+    @classmethod
+    def get_all_services(cls) -> Dict[Channel, IChannelService]:
+        """Get all available channel services (creating any not loaded yet)."""
+        return {channel: channel_registry.get(channel) for channel in channel_registry.channels()}
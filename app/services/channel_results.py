@@ -0,0 +1,81 @@
+from typing import List, Dict, Any, Optional
+from app.api.schemas import Channel
+from app.utils.exceptions import PartialFailureException
+
+
+def failed_recipients(recipients: List[Dict[str, Any]], reason: str, retryable: bool,
+                      retry_after: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Annotate recipients with the reason they failed and whether a retry can help."""
+    failure = {"failed_reason": reason, "retryable": retryable}
+    if retry_after:
+        failure["retry_after"] = retry_after
+    return [{**r, **failure} for r in recipients]
+
+
+def build_send_result(channel: Channel, successful: List[Dict[str, Any]], failed: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the per-recipient result of a channel send.
+    Raises PartialFailureException when only some recipients succeeded.
+    """
+    if successful and failed:
+        raise PartialFailureException(successful, failed)
+    return {
+        "status": "error" if failed else "success",
+        "message": f"{channel.value} send {'failed' if failed else 'succeeded'}",
+        "successful_recipients": successful,
+        "failed_recipients": failed,
+    }
+
+
+def collect_batch_outcomes(channel: Channel, batches: List[List[Dict[str, Any]]], outcomes: List[Any]) -> Dict[str, Any]:
+    """
+    Fold the outcomes of a channel's provider requests (from run_batches)
+    into one per-recipient send result. A request that raised fails only its
+    own recipients; if every request raised, the first error is re-raised.
+    A cancelled request (or any other non-Exception) cancels the whole send.
+    """
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+            raise outcome
+    successful: List[Dict[str, Any]] = []
+    failed: List[Dict[str, Any]] = []
+    errors = []
+    details = []
+    for batch, outcome in zip(batches, outcomes):
+        if isinstance(outcome, PartialFailureException):
+            successful.extend(outcome.successful_recipients)
+            failed.extend(outcome.failed_recipients)
+        elif isinstance(outcome, Exception):
+            errors.append(outcome)
+            failed.extend(failed_recipients(
+                batch, str(outcome),
+                retryable=is_retryable_status(getattr(outcome, "status_code", None)),
+                retry_after=getattr(outcome, "retry_after", None),
+            ))
+        else:
+            successful.extend(outcome["successful_recipients"])
+            failed.extend(outcome["failed_recipients"])
+            if "details" in outcome:
+                details.append(outcome["details"])
+
+    if errors and len(errors) == len(batches):
+        # Nothing got through; surface the provider error itself
+        raise errors[0]
+
+    result = build_send_result(channel, successful, failed)
+    if details:
+        result["details"] = details[0] if len(details) == 1 else details
+    return result
+
+
+def is_retryable_status(status_code: Optional[int]) -> bool:
+    """Throttling and provider-side errors are worth retrying; other client errors are not."""
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[int]:
+    """Parse a Retry-After header given in seconds; HTTP-date values are ignored."""
+    try:
+        return max(0, int(float(value))) if value is not None else None
+    except (TypeError, ValueError):
+        return None
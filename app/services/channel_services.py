@@ -1,17 +1,65 @@
-import os
+import asyncio
+import smtplib
+import zlib
+from email.message import EmailMessage
 from typing import List, Dict, Any, Optional
 from app.utils.interfaces import IChannelService
 from app.api.schemas import Channel
 from app.core.config import settings
-from sendgrid import SendGridAPIClient
+from app.core.metrics import observe_send
+from app.utils.exceptions import (
+    ChannelServiceException,
+    CircuitOpenException,
+    OutboundRateLimitException,
+    PartialFailureException,
+)
+from app.utils.circuit_breakers import CircuitBreaker
+from app.utils.retries import retry_with_exponential_backoff
+from app.services.outbound_limiter import get_outbound_limiter, outbound_limited, account_key
+from app.services.transports import SendGridTransport, FCMTransport, TwilioTransport
+from app.services.user_service import user_service
+from app.utils.batching import chunked, run_batches
+from app.utils.blocking import run_blocking
+from app.services.smtp_pool import SMTPConnectionPool
+from app.services.channel_results import (
+    failed_recipients,
+    build_send_result,
+    collect_batch_outcomes,
+    is_retryable_status,
+    parse_retry_after,
+)
+from app.services.channel_registry import ChannelServiceFactory
 from sendgrid.helpers.mail import Mail
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def channel_circuit_breaker(provider: str, channel: Channel) -> CircuitBreaker:
+    """Circuit breaker for a provider, shared by all worker processes through Redis."""
+    return CircuitBreaker(
+        provider,
+        failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout=settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+        half_open_max_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS,
+        channel=channel.value,
+    )
+
+
+def channel_retry():
+    """Jittered exponential backoff applied around every channel send."""
+    return retry_with_exponential_backoff(
+        max_retries=settings.CHANNEL_SEND_MAX_RETRIES,
+        base_delay=settings.CHANNEL_SEND_BASE_DELAY,
+        max_delay=settings.CHANNEL_SEND_MAX_DELAY,
+    )
+
 class EmailChannelService(IChannelService):
     """Email channel service for sending notifications via email using SendGrid."""
 
+    circuit_breaker = channel_circuit_breaker("sendgrid", Channel.EMAIL)
+
     def __init__(self):
         self.api_key = settings.SENDGRID_API_KEY
         self.from_email = settings.SENDGRID_FROM_EMAIL
@@ -19,40 +67,159 @@ class EmailChannelService(IChannelService):
             raise ValueError("SENDGRID_API_KEY is not configured.")
         if not self.from_email:
             raise ValueError("SENDGRID_FROM_EMAIL is not configured.")
+        self.transport = SendGridTransport(self.api_key, settings.SENDGRID_API_BASE_URL)
+        self.batch_size = settings.SENDGRID_MAX_PERSONALIZATIONS
+        self.batch_concurrency = settings.EMAIL_BATCH_CONCURRENCY
+        self.outbound_limiter = get_outbound_limiter("sendgrid", account_key(self.api_key))
 
+    @observe_send("email")
     async def send_notification(self, subject: str, content: str, recipients: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Sends an email notification using the SendGrid API.
+        Every recipient gets their own personalization, so nobody sees the
+        other addresses, and recipients are packed up to
+        SENDGRID_MAX_PERSONALIZATIONS per request. Requests run concurrently
+        (at most EMAIL_BATCH_CONCURRENCY at once) and each one is retried,
+        circuit-broken and rate limited on its own.
         """
         if not self.validate_recipients(recipients):
-            return {
-                "status": "error",
-                "message": "Invalid recipients for email channel.",
-                "failed_recipients": recipients
-            }
+            return build_send_result(
+                Channel.EMAIL, [], failed_recipients(recipients, "Invalid recipients for email channel.", retryable=False)
+            )
 
-        message = Mail(
+        base_message = Mail(
             from_email=self.from_email,
-            to_emails=[r['email'] for r in recipients],
             subject=subject or 'New Notification',
             html_content=content
+        ).get()
+        use_substitutions = "{{" in (content or "") or "{{" in (subject or "")
+
+        chunks = chunked(recipients, self.batch_size)
+        outcomes = await run_batches(
+            lambda chunk: self._send_chunk(base_message, chunk, use_substitutions),
+            chunks,
+            self.batch_concurrency,
         )
-        
+
+        return collect_batch_outcomes(Channel.EMAIL, chunks, outcomes)
+
+    @staticmethod
+    def _personalization(recipient: Dict[str, Any], use_substitutions: bool) -> Dict[str, Any]:
+        """One personalization per recipient; optional {{tag}} substitutions come from the recipient."""
+        personalization: Dict[str, Any] = {"to": [{"email": recipient["email"]}]}
+        if use_substitutions:
+            substitutions = {"{{email}}": recipient["email"]}
+            for key, value in (recipient.get("substitutions") or {}).items():
+                substitutions[f"{{{{{key}}}}}"] = str(value)
+            personalization["substitutions"] = substitutions
+        return personalization
+
+    @channel_retry()
+    @circuit_breaker
+    @outbound_limited
+    async def _send_chunk(self, base_message: Dict[str, Any], recipients: List[Dict[str, Any]],
+                          use_substitutions: bool) -> Dict[str, Any]:
+        """Send one SendGrid request for up to SENDGRID_MAX_PERSONALIZATIONS recipients."""
+        message = {
+            **base_message,
+            "personalizations": [self._personalization(r, use_substitutions) for r in recipients],
+        }
+
         try:
-            sg = SendGridAPIClient(self.api_key)
-            response = sg.send(message)
-
-            if 200 <= response.status_code < 300:
-                return {
-                    "status": "success",
-                    "message": "Email sent successfully.",
-                    "recipients": recipients
-                }
-            else:
-                raise Exception(f"SendGrid returned {response.status_code}: {response.body}")
-        except Exception as e:
+            response = await self.transport.send(message)
+        except httpx.HTTPError as e:
             logger.exception("An error occurred while sending email with SendGrid.")
-            raise
+            raise ChannelServiceException(str(e) or type(e).__name__, channel=Channel.EMAIL.value) from e
+
+        status_code = response.status_code
+        if 200 <= status_code < 300:
+            return build_send_result(Channel.EMAIL, recipients, [])
+
+        reason = f"SendGrid returned {status_code}: {response.text}"
+        if is_retryable_status(status_code):
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            logger.error("SendGrid send failed", extra={"status_code": status_code, "retry_after": retry_after})
+            raise ChannelServiceException(reason, channel=Channel.EMAIL.value, status_code=status_code,
+                                          retry_after=retry_after)
+
+        result = build_send_result(Channel.EMAIL, [], failed_recipients(recipients, reason, retryable=False))
+        result["details"] = response.text
+        return result
+
+    def validate_recipients(self, recipients: List[Dict[str, Any]]) -> bool:
+        """Validate that all recipients have a valid email address."""
+        for recipient in recipients:
+            if 'email' not in recipient or not isinstance(recipient['email'], str):
+                return False
+        return True
+
+class SMTPEmailChannelService(IChannelService):
+    """Email channel service for sending notifications through an SMTP relay over pooled connections."""
+
+    circuit_breaker = channel_circuit_breaker("smtp", Channel.EMAIL)
+
+    def __init__(self):
+        self.from_email = settings.SMTP_FROM_EMAIL or settings.SENDGRID_FROM_EMAIL
+        if not settings.SMTP_HOST:
+            raise ValueError("SMTP_HOST is not configured.")
+        if not self.from_email:
+            raise ValueError("SMTP_FROM_EMAIL is not configured.")
+        self.pool = SMTPConnectionPool(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT or 587,
+            username=settings.SMTP_USER,
+            password=settings.SMTP_PASSWORD,
+            use_tls=settings.SMTP_USE_TLS,
+            size=settings.SMTP_POOL_SIZE,
+            timeout=settings.SMTP_TIMEOUT,
+            max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+        )
+        self.outbound_limiter = get_outbound_limiter("smtp", account_key(f"{settings.SMTP_HOST}:{settings.SMTP_USER}"))
+
+    @observe_send("email")
+    async def send_notification(self, subject: str, content: str, recipients: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Sends one message per recipient (no shared To: line), as many at once
+        as the connection pool holds.
+        """
+        if not self.validate_recipients(recipients):
+            return build_send_result(
+                Channel.EMAIL, [], failed_recipients(recipients, "Invalid recipients for email channel.", retryable=False)
+            )
+        messages = [[r] for r in recipients]
+        outcomes = await run_batches(lambda m: self._send_message(subject, content, m[0]), messages, self.pool.size)
+        return collect_batch_outcomes(Channel.EMAIL, messages, outcomes)
+
+    def _build_message(self, subject: Optional[str], content: str, recipient: Dict[str, Any]) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.from_email
+        message["To"] = recipient["email"]
+        message["Subject"] = subject or "New Notification"
+        message.set_content(content, subtype="html")
+        return message
+
+    @channel_retry()
+    @circuit_breaker
+    @outbound_limited
+    async def _send_message(self, subject: Optional[str], content: str, recipient: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one message on a pooled connection; SMTP 4xx replies are retried, 5xx fail the recipient."""
+        message = self._build_message(subject, content, recipient)
+        try:
+            await run_blocking(self.pool.send_message, message)
+        except smtplib.SMTPRecipientsRefused as e:
+            code, reply = next(iter(e.recipients.values()))
+            reason = f"SMTP refused recipient: {code} {reply!r}"
+        except smtplib.SMTPResponseException as e:
+            code, reason = e.smtp_code, f"SMTP error: {e.smtp_code} {e.smtp_error!r}"
+        except (smtplib.SMTPException, OSError) as e:
+            logger.exception("An error occurred while sending email over SMTP.")
+            raise ChannelServiceException(str(e) or type(e).__name__, channel=Channel.EMAIL.value) from e
+        else:
+            return build_send_result(Channel.EMAIL, [recipient], [])
+
+        if 400 <= code < 500:
+            raise ChannelServiceException(reason, channel=Channel.EMAIL.value)
+        return build_send_result(Channel.EMAIL, [], failed_recipients([recipient], reason, retryable=False))
 
     def validate_recipients(self, recipients: List[Dict[str, Any]]) -> bool:
         """Validate that all recipients have a valid email address."""
@@ -61,66 +228,276 @@ class EmailChannelService(IChannelService):
                 return False
         return True
 
+
+class FailoverEmailChannelService(EmailChannelService):
+    """
+    SendGrid email that fails over to SMTP. While the SendGrid circuit is open
+    everything goes straight to SMTP; recipients SendGrid throttles or
+    rejects with an open circuit mid-send are resent over SMTP.
+    """
+
+    def __init__(self, fallback: Optional[IChannelService] = None):
+        super().__init__()
+        self.fallback = fallback or SMTPEmailChannelService()
+
+    @observe_send("email")
+    async def send_notification(self, subject: str, content: str, recipients: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if self.validate_recipients(recipients) and self.circuit_breaker.is_open():
+            logger.warning("SendGrid circuit open, sending email over SMTP", extra={"recipients": len(recipients)})
+            return await self.fallback.send_notification(subject, content, recipients)
+
+        try:
+            return await super().send_notification(subject, content, recipients)
+        except PartialFailureException as e:
+            # Chunks that were throttled or hit an open circuit carry retry_after
+            throttled = [r for r in e.failed_recipients if r.get("retry_after")]
+            if not throttled:
+                raise
+            successful, failed = await self._send_fallback(subject, content, throttled)
+            rejected = [r for r in e.failed_recipients if not r.get("retry_after")]
+            return build_send_result(Channel.EMAIL, e.successful_recipients + successful, rejected + failed)
+        except ChannelServiceException as e:
+            if not self._is_unavailable(e):
+                raise
+            logger.warning("SendGrid unavailable, sending email over SMTP", extra={
+                "error": str(e), "recipients": len(recipients)
+            })
+            return await self.fallback.send_notification(subject, content, recipients)
+
+    @staticmethod
+    def _is_unavailable(error: ChannelServiceException) -> bool:
+        return isinstance(error, (CircuitOpenException, OutboundRateLimitException)) or error.status_code == 429
+
+    async def _send_fallback(self, subject: Optional[str], content: str, recipients: List[Dict[str, Any]]):
+        """Resend recipients over SMTP; if that fails too, they keep their SendGrid failure."""
+        clean = [
+            {k: v for k, v in r.items() if k not in ("failed_reason", "retryable", "retry_after")}
+            for r in recipients
+        ]
+        try:
+            result = await self.fallback.send_notification(subject, content, clean)
+        except PartialFailureException as e:
+            return e.successful_recipients, e.failed_recipients
+        except Exception as e:
+            logger.warning("SMTP failover failed", extra={"error": str(e)})
+            return [], recipients
+        return result["successful_recipients"], result["failed_recipients"]
+
+
 class SMSChannelService(IChannelService):
-    """SMS channel service for sending notifications via SMS."""
+    """SMS channel service for sending notifications via the Twilio Messages API."""
+
+    circuit_breaker = channel_circuit_breaker("twilio", Channel.SMS)
 
+    def __init__(self):
+        self.account_sid = settings.TWILIO_ACCOUNT_SID
+        self.sender_numbers = [n.strip() for n in (settings.TWILIO_PHONE_NUMBER or "").split(",") if n.strip()]
+        self.transport = None
+        if self.account_sid and settings.TWILIO_AUTH_TOKEN:
+            self.transport = TwilioTransport(self.account_sid, settings.TWILIO_AUTH_TOKEN, settings.TWILIO_API_BASE_URL)
+        self.status_callback = settings.TWILIO_STATUS_CALLBACK_URL
+        self.sender_concurrency = settings.SMS_SENDER_CONCURRENCY
+        self.outbound_limiter = get_outbound_limiter("twilio", self.account_sid or "default")
+
+    @observe_send("sms")
     async def send_notification(self, subject: str, content: str, recipients: List[Dict[str, Any]]) -> Dict[str, Any]:
-        # Here you would implement the logic to send an SMS
-        # This is a placeholder implementation
-        # TODO: Integrate with an SMS gateway
-        return {
-            "status": "success",
-            "message": "SMS sent successfully",
-            "recipients": recipients
-        }
+        """
+        Sends one SMS per recipient. Recipients are spread over the sender
+        numbers (a recipient always gets the same one); every number sends
+        concurrently, with at most SMS_SENDER_CONCURRENCY messages in flight
+        and paced to its own carrier throughput limit across all workers.
+        """
+        if not self.validate_recipients(recipients):
+            return build_send_result(
+                Channel.SMS, [], failed_recipients(recipients, "Invalid recipients for SMS channel.", retryable=False)
+            )
+        if self.transport is None or not self.sender_numbers:
+            return build_send_result(
+                Channel.SMS, [], failed_recipients(recipients, "Twilio is not configured.", retryable=False)
+            )
+
+        by_sender: Dict[str, List[Dict[str, Any]]] = {}
+        for recipient in recipients:
+            index = zlib.crc32(recipient["phone_number"].encode()) % len(self.sender_numbers)
+            by_sender.setdefault(self.sender_numbers[index], []).append(recipient)
+
+        async def send_from(number: str, sender_recipients: List[Dict[str, Any]]):
+            messages = [[r] for r in sender_recipients]
+            outcomes = await run_batches(
+                lambda message: self._send_message(number, content, message[0]), messages, self.sender_concurrency
+            )
+            return messages, outcomes
+
+        batches, outcomes = [], []
+        for messages, sender_outcomes in await asyncio.gather(*(send_from(n, rs) for n, rs in by_sender.items())):
+            batches.extend(messages)
+            outcomes.extend(sender_outcomes)
+        return collect_batch_outcomes(Channel.SMS, batches, outcomes)
+
+    def _sender_limiter(self, number: str):
+        """Shared pacing for one sender number (None if outbound limiting is disabled)."""
+        return get_outbound_limiter("twilio_number", number)
+
+    @channel_retry()
+    async def _send_message(self, from_number: str, body: str, recipient: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send one message, retrying with backoff. Every attempt takes its own
+        slot on the sender number's limiter, so a failing number doesn't
+        hold it through the backoff, and feeds Twilio's outcome back so
+        throttling backs off (and Retry-After pauses) that number.
+        """
+        limiter = self._sender_limiter(from_number)
+        if limiter is None:
+            return await self._create_message(from_number, body, recipient)
+        async with limiter.slot():
+            try:
+                result = await self._create_message(from_number, body, recipient)
+            except (CircuitOpenException, OutboundRateLimitException):
+                # Raised on our side for the whole account, not by Twilio for this number
+                raise
+            except (ChannelServiceException, ConnectionError, TimeoutError) as e:
+                limiter.record_failure(e)
+                raise
+            limiter.record_success()
+            return result
+
+    @circuit_breaker
+    @outbound_limited
+    async def _create_message(self, from_number: str, body: str, recipient: Dict[str, Any]) -> Dict[str, Any]:
+        """Create one message and capture its Twilio sid and status on the recipient."""
+        try:
+            response = await self.transport.send_message(
+                from_number, recipient["phone_number"], body, status_callback=self.status_callback
+            )
+        except httpx.HTTPError as e:
+            logger.exception("An error occurred while sending SMS with Twilio.")
+            raise ChannelServiceException(str(e) or type(e).__name__, channel=Channel.SMS.value) from e
+
+        status_code = response.status_code
+        if 200 <= status_code < 300:
+            data = response.json()
+            return build_send_result(Channel.SMS, [{
+                **recipient,
+                "message_sid": data.get("sid"),
+                "provider_status": data.get("status"),
+            }], [])
+
+        try:
+            error = response.json()
+            reason = f"Twilio error {error.get('code')}: {error.get('message')}"
+        except ValueError:
+            reason = f"Twilio returned {status_code}: {response.text}"
+        if is_retryable_status(status_code):
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            logger.error("Twilio send failed", extra={"status_code": status_code, "retry_after": retry_after})
+            raise ChannelServiceException(reason, channel=Channel.SMS.value, status_code=status_code,
+                                          retry_after=retry_after)
+        return build_send_result(Channel.SMS, [], failed_recipients([recipient], reason, retryable=False))
 
     def validate_recipients(self, recipients: List[Dict[str, Any]]) -> bool:
-        # Validate that all recipients have a valid phone number
+        # Validate that all recipients have a phone number
         for recipient in recipients:
-            if 'phone' not in recipient or not isinstance(recipient['phone'], str):
+            if not isinstance(recipient.get('phone_number'), str) or not recipient['phone_number']:
                 return False
         return True
 
 class PushChannelService(IChannelService):
-    """Push notification channel service for sending notifications via push notifications."""
+    """Push notification channel service for sending notifications via Firebase Cloud Messaging."""
+
+    circuit_breaker = channel_circuit_breaker("fcm", Channel.PUSH)
+
+    # Per-token errors worth retrying; see the FCM downstream error codes
+    RETRYABLE_ERRORS = {"Unavailable", "InternalServerError", "DeviceMessageRateExceeded"}
+    # Per-token errors meaning the token will never work again
+    STALE_TOKEN_ERRORS = {"NotRegistered", "InvalidRegistration"}
+
+    def __init__(self):
+        self.server_key = settings.FCM_SERVER_KEY
+        self.transport = FCMTransport(self.server_key, settings.FCM_API_URL) if self.server_key else None
+        self.batch_size = settings.FCM_MAX_TOKENS_PER_REQUEST
+        self.batch_concurrency = settings.PUSH_BATCH_CONCURRENCY
+        self.user_service = user_service
+        self.outbound_limiter = get_outbound_limiter("fcm", account_key(self.server_key))
 
+    @observe_send("push")
     async def send_notification(self, subject: str, content: str, recipients: List[Dict[str, Any]]) -> Dict[str, Any]:
-        # Here you would implement the logic to send a push notification
-        # This is a placeholder implementation
-        # TODO: Implement actual push notification logic
-        return {
-            "status": "success",
-            "message": "Push notification sent successfully",
-            "recipients": recipients
+        """
+        Sends a push notification as FCM multicast requests of up to
+        FCM_MAX_TOKENS_PER_REQUEST tokens each, at most PUSH_BATCH_CONCURRENCY
+        at once. Tokens FCM reports as unregistered or invalid are pruned
+        from the user store.
+        """
+        if not self.validate_recipients(recipients):
+            return build_send_result(
+                Channel.PUSH, [], failed_recipients(recipients, "Invalid recipients for push channel.", retryable=False)
+            )
+        if self.transport is None:
+            return build_send_result(
+                Channel.PUSH, [], failed_recipients(recipients, "FCM_SERVER_KEY is not configured.", retryable=False)
+            )
+
+        notification = {"title": subject or "New Notification", "body": content}
+        chunks = chunked(recipients, self.batch_size)
+        outcomes = await run_batches(lambda chunk: self._send_chunk(notification, chunk), chunks, self.batch_concurrency)
+        return collect_batch_outcomes(Channel.PUSH, chunks, outcomes)
+
+    @channel_retry()
+    @circuit_breaker
+    @outbound_limited
+    async def _send_chunk(self, notification: Dict[str, Any], recipients: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send one multicast request and map FCM's per-token results back to recipients."""
+        message = {
+            "registration_ids": [r["push_token"] for r in recipients],
+            "notification": notification,
         }
+        try:
+            response = await self.transport.send_multicast(message)
+        except httpx.HTTPError as e:
+            logger.exception("An error occurred while sending push with FCM.")
+            raise ChannelServiceException(str(e) or type(e).__name__, channel=Channel.PUSH.value) from e
+
+        status_code = response.status_code
+        if status_code != 200:
+            reason = f"FCM returned {status_code}: {response.text}"
+            if is_retryable_status(status_code):
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                logger.error("FCM send failed", extra={"status_code": status_code, "retry_after": retry_after})
+                raise ChannelServiceException(reason, channel=Channel.PUSH.value, status_code=status_code,
+                                              retry_after=retry_after)
+            return build_send_result(Channel.PUSH, [], failed_recipients(recipients, reason, retryable=False))
+
+        results = response.json().get("results", [])
+        successful: List[Dict[str, Any]] = []
+        failed: List[Dict[str, Any]] = []
+        stale_tokens: List[str] = []
+        for recipient, token_result in zip(recipients, results):
+            error = token_result.get("error")
+            if error is None:
+                successful.append({**recipient, "message_id": token_result.get("message_id")})
+                if token_result.get("registration_id"):
+                    self.user_service.replace_push_token(recipient["push_token"], token_result["registration_id"])
+                continue
+            if error in self.STALE_TOKEN_ERRORS:
+                stale_tokens.append(recipient["push_token"])
+            failed.extend(failed_recipients([recipient], f"FCM error: {error}", retryable=error in self.RETRYABLE_ERRORS))
+        # A response without a result per token leaves the rest unconfirmed
+        if len(results) < len(recipients):
+            failed.extend(failed_recipients(recipients[len(results):], "FCM returned no result", retryable=True))
+
+        if stale_tokens:
+            pruned = self.user_service.prune_push_tokens(stale_tokens)
+            logger.info("Pruned stale push tokens", extra={"tokens": len(stale_tokens), "users": pruned})
+        return build_send_result(Channel.PUSH, successful, failed)
 
     def validate_recipients(self, recipients: List[Dict[str, Any]]) -> bool:
-        # Validate that all recipients have a valid device token
+        # Validate that all recipients have a push token
         for recipient in recipients:
-            if 'device_token' not in recipient or not isinstance(recipient['device_token'], str):
+            if not isinstance(recipient.get('push_token'), str) or not recipient['push_token']:
                 return False
         return True
 
-class ChannelServiceFactory:
-    """Factory for creating channel services based on the channel type."""
-
-    _services = {
-        Channel.EMAIL: EmailChannelService(),
-        Channel.SMS: SMSChannelService(),
-        Channel.PUSH: PushChannelService()
-    }
-
-    @classmethod
-    def create_service(cls, channel: Channel) -> Optional[IChannelService]:
-        """Create a channel service based on the channel type."""
-        
-        service = cls._services.get(channel)
-        if service is None:
-            raise ValueError(f"Unsupported channel: {channel}")
-        return service
-
-    @classmethod
-    def get_all_services(cls) -> Dict[Channel, IChannelService]:
-        """Get all available channel services."""
-        return cls._services
-
+def create_email_service() -> IChannelService:
+    """SendGrid email, with SMTP failover when an SMTP relay is configured."""
+    if settings.SMTP_HOST:
+        return FailoverEmailChannelService()
+    return EmailChannelService()
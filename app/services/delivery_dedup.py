@@ -0,0 +1,65 @@
+from typing import List, Dict, Any, Optional
+import redis
+from app.core.redis_client import LazyRedis
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryDeduplicator:
+    """
+    Per-recipient delivery markers in Redis.
+    A recipient is marked once its send succeeds, so a retried or redelivered
+    payload only goes out to recipients that have not received it yet.
+    """
+
+    redis = LazyRedis()
+
+    def __init__(self, ttl_seconds: int = None):
+        self.ttl = ttl_seconds or settings.DELIVERY_DEDUP_TTL_SECONDS
+
+    def _key(self, notification_id: str, recipient: Dict[str, Any]) -> Optional[str]:
+        recipient_key = recipient.get("id")
+        if recipient_key is None:
+            recipient_key = recipient.get("email") or recipient.get("phone_number") or recipient.get("push_token")
+        if recipient_key is None:
+            return None
+        return f"delivered:{notification_id}:{recipient_key}"
+
+    def filter_undelivered(self, notification_id: str, recipients: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the recipients that have no delivery marker yet."""
+        if not settings.DELIVERY_DEDUP_ENABLED or not recipients:
+            return recipients
+
+        keys = [self._key(notification_id, r) for r in recipients]
+        lookup = [k for k in keys if k is not None]
+        if not lookup:
+            return recipients
+        try:
+            delivered = dict(zip(lookup, self.redis.mget(lookup)))
+        except redis.RedisError as e:
+            logger.warning("Dedup lookup error, sending to all recipients", extra={
+                "notification_id": str(notification_id), "error": str(e)
+            })
+            return recipients  # Fail open
+        return [r for r, k in zip(recipients, keys) if k is None or not delivered.get(k)]
+
+    def mark_delivered(self, notification_id: str, recipients: List[Dict[str, Any]]) -> None:
+        """Record a delivery marker for each recipient in one round trip."""
+        if not settings.DELIVERY_DEDUP_ENABLED or not recipients:
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for recipient in recipients:
+                key = self._key(notification_id, recipient)
+                if key is not None:
+                    pipe.set(key, 1, ex=self.ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Dedup mark error", extra={"notification_id": str(notification_id), "error": str(e)})
+
+
+# Global deduplicator instance
+delivery_deduplicator = DeliveryDeduplicator()
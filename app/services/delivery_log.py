@@ -0,0 +1,215 @@
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.core.metrics import DELIVERY_LOG_EVENTS, DELIVERY_LOG_WRITE_DURATION
+from app.db.nosql.models import LogQuery, LogStatus, NotificationLogEntry
+from app.services.delivery_stats import DeliveryStats, delivery_stats
+from app.services.recipient_resolver import recipient_channel
+from app.utils.interfaces import IDeliveryLogStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Queued by close() to wake the writer without waiting out its poll
+_WAKE = None
+
+
+class DeliveryEventLog:
+    """
+    Per-recipient delivery events (sent, failed, retry), written in batches.
+    emit() only appends to a bounded in-memory queue and never waits: when
+    the queue is full the event is dropped and counted. A background thread
+    validates the events and bulk-inserts up to DELIVERY_LOG_BATCH_SIZE at a
+    time, or whatever arrived within DELIVERY_LOG_FLUSH_INTERVAL_SECONDS.
+    Each batch also updates the per-minute and per-hour stats rollups.
+    """
+
+    def __init__(self, store_factory: Optional[Callable[[], Optional[IDeliveryLogStore]]] = None,
+                 batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 buffer_size: Optional[int] = None, stats: Optional[DeliveryStats] = None):
+        self._store_factory = store_factory
+        self.stats = stats or delivery_stats
+        self.batch_size = batch_size or settings.DELIVERY_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.DELIVERY_LOG_FLUSH_INTERVAL_SECONDS
+        self._queue: queue.Queue = queue.Queue(maxsize=buffer_size or settings.DELIVERY_LOG_BUFFER_SIZE)
+        self._store: Optional[IDeliveryLogStore] = None
+        self._store_ready = False
+        self._write_lock = threading.Lock()
+        self._store_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.DELIVERY_LOG_BACKEND != "none" or settings.DELIVERY_STATS_ENABLED
+
+    @property
+    def store(self) -> Optional[IDeliveryLogStore]:
+        # Created (and indexed) on first use, on whichever thread gets there first
+        if not self._store_ready:
+            with self._store_lock:
+                if not self._store_ready:
+                    if self._store_factory is None:
+                        from app.db.nosql.log_store import create_log_store
+                        self._store_factory = create_log_store
+                    self._store = self._store_factory()
+                    if self._store is not None:
+                        try:
+                            self._store.ensure_indexes()
+                        except Exception as e:
+                            logger.warning("Failed to create delivery log indexes", extra={"error": str(e)})
+                    self._store_ready = True
+        return self._store
+
+    def _ensure_writer(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping.clear()
+                    self._thread = threading.Thread(target=self._run, name="delivery-log-writer", daemon=True)
+                    self._thread.start()
+
+    def emit(self, notification_id: Any, channel: str, status: LogStatus, message: str, **fields) -> None:
+        """Queue one event; returns immediately."""
+        if not self.enabled:
+            return
+        self._ensure_writer()
+        event = {
+            "notification_id": str(notification_id),
+            "channel": channel,
+            "status": status,
+            "message": message,
+            "timestamp": datetime.now(timezone.utc),
+            **fields,
+        }
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            DELIVERY_LOG_EVENTS.labels("dropped").inc()
+
+    def record_outcomes(self, notification_id: Any, channel: str, successful: List[Dict[str, Any]],
+                        failed: List[Dict[str, Any]], attempt: int = 0) -> None:
+        """
+        One event per recipient of a send batch. Retryable failures are
+        followed by a retry or dead-letter event, so only the others are final.
+        """
+        for recipient in successful:
+            self.emit(
+                notification_id, channel, LogStatus.SENT, f"Sent via {channel}",
+                recipient_id=recipient.get("id"),
+                external_id=recipient.get("message_id") or recipient.get("message_sid"),
+                retry_count=attempt,
+                final=True,
+            )
+        for recipient in failed:
+            self.emit(
+                notification_id, channel, LogStatus.FAILED, f"Send via {channel} failed",
+                recipient_id=recipient.get("id"),
+                error_message=recipient.get("failed_reason"),
+                retry_count=attempt,
+                final=not recipient.get("retryable", True),
+            )
+
+    def record_retry(self, notification_id: Any, channel: str, recipients: List[Dict[str, Any]],
+                     attempt: int, delay: Optional[int]) -> None:
+        """
+        Events for recipients republished for another attempt (delay None:
+        dead-lettered). A multi-channel payload logs each recipient under its
+        own channel.
+        """
+        status = LogStatus.RETRY if delay is not None else LogStatus.FAILED
+        message = f"Retry {attempt} scheduled in {delay}s" if delay is not None else "Retries exhausted, dead-lettered"
+        for recipient in recipients:
+            recipient_ch = recipient_channel(recipient)
+            self.emit(notification_id, recipient_ch.value if recipient_ch else channel, status, message,
+                      recipient_id=recipient.get("id"), retry_count=attempt, final=delay is None)
+
+    def _drain(self, deadline: float, limit: int) -> List[Dict[str, Any]]:
+        events = []
+        while len(events) < limit:
+            try:
+                event = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if event is _WAKE:
+                break
+            events.append(event)
+        return events
+
+    def _write(self, events: List[Dict[str, Any]]) -> None:
+        entries = []
+        for event in events:
+            try:
+                entries.append(NotificationLogEntry(**event))
+            except ValueError as e:
+                DELIVERY_LOG_EVENTS.labels("failed").inc()
+                logger.warning("Invalid delivery event", extra={"error": str(e)})
+        if not entries:
+            return
+        if settings.DELIVERY_STATS_ENABLED:
+            try:
+                self.stats.record(entries)
+            except Exception as e:
+                logger.warning("Failed to update delivery stats", extra={"count": len(entries), "error": str(e)})
+        started = time.perf_counter()
+        try:
+            store = self.store
+            if store is None:
+                return
+            store.insert_many(entries)
+            DELIVERY_LOG_EVENTS.labels("written").inc(len(entries))
+        except Exception as e:
+            # The log is best effort: a failed batch is dropped, not retried
+            DELIVERY_LOG_EVENTS.labels("failed").inc(len(entries))
+            logger.warning("Failed to write delivery events", extra={"count": len(entries), "error": str(e)})
+        finally:
+            DELIVERY_LOG_WRITE_DURATION.observe(time.perf_counter() - started)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if first is _WAKE:
+                continue
+            with self._write_lock:
+                # Wait up to the flush interval for the rest of the batch
+                events = [first] + self._drain(time.monotonic() + self.flush_interval, self.batch_size - 1)
+                self._write(events)
+
+    def flush(self) -> None:
+        """Write everything queued so far, on the calling thread."""
+        with self._write_lock:
+            while True:
+                events = self._drain(time.monotonic(), self.batch_size)
+                if not events:
+                    return
+                self._write(events)
+
+    def query(self, log_query: LogQuery) -> List[NotificationLogEntry]:
+        """Events matching the query, newest first (blocking; call via run_blocking)."""
+        store = self.store if settings.DELIVERY_LOG_BACKEND != "none" else None
+        return store.query(log_query) if store is not None else []
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the writer, write what is still queued and close the store."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            try:
+                self._queue.put_nowait(_WAKE)
+            except queue.Full:
+                pass  # the writer is busy and sees the stop flag after this batch
+            thread.join(timeout)
+        self.flush()
+        if self._store is not None:
+            self._store.close()
+        self._store, self._store_ready = None, False
+
+
+delivery_log = DeliveryEventLog()
@@ -0,0 +1,135 @@
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+import redis
+from app.core.config import settings
+from app.core.redis_client import LazyRedis
+from app.db.nosql.models import LogStats, LogStatus, NotificationLogEntry
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bucket width in seconds per resolution
+RESOLUTIONS = {"minute": 60, "hour": 3600}
+
+_PERIOD = re.compile(r"^(\d+)([mhd])$")
+_PERIOD_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+SUCCESS_STATUSES = {LogStatus.SENT.value, LogStatus.DELIVERED.value}
+FINAL_SUFFIX = ":final"
+
+
+def parse_period(value: str) -> timedelta:
+    """"15m", "6h" or "7d" as a timedelta; ValueError for anything else."""
+    match = _PERIOD.match(value)
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid period: {value!r}")
+    return timedelta(**{_PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+
+
+class DeliveryStats:
+    """
+    Delivery counters rolled up per minute and per hour in Redis, so the
+    stats endpoint never aggregates the notification tables.
+    Each bucket is a hash of "<channel>:<status>" event counts, plus
+    "<channel>:failed:final" for failures no further attempt follows, and a
+    HyperLogLog of the recipients seen in it; both expire after their
+    retention.
+    """
+
+    redis = LazyRedis()
+
+    @staticmethod
+    def _key(resolution: str, bucket: int) -> str:
+        return f"stats:{resolution}:{bucket}"
+
+    @staticmethod
+    def _retention(resolution: str) -> int:
+        if resolution == "minute":
+            return settings.DELIVERY_STATS_MINUTE_RETENTION_HOURS * 3600
+        return settings.DELIVERY_STATS_HOUR_RETENTION_DAYS * 86400
+
+    def record(self, entries: List[NotificationLogEntry]) -> None:
+        """
+        Add a batch of events to their minute and hour buckets. The batch is
+        summed in memory first, so it costs one pipeline however large it is.
+        """
+        counts: Counter = Counter()
+        recipients: Dict[Tuple[str, int], Set[int]] = defaultdict(set)
+        for entry in entries:
+            moment = entry.timestamp
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)  # naive timestamps (the model's default) are UTC
+            timestamp = moment.timestamp()
+            fields = [f"{entry.channel.value}:{entry.status.value}"]
+            if entry.final and entry.status == LogStatus.FAILED:
+                fields.append(f"{entry.channel.value}:{LogStatus.FAILED.value}{FINAL_SUFFIX}")
+            for resolution, width in RESOLUTIONS.items():
+                bucket = (resolution, int(timestamp // width))
+                for field in fields:
+                    counts[bucket, field] += 1
+                if entry.recipient_id is not None:
+                    recipients[bucket].add(entry.recipient_id)
+        if not counts:
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        buckets = set()
+        for ((resolution, bucket), field), count in counts.items():
+            pipe.hincrby(self._key(resolution, bucket), field, count)
+            buckets.add((resolution, bucket))
+        for (resolution, bucket), members in recipients.items():
+            pipe.pfadd(f"{self._key(resolution, bucket)}:recipients", *members)
+        for resolution, bucket in buckets:
+            key, ttl = self._key(resolution, bucket), self._retention(resolution)
+            pipe.expire(key, ttl)
+            pipe.expire(f"{key}:recipients", ttl)
+        pipe.execute()
+
+    def stats(self, period: timedelta, label: Optional[str] = None, now: Optional[float] = None) -> LogStats:
+        """
+        Totals over the last `period`, read from minute buckets up to
+        DELIVERY_STATS_MINUTE_RESOLUTION_HOURS and hour buckets beyond that.
+        Buckets are whole, so the oldest one may reach up to one bucket width
+        before the start of the period. The recipient count is approximate.
+        The breakdowns count events, one per recipient and attempt; the
+        failure count only failures that no further attempt follows.
+        """
+        now = time.time() if now is None else now
+        resolution = "minute" if period <= timedelta(hours=settings.DELIVERY_STATS_MINUTE_RESOLUTION_HOURS) else "hour"
+        width = RESOLUTIONS[resolution]
+        first, last = int((now - period.total_seconds()) // width), int(now // width)
+        keys = [self._key(resolution, bucket) for bucket in range(first, last + 1)]
+
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        pipe.pfcount(*[f"{key}:recipients" for key in keys])
+        *buckets, unique_recipients = pipe.execute()
+
+        channels: Counter = Counter()
+        statuses: Counter = Counter()
+        final_failures = 0
+        for bucket in buckets:
+            for field, count in bucket.items():
+                if field.endswith(FINAL_SUFFIX):
+                    final_failures += int(count)
+                    continue
+                channel, _, status = field.partition(":")
+                channels[channel] += int(count)
+                statuses[status] += int(count)
+        return LogStats(
+            total_logs=sum(statuses.values()),
+            success_count=sum(statuses[status] for status in SUCCESS_STATUSES),
+            failure_count=final_failures,
+            channel_breakdown=dict(channels),
+            status_breakdown=dict(statuses),
+            unique_recipients=unique_recipients,
+            time_period=label or str(period),
+        )
+
+
+# Global rollup instance
+delivery_stats = DeliveryStats()
@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.utils.blocking import run_blocking
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Queues whose depth readiness reports
+MONITORED_QUEUES = ["notifications", "notifications.dead_letter"]
+
+
+def database_pool_stats() -> Optional[Dict[str, Any]]:
+    """Checked-out connections against the pool's capacity, or None if the pool can't tell (SQLite)."""
+    from app.db.sql.connection import get_engine
+
+    pool = get_engine().pool
+    if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+        return None
+    capacity = pool.size() + max(settings.DB_MAX_OVERFLOW, 0)
+    checked_out = pool.checkedout()
+    return {
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "saturation": round(checked_out / capacity, 3) if capacity else 1.0,
+    }
+
+
+def check_database() -> Dict[str, Any]:
+    """SELECT 1 on a pooled connection, plus pool saturation."""
+    from app.db.sql.connection import get_engine
+
+    pool = database_pool_stats()
+    details: Dict[str, Any] = {"pool": pool}
+    # An exhausted pool would make the probe wait for a connection; report it instead
+    if pool and pool["checked_out"] >= pool["capacity"]:
+        details["status"] = "saturated"
+        return details
+    with get_engine().connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return details
+
+
+def check_redis() -> Dict[str, Any]:
+    get_redis_client().ping()
+    return {}
+
+
+class RabbitMQProbe:
+    """
+    Reports queue depths over its own connection (the publisher's connection
+    is not safe to share with the monitor's thread). Reconnects after errors.
+    Rounds run on whichever pool thread is free and a timed-out round keeps
+    running, so only one round uses the connection at a time; a round that
+    starts while the previous one is still in flight reports down.
+    """
+
+    def __init__(self, url: Optional[str] = None, queues: Optional[list] = None):
+        self.url = url
+        self.queues = queues or MONITORED_QUEUES
+        self._connection = None
+        self._channel = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        import pika
+
+        if self._connection is None or self._connection.is_closed:
+            params = pika.URLParameters(self.url or settings.CELERY_BROKER_URL)
+            params.socket_timeout = settings.HEALTH_CHECK_TIMEOUT_SECONDS
+            params.blocked_connection_timeout = settings.HEALTH_CHECK_TIMEOUT_SECONDS
+            self._connection = pika.BlockingConnection(params)
+            self._channel = None
+        if self._channel is None or self._channel.is_closed:
+            self._channel = self._connection.channel()
+
+    def __call__(self) -> Dict[str, Any]:
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("previous check still in progress")
+        try:
+            self._connect()
+            depths = {}
+            for queue in self.queues:
+                # passive: report without creating; a missing queue closes the channel
+                method = self._channel.queue_declare(queue=queue, passive=True)
+                depths[queue] = method.method.message_count
+            return {"queue_depth": depths}
+        except Exception:
+            self._close()
+            raise
+        finally:
+            self._lock.release()
+
+    def close(self) -> None:
+        # A round stuck past its timeout still owns the connection; leave it be
+        if not self._lock.acquire(timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS):
+            return
+        try:
+            self._close()
+        finally:
+            self._lock.release()
+
+    def _close(self) -> None:
+        connection, self._connection, self._channel = self._connection, None, None
+        if connection is not None and connection.is_open:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+class HealthMonitor:
+    """
+    Checks dependencies in the background every HEALTH_CHECK_INTERVAL_SECONDS
+    and caches the results, so /ready and /health/deep answer from memory and
+    probes add no load or latency. Each check runs on the blocking pool with
+    a timeout; a check that raises or times out marks its dependency down.
+    """
+
+    def __init__(self, checks: Optional[Dict[str, Callable[[], Dict[str, Any]]]] = None,
+                 interval: Optional[float] = None, timeout: Optional[float] = None):
+        self.checks = checks if checks is not None else {
+            "database": check_database,
+            "redis": check_redis,
+            "rabbitmq": RabbitMQProbe(),
+        }
+        self.interval = interval or settings.HEALTH_CHECK_INTERVAL_SECONDS
+        self.timeout = timeout or settings.HEALTH_CHECK_TIMEOUT_SECONDS
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run_check(self, name: str, check: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            result = {"status": "up", **(await asyncio.wait_for(run_blocking(check), timeout=self.timeout))}
+        except asyncio.TimeoutError:
+            result = {"status": "down", "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {"status": "down", "error": str(e)}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        result["checked_at"] = datetime.now(timezone.utc).isoformat()
+        previous = self.results.get(name, {}).get("status")
+        if previous != result["status"]:
+            log = logger.info if result["status"] == "up" else logger.warning
+            log("Dependency health changed", extra={
+                "dependency": name, "status": result["status"], "error": result.get("error")
+            })
+        return result
+
+    async def check_now(self) -> Dict[str, Dict[str, Any]]:
+        """Run every check concurrently and cache the results."""
+        names = list(self.checks)
+        results = await asyncio.gather(*(self._run_check(name, self.checks[name]) for name in names))
+        self.results = dict(zip(names, results))
+        return self.results
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.check_now()
+            except Exception as e:
+                logger.error("Health check round failed", extra={"error": str(e)})
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start checking in the background on the running loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background checks and close the probes' connections."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for check in self.checks.values():
+            if hasattr(check, "close"):
+                check.close()
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Ready when every dependency was up on the last check and the DB pool
+        is below READY_MAX_POOL_SATURATION, so traffic moves off a replica
+        whose pool is exhausted before its requests time out. With
+        HEALTH_MONITOR_ENABLED off, only the pool is checked.
+        """
+        reasons = []
+        # With the monitor disabled nothing is checked, so only the pool counts
+        if not self.results and settings.HEALTH_MONITOR_ENABLED:
+            reasons.append("dependencies not checked yet")
+        for name, result in self.results.items():
+            if result["status"] != "up":
+                reasons.append(f"{name} {result['status']}")
+        # Pool stats are in memory, so read them live rather than from the last round
+        pool = database_pool_stats()
+        if pool and pool["saturation"] >= settings.READY_MAX_POOL_SATURATION:
+            reasons.append(f"database pool saturation {pool['saturation']}")
+        return {
+            "ready": not reasons,
+            "reasons": reasons,
+            "queue_depth": self.results.get("rabbitmq", {}).get("queue_depth"),
+            "db_pool": pool,
+        }
+
+
+health_monitor = HealthMonitor()
@@ -0,0 +1,137 @@
+import asyncio
+import inspect
+import sys
+import time
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.redis_client import get_redis_client, close_redis_client
+from app.core.tracing import shutdown_tracing
+from app.utils.blocking import run_blocking, shutdown_blocking_executor
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A representative request, validated once so the first real one doesn't pay
+# for lazy validator setup (e.g. the email validator import)
+SAMPLE_NOTIFICATION = {
+    "user_ids": [1],
+    "emails": ["warmup@example.com"],
+    "sms_numbers": ["+15550000000"],
+    "priority": "low",
+    "channel": "all",
+    "subject": "warm-up",
+    "content": "warm-up",
+}
+
+
+def warm_database() -> None:
+    """Open DB_POOL_MIN_CONNECTIONS pooled connections and hand them back to the pool open."""
+    from app.db.sql.connection import get_engine
+
+    engine = get_engine()
+    connections = []
+    try:
+        for _ in range(max(1, settings.DB_POOL_MIN_CONNECTIONS)):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def warm_redis() -> None:
+    """Ping Redis and load every Lua script, so the first calls run by EVALSHA."""
+    from app.core.rate_limiter import TOKEN_BUCKET_SCRIPT
+    from app.utils.circuit_breakers import ACQUIRE_SCRIPT, RECORD_SCRIPT
+
+    client = get_redis_client()
+    client.ping()
+    for script in (TOKEN_BUCKET_SCRIPT, ACQUIRE_SCRIPT, RECORD_SCRIPT):
+        client.script_load(script)
+
+
+async def warm_publisher() -> None:
+    """
+    Open the RabbitMQ connection and channel and declare the queue. Runs on
+    the event loop thread, which is the thread publish() uses the connection
+    from (pika connections are not thread-safe), with pika's own connect
+    timeout as the bound since it can't be abandoned midway.
+    """
+    from app.services.rabbitmq_publisher import publisher
+
+    publisher.connect(timeout=settings.WARMUP_STEP_TIMEOUT_SECONDS)
+
+
+def warm_schemas() -> None:
+    """Run the request and response validators once."""
+    from app.api.schemas.notification import NotificationCreate
+
+    NotificationCreate.model_validate(SAMPLE_NOTIFICATION).model_dump_json()
+
+
+# Plain functions run on the blocking pool; coroutine functions run on the loop
+WARMUP_STEPS: Dict[str, Callable[[], Any]] = {
+    "database": warm_database,
+    "redis": warm_redis,
+    "rabbitmq": warm_publisher,
+    "schemas": warm_schemas,
+}
+
+
+async def _run_step(name: str, step: Callable[[], Any], timeout: float) -> Optional[str]:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(step() if inspect.iscoroutinefunction(step) else run_blocking(step), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Warm-up step timed out", extra={"step": name, "timeout": timeout})
+        return f"timed out after {timeout}s"
+    except Exception as e:
+        logger.warning("Warm-up step failed", extra={"step": name, "error": str(e)})
+        return str(e)
+    logger.info("Warm-up step completed", extra={
+        "step": name, "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+    })
+    return None
+
+
+async def warm_up(steps: Optional[Dict[str, Callable[[], Any]]] = None,
+                  timeout: Optional[float] = None) -> Dict[str, Optional[str]]:
+    """
+    Open connections and load scripts before the app takes traffic. Steps run
+    concurrently, each bounded by WARMUP_STEP_TIMEOUT_SECONDS. A failing
+    dependency is logged and reported, not raised; its client connects lazily
+    on first use as before. Returns {step: error message or None}.
+    """
+    steps = WARMUP_STEPS if steps is None else steps
+    timeout = settings.WARMUP_STEP_TIMEOUT_SECONDS if timeout is None else timeout
+    errors = await asyncio.gather(*(_run_step(name, step, timeout) for name, step in steps.items()))
+    return dict(zip(steps, errors))
+
+
+async def shut_down() -> None:
+    """Close everything warm_up() (or the first requests) opened, publisher first."""
+    from app.core.http_client import close_http_client
+    from app.db.sql.connection import dispose_engine
+
+    # Only close the publisher if it was ever imported (it pulls in pika)
+    publisher_module = sys.modules.get("app.services.rabbitmq_publisher")
+    delivery_log_module = sys.modules.get("app.services.delivery_log")
+    smtp_pool_module = sys.modules.get("app.services.smtp_pool")
+    for name, close in (
+        ("rabbitmq", publisher_module.publisher.close if publisher_module else None),
+        ("delivery_log", delivery_log_module.delivery_log.close if delivery_log_module else None),
+        ("database", dispose_engine),
+        ("redis", close_redis_client),
+        ("smtp", smtp_pool_module.close_smtp_pools if smtp_pool_module else None),
+    ):
+        if close is None:
+            continue
+        try:
+            close()
+        except Exception as e:
+            logger.warning("Error closing client on shutdown", extra={"client": name, "error": str(e)})
+    await close_http_client()
+    shutdown_blocking_executor(wait=False)
+    shutdown_tracing()
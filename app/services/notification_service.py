@@ -1,5 +1,6 @@
+import asyncio
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timezone
 from app.db.sql.repositories import NotificationRepository
 from app.api.schemas import (
@@ -8,10 +9,15 @@ from app.api.schemas import (
     Status,
     Channel
 )
-from .recipient_resolver import RecipientResolver
-from .channel_services import ChannelServiceFactory
+from .recipient_resolver import RecipientResolver, payload_recipients_by_channel
+from .channel_registry import ChannelServiceFactory
+from .channel_results import failed_recipients, is_retryable_status
+from .delivery_dedup import delivery_deduplicator
+from .delivery_log import delivery_log
 from app.utils.validators import NotificationValidator
 from app.db.sql.models import Notification
+from app.utils.exceptions import PartialFailureException
+from app.core.tracing import tracer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,7 +29,10 @@ class NotificationService:
         self.notification_repository = NotificationRepository(self.db)
         self.recipient_resolver = RecipientResolver()
         self.validator = NotificationValidator()
+        self.deduplicator = delivery_deduplicator
+        self.delivery_log = delivery_log
 
+    @tracer.start_as_current_span("notification.create")
     async def create_notification(self, request: NotificationCreate) -> NotificationResponse:
         """        Create a new notification and send it to the specified recipients.
         This method handles the entire process of creating a notification, resolving recipients,
@@ -57,24 +66,28 @@ class NotificationService:
                 "updated_at": datetime.now(timezone.utc),
                 "status": Status.PENDING
             }
-            notification = self.notification_repository.create_notification(notification_data)
+            with tracer.start_as_current_span("db.create_notification"):
+                notification = self.notification_repository.create_notification(notification_data)
             
-            # step 3: resolve and create recipients
-            if request.channel == Channel.ALL:
-                # Resolve recipients for all channels
-                all_recipients = []
-                for channel in [Channel.EMAIL, Channel.SMS, Channel.PUSH]:
-                    recipients = self.recipient_resolver.resolve_recipients(request, channel)
-                    all_recipients.extend(recipients)
-                recipients = all_recipients
-            else:
-                # Resolve recipients for the specified channel
-                recipients = self.recipient_resolver.resolve_recipients(request, request.channel)
+            # step 3: resolve and create recipients, grouped by channel up front
+            # so the worker can fan out without rescanning the list per channel
+            channels = [Channel.EMAIL, Channel.SMS, Channel.PUSH] if request.channel == Channel.ALL else [request.channel]
+            recipients_by_channel = {}
+            with tracer.start_as_current_span("recipients.resolve"):
+                for channel in channels:
+                    channel_recipients = self.recipient_resolver.resolve_recipients(request, channel)
+                    if channel_recipients:
+                        recipients_by_channel[channel.value] = channel_recipients
+            recipients = [r for rs in recipients_by_channel.values() for r in rs]
 
             if not recipients:
                 raise ValueError("No valid recipients found for the notification.")
-            # Create recipient records in the database
-            self.notification_repository.create_recipients(notification.id, recipients)
+            # Create recipient records in the database and carry their ids in the
+            # payload so the worker can track delivery per recipient
+            with tracer.start_as_current_span("db.create_recipients", attributes={"recipients": len(recipients)}):
+                recipient_records = self.notification_repository.create_recipients(notification.id, recipients)
+            for recipient, record in zip(recipients, recipient_records):
+                recipient["id"] = record.id
 
             # Build payload for queue
             payload = {
@@ -82,7 +95,7 @@ class NotificationService:
                 "subject": request.subject,
                 "content": request.content,
                 "channel": request.channel.value,
-                "recipients": recipients
+                "recipients_by_channel": recipients_by_channel
             }
 
             # Determine the final status and schedule/queue the notification
@@ -100,8 +113,9 @@ class NotificationService:
                 final_status = Status.QUEUED
                 logger.info("Notification queued", extra={"notification_id": str(notification.id), "channel": str(request.channel)})
 
-            self.db.commit()
-            self.db.refresh(notification)
+            with tracer.start_as_current_span("db.commit"):
+                self.db.commit()
+                self.db.refresh(notification)
             
             # step 5: return the response
             response = NotificationResponse(
@@ -127,45 +141,125 @@ class NotificationService:
         """
         Process and send a notification. Called by MQ consumer with full payload.
         No DB read needed - all data in payload.
+
+        Recipients arrive grouped by channel (`recipients_by_channel`; older
+        payloads carry a flat `recipients` list) and all channels are sent
+        concurrently, so a slow provider does not hold up the others. Each
+        channel send is one batch: its per-recipient outcomes are written
+        with bulk updates, and the parent status is derived from the
+        aggregate recipient counts afterwards. Recipients that already have a
+        delivery marker are skipped, so retried payloads never resend.
+
+        Raises:
+            PartialFailureException: If any recipients failed with a retryable
+                error; only those recipients are carried on the exception.
         """
         notification_id = payload.get("id")
-        channel = Channel(payload.get("channel"))
         subject = payload.get("subject")
         content = payload.get("content")
-        recipients = payload.get("recipients", [])
+        recipients_by_channel = payload_recipients_by_channel(payload)
+        all_recipients = [r for rs in recipients_by_channel.values() for r in rs]
+        undelivered = {id(r) for r in self.deduplicator.filter_undelivered(notification_id, all_recipients)}
+
+        batches = []
+        for channel_value, channel_recipients in recipients_by_channel.items():
+            pending = [r for r in channel_recipients if id(r) in undelivered]
+            if pending:
+                batches.append((Channel(channel_value), pending))
+
+        # Channels are sent concurrently; each one's errors stay in its own outcome
+        outcomes = await asyncio.gather(*(
+            self._send_channel(ch, subject, content, channel_recipients)
+            for ch, channel_recipients in batches
+        ))
+
+        successful: List[Dict[str, Any]] = []
+        failed: List[Dict[str, Any]] = []
+        for (channel, _), (sent, not_sent) in zip(batches, outcomes):
+            self.deduplicator.mark_delivered(notification_id, sent)
+            self._record_batch_outcome(sent, not_sent)
+            self.delivery_log.record_outcomes(notification_id, channel.value, sent, not_sent,
+                                              attempt=payload.get("attempt", 0))
+            successful.extend(sent)
+            failed.extend(not_sent)
+
+        if any(r.get("id") is not None for r in all_recipients):
+            counts = self.notification_repository.get_recipient_status_counts(notification_id)
+        else:
+            # Payloads published before recipient ids were included
+            counts = {}
+            if successful:
+                counts[Status.SENT] = len(successful)
+            if failed:
+                counts[Status.FAILED] = len(failed)
 
+        final_status = self._derive_notification_status(counts)
+        self.notification_repository.update_notification_status(notification_id, final_status)
+        self.db.commit()
+        logger.info("Notification processed", extra={
+            "notification_id": str(notification_id),
+            "status": final_status.value,
+            "recipient_counts": {s.value: c for s, c in counts.items()},
+        })
+
+        retryable = [r for r in failed if r.get("retryable", True)]
+        if retryable:
+            raise PartialFailureException(successful, retryable)
+
+    async def _send_channel(self, channel: Channel, subject: Optional[str], content: str,
+                            recipients: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Send one channel's recipients, turning any error into failed outcomes for that channel only."""
         try:
-            if channel == Channel.ALL:
-                services = ChannelServiceFactory.get_all_services()
-                for ch, service in services.items():
-                    channel_recipients = [r for r in recipients if self._is_recipient_for_channel(r, ch)]
-                    if channel_recipients and service.validate_recipients(channel_recipients):
-                        await service.send_notification(subject, content, channel_recipients)
-            else:
-                service = ChannelServiceFactory.create_service(channel)
-                if service and service.validate_recipients(recipients):
-                    await service.send_notification(subject, content, recipients)
+            service = ChannelServiceFactory.create_service(channel)
+        except Exception as e:
+            logger.error("Channel service unavailable", extra={"channel": channel.value, "error": str(e)})
+            return [], failed_recipients(recipients, str(e), retryable=False)
+        return await self._send_batch(channel, service, subject, content, recipients)
 
-            self.notification_repository.update_notification_status(notification_id, Status.SENT)
-            self.db.commit()
-            logger.info("Notification sent", extra={"notification_id": str(notification_id)})
+    async def _send_batch(self, channel: Channel, service, subject: Optional[str], content: str,
+                          recipients: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Send one batch through a channel service and split its recipients into (successful, failed)."""
+        if service is None or not service.validate_recipients(recipients):
+            return [], failed_recipients(recipients, f"Invalid recipients for {channel.value} channel", retryable=False)
+        try:
+            result = await service.send_notification(subject, content, recipients)
+        except PartialFailureException as e:
+            return e.successful_recipients, e.failed_recipients
         except Exception as e:
-            logger.exception("Failed to process notification", extra={"notification_id": str(notification_id), "error": str(e)})
-            self.notification_repository.update_notification_status(notification_id, Status.FAILED, failure_reason=str(e))
-            self.db.commit()
+            logger.exception("Channel send failed", extra={"channel": channel.value, "error": str(e)})
+            retryable = is_retryable_status(getattr(e, "status_code", None))
+            return [], failed_recipients(recipients, str(e), retryable=retryable,
+                                         retry_after=getattr(e, "retry_after", None))
+
+        if isinstance(result, dict) and "failed_recipients" in result:
+            return result.get("successful_recipients", []), result["failed_recipients"]
+        if isinstance(result, dict) and result.get("status") == "error":
+            return [], failed_recipients(recipients, result.get("message"), retryable=False)
+        return recipients, []
+
+    def _record_batch_outcome(self, successful: List[Dict[str, Any]], failed: List[Dict[str, Any]]) -> None:
+        """Write the outcome of one send batch in bulk: one UPDATE for the sent and one for the failed."""
+        sent_ids = [r["id"] for r in successful if r.get("id") is not None]
+        if sent_ids:
+            self.notification_repository.bulk_update_recipient_status(sent_ids, Status.SENT)
 
+        failure_reasons = {r["id"]: r.get("failed_reason") for r in failed if r.get("id") is not None}
+        if failure_reasons:
+            self.notification_repository.bulk_fail_recipients(failure_reasons)
 
-    def _is_recipient_for_channel(self, recipient: Dict[str, Any], channel: Channel) -> bool:
+    @staticmethod
+    def _derive_notification_status(counts: Dict[Status, int]) -> Status:
         """
-        Check if the recipient is valid for the specified channel.
+        Derive the parent notification status from per-recipient status counts.
+        Any recipient still in flight keeps the notification PROCESSING; otherwise
+        it is SENT if at least one recipient got it and FAILED if none did.
         """
-        if channel == Channel.EMAIL:
-            return recipient.get('email') is not None
-        elif channel == Channel.SMS:
-            return recipient.get('phone_number') is not None
-        elif channel == Channel.PUSH:
-            return recipient.get('push_token') is not None
-        return True
+        in_flight = sum(counts.get(s, 0) for s in (Status.PENDING, Status.QUEUED, Status.PROCESSING))
+        if in_flight:
+            return Status.PROCESSING
+        if counts.get(Status.SENT, 0) or counts.get(Status.DELIVERED, 0):
+            return Status.SENT
+        return Status.FAILED
 
     def get_notification_status(self, notification_id: str) -> Optional[Notification]:
         """
@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import math
+import time
+from contextlib import asynccontextmanager
+from functools import wraps
+from typing import Dict, Optional, Tuple
+import redis
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.core.rate_limiter import TOKEN_BUCKET_SCRIPT
+from app.utils.exceptions import ChannelServiceException, OutboundRateLimitException
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def account_key(credential: Optional[str]) -> str:
+    """Stable, non-secret identifier for a provider account credential."""
+    if not credential:
+        return "default"
+    return hashlib.sha256(credential.encode()).hexdigest()[:12]
+
+
+def is_throttle_signal(error: Exception) -> bool:
+    """429s, provider errors, timeouts and explicit retry_after all mean 'slow down'."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return bool(getattr(error, "retry_after", None)) or status_code == 429 or (status_code or 0) >= 500
+
+
+class AIMDConcurrencyLimiter:
+    """
+    Per-process adaptive concurrency limit.
+    The limit grows by `increase` per window of successful calls (additive
+    increase) and is multiplied by `decrease_factor` on a throttle signal
+    (multiplicative decrease), at most once per `decrease_cooldown` seconds.
+    """
+
+    def __init__(self, min_limit: int, max_limit: int, increase: float = 1.0,
+                 decrease_factor: float = 0.5, decrease_cooldown: float = 1.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = None
+        self._loop = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Asyncio primitives belong to one event loop; start fresh if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self.in_flight = 0
+        return self._condition
+
+    async def acquire(self) -> None:
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+
+    def on_throttle(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        logger.warning("Outbound concurrency reduced", extra={"limit": int(self.limit)})
+
+
+class OutboundLimiter:
+    """
+    Outbound limiter for one provider account.
+    Combines a Redis token bucket shared by all workers (the provider's rate
+    limit) with a per-process AIMD concurrency limit. A provider's
+    retry_after pauses the shared bucket so every worker backs off together.
+    """
+
+    def __init__(self, provider: str, account: str, rate_per_second: float, burst: int = None,
+                 min_concurrency: int = None, max_concurrency: int = None, max_wait: float = None):
+        self.provider = provider
+        self.account = account
+        self.rate = rate_per_second
+        self.capacity = burst or max(1, int(rate_per_second))
+        self.max_wait = max_wait if max_wait is not None else settings.OUTBOUND_MAX_WAIT_SECONDS
+        self.concurrency = AIMDConcurrencyLimiter(
+            min_limit=min_concurrency or settings.OUTBOUND_MIN_CONCURRENCY,
+            max_limit=max_concurrency or settings.OUTBOUND_MAX_CONCURRENCY,
+        )
+        self.redis = get_redis_client()
+        self._token_bucket = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def _key(self) -> str:
+        return f"outbound:{self.provider}:{self.account}"
+
+    def _state_ttl(self) -> int:
+        """How long an idle bucket is kept: long enough to refill, at least two minutes."""
+        return max(120, int(self.capacity / self.rate) + 60)
+
+    def _take_token(self) -> Tuple[bool, int]:
+        """Try to take one token. Returns (allowed, wait_ms)."""
+        try:
+            allowed, _, wait_ms = self._token_bucket(
+                keys=[self._key()],
+                args=[
+                    self.capacity,
+                    self.rate,
+                    time.time(),
+                    1,
+                    self._state_ttl(),
+                ],
+            )
+            return bool(allowed), int(wait_ms)
+        except redis.RedisError as e:
+            logger.warning("Outbound limiter Redis error, allowing send", extra={
+                "provider": self.provider, "error": str(e)
+            })
+            return True, 0  # Fail open
+
+    async def wait_for_token(self) -> None:
+        """Wait until the shared bucket admits a send, or raise if that takes longer than max_wait."""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            allowed, wait_ms = self._take_token()
+            if allowed:
+                return
+            wait = wait_ms / 1000.0
+            if time.monotonic() + wait > deadline:
+                raise OutboundRateLimitException(
+                    f"Outbound rate limit for {self.provider} exceeded",
+                    channel=self.provider,
+                    retry_after=max(1, int(wait)),
+                    status_code=429,
+                )
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop all workers from sending to this account for `seconds`. The key
+        expires an idle-bucket TTL after the pause ends, so a stale pause
+        can't outlive it.
+        """
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key(), "blocked_until", time.time() + seconds)
+        pipe.expire(self._key(), math.ceil(seconds) + self._state_ttl())
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Outbound limiter pause error", extra={"provider": self.provider, "error": str(e)})
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a rate token and a concurrency slot for one provider call."""
+        await self.wait_for_token()
+        await self.concurrency.acquire()
+        try:
+            yield
+        finally:
+            await self.concurrency.release()
+
+    def record_success(self) -> None:
+        self.concurrency.on_success()
+
+    def record_failure(self, error: Exception) -> None:
+        if not is_throttle_signal(error):
+            return
+        self.concurrency.on_throttle()
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            self.pause(retry_after)
+
+
+_limiters: Dict[Tuple[str, str], OutboundLimiter] = {}
+
+
+def get_outbound_limiter(provider: str, account: str = "default") -> Optional[OutboundLimiter]:
+    """Get the process-wide limiter for a provider account, or None if limiting is disabled."""
+    if not settings.OUTBOUND_LIMIT_ENABLED:
+        return None
+    key = (provider, account)
+    if key not in _limiters:
+        _limiters[key] = OutboundLimiter(
+            provider,
+            account,
+            rate_per_second=settings.OUTBOUND_RATE_LIMITS.get(provider, settings.OUTBOUND_DEFAULT_RATE_LIMIT),
+        )
+    return _limiters[key]
+
+
+def outbound_limited(func):
+    """Pace a channel send through the service's `outbound_limiter`, feeding outcomes back to it."""
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        limiter = getattr(self, "outbound_limiter", None)
+        if limiter is None:
+            return await func(self, *args, **kwargs)
+        async with limiter.slot():
+            try:
+                result = await func(self, *args, **kwargs)
+            except (ChannelServiceException, ConnectionError, TimeoutError) as e:
+                limiter.record_failure(e)
+                raise
+            limiter.record_success()
+            return result
+
+    return wrapper
@@ -1,8 +1,12 @@
 import pika
 import json
 import logging
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
 from app.core.config import settings
+from app.core.metrics import PUBLISH_DURATION
+from app.core.tracing import inject_context, tracer
+from opentelemetry.trace import SpanKind
 
 logger = logging.getLogger(__name__)
 
@@ -14,26 +18,46 @@ class RabbitMQPublisher:
         self._connection = None
         self._channel = None
 
-    def _connect(self):
+    def connect(self, timeout: Optional[float] = None):
+        """
+        Open the connection and channel if they are not already open, giving
+        up on the whole connect after `timeout` seconds if one is given.
+        """
         if self._connection is None or self._connection.is_closed:
             params = pika.URLParameters(settings.CELERY_BROKER_URL)
+            if timeout:
+                params.socket_timeout = timeout
+                params.stack_timeout = timeout
             self._connection = pika.BlockingConnection(params)
             self._channel = self._connection.channel()
             self._channel.queue_declare(queue="notifications", durable=True)
 
     def publish(self, payload: Dict[str, Any]) -> None:
         """Publish notification payload to queue."""
-        self._connect()
-        message = json.dumps(payload, default=str)
-        self._channel.basic_publish(
-            exchange="",
-            routing_key="notifications",
-            body=message,
-            properties=pika.BasicProperties(
-                delivery_mode=2,  # persistent
-                content_type="application/json",
-            ),
-        )
+        started = time.perf_counter()
+        result = "error"
+        with tracer.start_as_current_span("queue.publish", kind=SpanKind.PRODUCER, attributes={
+            "messaging.system": "rabbitmq",
+            "messaging.destination.name": "notifications",
+        }):
+            try:
+                self.connect()
+                message = json.dumps(payload, default=str)
+                self._channel.basic_publish(
+                    exchange="",
+                    routing_key="notifications",
+                    body=message,
+                    properties=pika.BasicProperties(
+                        delivery_mode=2,  # persistent
+                        content_type="application/json",
+                        # published_at (epoch seconds) for queue lag, plus the
+                        # trace context so the consumer continues this trace
+                        headers=inject_context({"published_at": time.time()}),
+                    ),
+                )
+                result = "ok"
+            finally:
+                PUBLISH_DURATION.labels(result).observe(time.perf_counter() - started)
         logger.info("Published notification to queue", extra={"notification_id": str(payload.get("id"))})
 
     def close(self):
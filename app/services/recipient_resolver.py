@@ -1,8 +1,45 @@
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.api.schemas import NotificationCreate, Channel
 from app.services.user_service import user_service
 
+# Contact field each delivery channel sends to
+CHANNEL_CONTACT_FIELDS = {
+    Channel.EMAIL: "email",
+    Channel.SMS: "phone_number",
+    Channel.PUSH: "push_token",
+}
+
+
+def recipient_channel(recipient: Dict[str, Any]) -> Optional[Channel]:
+    """The channel a resolved recipient belongs to (each carries exactly one contact)."""
+    for channel, field in CHANNEL_CONTACT_FIELDS.items():
+        if recipient.get(field) is not None:
+            return channel
+    return None
+
+
+def group_recipients_by_channel(recipients: List[Dict[str, Any]], channel: Channel) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Partition recipients into {channel value: recipients} in one pass.
+    For a single-channel notification every recipient belongs to that channel.
+    """
+    if channel != Channel.ALL:
+        return {channel.value: list(recipients)} if recipients else {}
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for recipient in recipients:
+        ch = recipient_channel(recipient)
+        if ch is not None:
+            grouped.setdefault(ch.value, []).append(recipient)
+    return grouped
+
+
+def payload_recipients_by_channel(payload: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Recipients of a queued payload grouped by channel; also reads payloads with a flat `recipients` list."""
+    if "recipients_by_channel" in payload:
+        return {ch: rs for ch, rs in payload["recipients_by_channel"].items() if rs}
+    return group_recipients_by_channel(payload.get("recipients", []), Channel(payload.get("channel")))
+
 class RecipientResolver:
     """Resolves recipient information from various sources"""
     
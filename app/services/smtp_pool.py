@@ -0,0 +1,132 @@
+import queue
+import smtplib
+import ssl
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from email.message import EmailMessage
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Every pool created, so shutdown can close them without tracking services
+_pools: "weakref.WeakSet[SMTPConnectionPool]" = weakref.WeakSet()
+
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    Thread-safe pool of persistent, authenticated SMTP connections.
+    Connections are reused across messages (most recently used first), probed
+    with NOOP after sitting idle, and recycled after `max_messages` because
+    many servers cap messages per session. At most `size` connections exist.
+    The calls block, so call them from a worker thread (run_blocking).
+    """
+
+    def __init__(self, host: str, port: int = 587, username: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = True, size: int = 4, timeout: float = 10.0, max_messages: int = 100,
+                 idle_check_seconds: float = 30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.idle_check_seconds = idle_check_seconds
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        _pools.add(self)
+
+    def _connect(self) -> _PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls(context=ssl.create_default_context())
+                smtp.ehlo()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+        except Exception:
+            smtp.close()
+            raise
+        logger.debug("SMTP connection opened", extra={"host": self.host})
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _discard(connection: _PooledConnection) -> None:
+        try:
+            connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - connection.last_used < self.idle_check_seconds:
+                return connection
+            try:
+                if connection.smtp.noop()[0] == 250:
+                    return connection
+            except smtplib.SMTPException:
+                pass
+            self._discard(connection)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, waiting for one if all `size` are in use."""
+        self._slots.acquire()
+        try:
+            connection = self._checkout()
+            try:
+                yield connection.smtp
+            except Exception as e:
+                # Rejections leave the session usable; anything else (a dropped
+                # connection, a socket error) does not
+                if isinstance(e, smtplib.SMTPException) and not isinstance(e, smtplib.SMTPServerDisconnected):
+                    self._release(connection)
+                else:
+                    self._discard(connection)
+                raise
+            self._release(connection)
+        finally:
+            self._slots.release()
+
+    def _release(self, connection: _PooledConnection) -> None:
+        connection.messages_sent += 1
+        connection.last_used = time.monotonic()
+        if connection.messages_sent >= self.max_messages:
+            self._discard(connection)
+        else:
+            self._idle.put(connection)
+
+    def send_message(self, message: EmailMessage) -> Dict[str, tuple]:
+        """Send one message on a pooled connection. Returns refused recipients, as smtplib does."""
+        with self.connection() as smtp:
+            return smtp.send_message(message)
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def close_smtp_pools() -> None:
+    """Close the idle connections of every pool on shutdown."""
+    for pool in list(_pools):
+        pool.close()
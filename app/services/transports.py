@@ -0,0 +1,58 @@
+from typing import Any, Dict, Optional
+import httpx
+from app.core.http_client import get_http_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SendGridTransport:
+    """Async SendGrid v3 Mail Send client over the shared keep-alive connection pool."""
+
+    SEND_PATH = "/v3/mail/send"
+
+    def __init__(self, api_key: str, base_url: str = "https://api.sendgrid.com"):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+
+    async def send(self, message: Dict[str, Any]) -> httpx.Response:
+        """
+        POST a v3 mail payload (e.g. `Mail(...).get()`).
+        Returns the response for any status code; raises httpx.HTTPError on
+        connection errors and timeouts.
+        """
+        client = get_http_client()
+        return await client.post(f"{self.base_url}{self.SEND_PATH}", json=message, headers=self.headers)
+
+
+class FCMTransport:
+    """Async FCM HTTP (legacy server key) client over the shared keep-alive connection pool."""
+
+    def __init__(self, server_key: str, url: str = "https://fcm.googleapis.com/fcm/send"):
+        self.url = url
+        self.headers = {"Authorization": f"key={server_key}"}
+
+    async def send_multicast(self, message: Dict[str, Any]) -> httpx.Response:
+        """
+        POST a multicast message (`registration_ids` plus notification/data).
+        The response lists one result per registration id, in order.
+        """
+        client = get_http_client()
+        return await client.post(self.url, json=message, headers=self.headers)
+
+
+class TwilioTransport:
+    """Async Twilio Messages API client over the shared keep-alive connection pool."""
+
+    def __init__(self, account_sid: str, auth_token: str, base_url: str = "https://api.twilio.com"):
+        self.url = f"{base_url.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.auth = httpx.BasicAuth(account_sid, auth_token)
+
+    async def send_message(self, from_number: str, to_number: str, body: str,
+                           status_callback: Optional[str] = None) -> httpx.Response:
+        """Create one outbound message. The response JSON carries its sid and initial status."""
+        data = {"From": from_number, "To": to_number, "Body": body}
+        if status_callback:
+            data["StatusCallback"] = status_callback
+        client = get_http_client()
+        return await client.post(self.url, data=data, auth=self.auth)
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 class UserService:
     """
@@ -43,5 +43,24 @@ class UserService:
         """
         return self._users.get(user_id)
 
+    def prune_push_tokens(self, tokens: List[str]) -> int:
+        """
+        Remove push tokens the provider reported as invalid or unregistered.
+        Returns the number of users updated.
+        """
+        stale = set(tokens)
+        pruned = 0
+        for user in self._users.values():
+            if user.get("push_token") in stale:
+                user["push_token"] = None
+                pruned += 1
+        return pruned
+
+    def replace_push_token(self, old_token: str, new_token: str) -> None:
+        """Swap a push token for the canonical one the provider returned."""
+        for user in self._users.values():
+            if user.get("push_token") == old_token:
+                user["push_token"] = new_token
+
 # Create a single instance of the service to be used throughout the application
 user_service = UserService()
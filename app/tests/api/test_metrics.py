@@ -0,0 +1,78 @@
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.main import app
+from app.core.auth import create_service_token
+from app.core.cache import Cache
+from app.core.rate_limit_dependency import rate_limit_dependency
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_request_latency_labelled_by_route_template(client):
+    """Test that request latency is recorded per route template, not per raw path."""
+    # Unauthenticated: 401, or 403 on FastAPI releases before 0.116
+    status = str(client.get("/api/v1/notifications/abc").status_code)
+    labels = {"method": "GET", "route": "/api/v1/notifications/{notification_id}", "status": status}
+    before = _sample("http_request_duration_seconds_count", **labels)
+
+    client.get("/api/v1/notifications/abc")
+    client.get("/api/v1/notifications/def")
+
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 2
+
+
+def test_route_template_when_param_matches_a_literal_segment(client):
+    """Test that a path parameter equal to a literal segment still gets the route's own template."""
+    status = str(client.get("/api/v1/notifications/abc").status_code)
+    labels = {"method": "GET", "route": "/api/v1/notifications/{notification_id}", "status": status}
+    before = _sample("http_request_duration_seconds_count", **labels)
+
+    client.get("/api/v1/notifications/notifications")
+
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_decisions_counted():
+    """Test that each rate-limit check is counted and timed."""
+    token = create_service_token(service_id="metrics-test", scope=["notifications:read"]).access_token
+    allowed = _sample("rate_limit_decisions_total", result="allowed")
+    checks = _sample("rate_limit_check_duration_seconds_count")
+
+    await rate_limit_dependency(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+    assert _sample("rate_limit_decisions_total", result="allowed") == allowed + 1
+    assert _sample("rate_limit_check_duration_seconds_count") == checks + 1
+
+
+def test_cache_hits_and_misses_counted():
+    """Test that cache reads are counted as hits or misses."""
+    cache = Cache()
+    hits = _sample("cache_requests_total", operation="get", result="hit")
+    misses = _sample("cache_requests_total", operation="get", result="miss")
+
+    cache.get("notification", "missing")
+    cache.set("notification", "n1", {"status": "sent"})
+    cache.get("notification", "n1")
+
+    assert _sample("cache_requests_total", operation="get", result="miss") == misses + 1
+    assert _sample("cache_requests_total", operation="get", result="hit") == hits + 1
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client):
+    """Test that /metrics serves the Prometheus exposition format."""
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds" in response.text
+    assert "consumer_processing_duration_seconds" in response.text
@@ -1,8 +1,11 @@
 import sys
 import os
 import pytest
+import fakeredis
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from app.core import redis_client
+from app.core.config import settings
 from app.db.sql.models import Base
 from celery import Celery
 from app.worker.tasks import celery_app as app
@@ -11,6 +14,27 @@ from unittest.mock import patch
 # Add the project root to the PYTHONPATH
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+# Tests never talk to a live Redis: every get_redis_client() caller shares one
+# in-memory server, installed before any module-level client is created.
+fake_redis = fakeredis.FakeRedis(decode_responses=True)
+redis_client._redis_client = fake_redis
+
+# Requests and worker messages over their SQL query budget (or repeating a
+# statement, a likely N+1) fail the test instead of only logging a warning
+settings.SQL_BUDGET_STRICT = True
+
+# Delivery events go to an in-memory SQLite store rather than MongoDB
+settings.DELIVERY_LOG_BACKEND = "sqlite"
+settings.DELIVERY_LOG_SQLITE_PATH = ":memory:"
+
+@pytest.fixture(autouse=True)
+def flush_redis():
+    """Reset Redis state (rate limits, circuits, dedup markers) between tests."""
+    yield
+    # App shutdown (TestClient lifespan) closes the client; put the fake back
+    redis_client._redis_client = fake_redis
+    fake_redis.flushall()
+
 @pytest.fixture(scope="function")
 def test_db_session():
     """Create a test database session for integration tests."""
@@ -1,12 +1,27 @@
+import asyncio
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
 from app.services.channel_services import (
     EmailChannelService,
+    SMTPEmailChannelService,
+    FailoverEmailChannelService,
     SMSChannelService,
     PushChannelService,
     ChannelServiceFactory,
 )
 from app.api.schemas import Channel
+from app.utils.exceptions import ChannelServiceException, PartialFailureException
+from app.services.channel_services import build_send_result
+from app.services.channel_results import collect_batch_outcomes
+from app.services.channel_registry import ChannelRegistry, channel_registry
+from app.tests.stubs import StubHTTPServer, StubSMTPServer
+
+@pytest.fixture(autouse=True)
+def fresh_channel_registry():
+    """Services are cached on first use; start every test without any."""
+    channel_registry.reset()
+    yield
+    channel_registry.reset()
 
 # Tests for ChannelServiceFactory
 def test_factory_creates_email_service():
@@ -14,8 +29,9 @@ def test_factory_creates_email_service():
     with patch('app.services.channel_services.settings') as mock_settings:
         mock_settings.SENDGRID_API_KEY = "test_key"
         mock_settings.SENDGRID_FROM_EMAIL = "test@example.com"
+        mock_settings.SMTP_HOST = None
         service = ChannelServiceFactory.create_service(Channel.EMAIL)
-        assert isinstance(service, EmailChannelService)
+        assert type(service) is EmailChannelService
 
 def test_factory_creates_sms_service():
     """Test that the factory correctly creates an SMSChannelService."""
@@ -27,6 +43,52 @@ def test_factory_creates_push_service():
     service = ChannelServiceFactory.create_service(Channel.PUSH)
     assert isinstance(service, PushChannelService)
 
+def test_registry_loads_providers_lazily():
+    """Test that a provider is only imported and created when its channel is first used."""
+    created = []
+
+    def factory():
+        created.append(1)
+        return MagicMock()
+
+    registry = ChannelRegistry(specs={Channel.SMS: factory}, group=None)
+    assert created == []
+    service = registry.get(Channel.SMS)
+    assert registry.get("sms") is service
+    assert created == [1]
+    with pytest.raises(ValueError, match="Unsupported channel"):
+        registry.get(Channel.PUSH)
+
+def test_registry_discovers_entry_points():
+    """Test that providers registered under the entry point group replace the built-ins."""
+    entry_point = MagicMock(value="app.services.channel_services:SMSChannelService")
+    entry_point.name = "push"
+    registry = ChannelRegistry(specs={}, group="test.channels")
+
+    with patch('app.services.channel_registry.entry_points', return_value=[entry_point]) as mock_entry_points:
+        assert registry.channels() == [Channel.PUSH]
+        assert isinstance(registry.get(Channel.PUSH), SMSChannelService)
+    mock_entry_points.assert_called_once_with(group="test.channels")
+
+def test_registry_warm_up_reports_failures():
+    """Test that warm-up creates every provider and reports, rather than raises, load errors."""
+    def broken():
+        raise ValueError("SENDGRID_API_KEY is not configured.")
+
+    registry = ChannelRegistry(specs={Channel.EMAIL: broken, Channel.SMS: MagicMock}, group=None)
+    assert registry.warm_up() == {Channel.EMAIL: "SENDGRID_API_KEY is not configured.", Channel.SMS: None}
+
+def test_importing_services_does_not_load_providers():
+    """Test that the API-side service layer does not import provider SDKs."""
+    import subprocess
+    import sys
+    code = (
+        "import sys, app.services.notification_service; "
+        "print('sendgrid' in sys.modules, 'app.services.channel_services' in sys.modules)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.split() == ["False", "False"]
+
 def test_factory_raises_error_for_unsupported_channel():
     """Test that the factory raises a ValueError for an unsupported channel."""
     with pytest.raises(ValueError):
@@ -34,40 +96,172 @@ def test_factory_raises_error_for_unsupported_channel():
 
 # Tests for EmailChannelService
 @pytest.fixture
-def email_service():
-    """Pytest fixture for an EmailChannelService instance with mocked settings."""
+def sendgrid_stub():
+    """Local stand-in for the SendGrid API."""
+    with StubHTTPServer() as stub:
+        yield stub
+
+@pytest.fixture
+def email_service(sendgrid_stub):
+    """Pytest fixture for an EmailChannelService instance pointed at the SendGrid stand-in."""
     with patch('app.services.channel_services.settings') as mock_settings:
         mock_settings.SENDGRID_API_KEY = "test_api_key"
         mock_settings.SENDGRID_FROM_EMAIL = "from@example.com"
+        mock_settings.SENDGRID_API_BASE_URL = sendgrid_stub.url
+        mock_settings.SENDGRID_MAX_PERSONALIZATIONS = 1000
+        mock_settings.EMAIL_BATCH_CONCURRENCY = 4
         yield EmailChannelService()
 
 @pytest.mark.asyncio
-async def test_email_send_notification_success(email_service):
+async def test_email_send_notification_success(email_service, sendgrid_stub):
     """Test successful email sending."""
-    with patch('app.services.channel_services.SendGridAPIClient') as mock_sendgrid:
-        mock_sg_instance = MagicMock()
-        mock_sg_instance.send.return_value = MagicMock(status_code=202)
-        mock_sendgrid.return_value = mock_sg_instance
+    recipients = [{"email": "to@example.com"}]
+    response = await email_service.send_notification("Subject", "Content", recipients)
+
+    assert response["status"] == "success"
+    assert len(sendgrid_stub.requests) == 1
+    request = sendgrid_stub.requests[0]
+    assert request["path"] == "/v3/mail/send"
+    assert request["headers"]["Authorization"] == "Bearer test_api_key"
+    body = sendgrid_stub.json_bodies()[0]
+    assert body["from"]["email"] == "from@example.com"
+    assert body["personalizations"][0]["to"] == [{"email": "to@example.com"}]
+
+@pytest.mark.asyncio
+async def test_email_send_records_metrics(email_service, sendgrid_stub):
+    """Test that sends are timed and counted per channel and provider."""
+    from prometheus_client import REGISTRY
 
-        recipients = [{"email": "to@example.com"}]
-        response = await email_service.send_notification("Subject", "Content", recipients)
+    labels = {"channel": "email", "provider": "EmailChannelService", "outcome": "success"}
+    sends = REGISTRY.get_sample_value("channel_send_duration_seconds_count", labels) or 0
+    sent = REGISTRY.get_sample_value("channel_send_recipients_total", {**labels, "outcome": "sent"}) or 0
 
-        assert response["status"] == "success"
-        mock_sg_instance.send.assert_called_once()
+    await email_service.send_notification("Subject", "Content", [{"email": "a@example.com"}, {"email": "b@example.com"}])
+
+    assert REGISTRY.get_sample_value("channel_send_duration_seconds_count", labels) == sends + 1
+    assert REGISTRY.get_sample_value("channel_send_recipients_total", {**labels, "outcome": "sent"}) == sent + 2
 
 @pytest.mark.asyncio
-async def test_email_send_notification_failure(email_service):
+async def test_email_send_failed_recipients_counted_as_failed(email_service, sendgrid_stub):
+    """Test that a send whose recipients all failed is recorded as an error, not as sent."""
+    from prometheus_client import REGISTRY
+
+    labels = {"channel": "email", "provider": "EmailChannelService"}
+    errors = REGISTRY.get_sample_value("channel_send_duration_seconds_count", {**labels, "outcome": "error"}) or 0
+    sent = REGISTRY.get_sample_value("channel_send_recipients_total", {**labels, "outcome": "sent"}) or 0
+    failed = REGISTRY.get_sample_value("channel_send_recipients_total", {**labels, "outcome": "failed"}) or 0
+
+    response = await email_service.send_notification("Subject", "Content", [{"email": 1}])
+
+    assert response["status"] == "error"
+    assert REGISTRY.get_sample_value("channel_send_duration_seconds_count", {**labels, "outcome": "error"}) == errors + 1
+    assert (REGISTRY.get_sample_value("channel_send_recipients_total", {**labels, "outcome": "sent"}) or 0) == sent
+    assert REGISTRY.get_sample_value("channel_send_recipients_total", {**labels, "outcome": "failed"}) == failed + 1
+
+@pytest.mark.asyncio
+async def test_email_send_reuses_connection(email_service, sendgrid_stub):
+    """Test that consecutive sends share one keep-alive connection."""
+    for _ in range(3):
+        await email_service.send_notification("Subject", "Content", [{"email": "to@example.com"}])
+
+    assert len(sendgrid_stub.requests) == 3
+    assert len({r["client_port"] for r in sendgrid_stub.requests}) == 1
+
+@pytest.mark.asyncio
+async def test_email_send_notification_failure(email_service, sendgrid_stub):
     """Test failed email sending."""
-    with patch('app.services.channel_services.SendGridAPIClient') as mock_sendgrid:
-        mock_sg_instance = MagicMock()
-        mock_sg_instance.send.return_value = MagicMock(status_code=400, body="Error")
-        mock_sendgrid.return_value = mock_sg_instance
+    sendgrid_stub.responses = [(400, "Error", {})]
+
+    recipients = [{"email": "to@example.com"}]
+    response = await email_service.send_notification("Subject", "Content", recipients)
+
+    assert response["status"] == "error"
+    assert response["details"] == "Error"
+    assert response["failed_recipients"][0]["retryable"] is False
+
+@pytest.mark.asyncio
+async def test_email_send_notification_retryable_failure(email_service, sendgrid_stub):
+    """Test that provider-side errors are raised so the send can be retried."""
+    sendgrid_stub.responses = [(503, "Unavailable", {})]
+
+    with patch('app.utils.retries.asyncio.sleep', new_callable=AsyncMock):
+        with pytest.raises(ChannelServiceException) as exc_info:
+            await email_service.send_notification("Subject", "Content", [{"email": "to@example.com"}])
+
+    assert exc_info.value.status_code == 503
+
+@pytest.mark.asyncio
+async def test_email_send_notification_rate_limited(email_service, sendgrid_stub):
+    """Test that a 429 carries the provider's Retry-After."""
+    sendgrid_stub.responses = [(429, "Too Many Requests", {"Retry-After": "120"})]
+
+    with pytest.raises(ChannelServiceException) as exc_info:
+        await email_service.send_notification("Subject", "Content", [{"email": "to@example.com"}])
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after == 120
+    assert len(sendgrid_stub.requests) == 1  # Retry-After beyond max delay is left to the retry queue
+
+@pytest.mark.asyncio
+async def test_email_send_notification_connection_error():
+    """Test that an unreachable provider is reported as a retryable channel error."""
+    with patch('app.services.channel_services.settings') as mock_settings:
+        mock_settings.SENDGRID_API_KEY = "test_api_key"
+        mock_settings.SENDGRID_FROM_EMAIL = "from@example.com"
+        mock_settings.SENDGRID_API_BASE_URL = "http://127.0.0.1:9"
+        mock_settings.SENDGRID_MAX_PERSONALIZATIONS = 1000
+        mock_settings.EMAIL_BATCH_CONCURRENCY = 4
+        service = EmailChannelService()
+
+    with patch('app.utils.retries.asyncio.sleep', new_callable=AsyncMock):
+        with pytest.raises(ChannelServiceException) as exc_info:
+            await service.send_notification("Subject", "Content", [{"email": "to@example.com"}])
+
+    assert exc_info.value.status_code is None
+
+@pytest.mark.asyncio
+async def test_email_send_batches_personalizations(email_service, sendgrid_stub):
+    """Test that each recipient gets a private personalization and requests are packed to the batch size."""
+    email_service.batch_size = 2
+    recipients = [{"email": f"user{i}@example.com", "substitutions": {"name": f"User {i}"}} for i in range(5)]
+
+    response = await email_service.send_notification("Hi {{name}}", "Hello {{name}}", recipients)
+
+    assert response["status"] == "success"
+    bodies = sendgrid_stub.json_bodies()
+    assert sorted(len(b["personalizations"]) for b in bodies) == [1, 2, 2]
+    personalizations = [p for b in bodies for p in b["personalizations"]]
+    assert all(len(p["to"]) == 1 for p in personalizations)
+    by_email = {p["to"][0]["email"]: p["substitutions"] for p in personalizations}
+    assert by_email["user3@example.com"]["{{name}}"] == "User 3"
+    assert by_email["user3@example.com"]["{{email}}"] == "user3@example.com"
 
-        recipients = [{"email": "to@example.com"}]
-        response = await email_service.send_notification("Subject", "Content", recipients)
+@pytest.mark.asyncio
+async def test_email_send_collects_per_chunk_outcomes(email_service, sendgrid_stub):
+    """Test that a rejected chunk fails only its own recipients."""
+    email_service.batch_size = 2
+    email_service.batch_concurrency = 1
+    sendgrid_stub.responses = [(202, "", {}), (400, "Bad request", {})]
+    recipients = [{"id": i, "email": f"user{i}@example.com"} for i in range(4)]
+
+    with pytest.raises(PartialFailureException) as exc_info:
+        await email_service.send_notification("Subject", "Content", recipients)
+
+    assert [r["id"] for r in exc_info.value.successful_recipients] == [0, 1]
+    assert [r["id"] for r in exc_info.value.failed_recipients] == [2, 3]
+    assert exc_info.value.failed_recipients[0]["retryable"] is False
 
-        assert response["status"] == "error"
-        assert response["details"] == "Error"
+def test_build_send_result_raises_partial_failure():
+    """Test that mixed outcomes are reported as a partial failure."""
+    with pytest.raises(PartialFailureException) as exc_info:
+        build_send_result(Channel.SMS, [{"phone_number": "+1"}], [{"phone_number": "+2", "retryable": True}])
+    assert exc_info.value.failed_recipients == [{"phone_number": "+2", "retryable": True}]
+
+def test_collect_batch_outcomes_reraises_cancellation():
+    """Test that a cancelled batch cancels the send instead of being recorded as a failure."""
+    ok = {"successful_recipients": [{"id": 1}], "failed_recipients": []}
+    with pytest.raises(asyncio.CancelledError):
+        collect_batch_outcomes(Channel.EMAIL, [[{"id": 1}], [{"id": 2}]], [ok, asyncio.CancelledError()])
 
 def test_email_validate_recipients_valid(email_service):
     """Test recipient validation with valid recipients."""
@@ -94,3 +288,341 @@ def test_email_service_missing_from_email():
         mock_settings.SENDGRID_FROM_EMAIL = None
         with pytest.raises(ValueError, match="SENDGRID_FROM_EMAIL is not configured"):
             EmailChannelService()
+
+# Tests for PushChannelService
+@pytest.fixture
+def fcm_stub():
+    """Local stand-in for the FCM send endpoint."""
+    with StubHTTPServer([(200, {"results": []}, {})]) as stub:
+        yield stub
+
+@pytest.fixture
+def push_service(fcm_stub):
+    """Pytest fixture for a PushChannelService pointed at the FCM stand-in."""
+    with patch('app.services.channel_services.settings') as mock_settings:
+        mock_settings.FCM_SERVER_KEY = "server_key"
+        mock_settings.FCM_API_URL = f"{fcm_stub.url}/fcm/send"
+        mock_settings.FCM_MAX_TOKENS_PER_REQUEST = 1000
+        mock_settings.PUSH_BATCH_CONCURRENCY = 4
+        service = PushChannelService()
+    service.user_service = MagicMock()
+    yield service
+
+def _fcm_results(*results):
+    return (200, {"multicast_id": 1, "results": list(results)}, {})
+
+@pytest.mark.asyncio
+async def test_push_send_multicast_batches(push_service, fcm_stub):
+    """Test that tokens are sent as multicast requests of at most the batch size."""
+    push_service.batch_size = 2
+    fcm_stub.responses = [_fcm_results({"message_id": "m1"}, {"message_id": "m2"})]
+    recipients = [{"id": i, "push_token": f"token-{i}"} for i in range(4)]
+
+    response = await push_service.send_notification("Title", "Body", recipients)
+
+    assert response["status"] == "success"
+    assert [r["message_id"] for r in response["successful_recipients"]] == ["m1", "m2", "m1", "m2"]
+    bodies = fcm_stub.json_bodies()
+    assert len(bodies) == 2
+    assert sorted(t for b in bodies for t in b["registration_ids"]) == [f"token-{i}" for i in range(4)]
+    assert bodies[0]["notification"] == {"title": "Title", "body": "Body"}
+    assert fcm_stub.requests[0]["headers"]["Authorization"] == "key=server_key"
+
+@pytest.mark.asyncio
+async def test_push_prunes_stale_tokens(push_service, fcm_stub):
+    """Test per-token outcomes: stale tokens are pruned and only transient errors are retryable."""
+    fcm_stub.responses = [_fcm_results(
+        {"message_id": "m1", "registration_id": "token-0-new"},
+        {"error": "NotRegistered"},
+        {"error": "Unavailable"},
+    )]
+    recipients = [{"id": i, "push_token": f"token-{i}"} for i in range(3)]
+
+    with pytest.raises(PartialFailureException) as exc_info:
+        await push_service.send_notification("Title", "Body", recipients)
+
+    assert [r["id"] for r in exc_info.value.successful_recipients] == [0]
+    failed = {r["id"]: r for r in exc_info.value.failed_recipients}
+    assert failed[1]["retryable"] is False
+    assert failed[2]["retryable"] is True
+    push_service.user_service.prune_push_tokens.assert_called_once_with(["token-1"])
+    push_service.user_service.replace_push_token.assert_called_once_with("token-0", "token-0-new")
+
+@pytest.mark.asyncio
+async def test_push_rejected_request(push_service, fcm_stub):
+    """Test that an auth failure fails the batch without retrying."""
+    fcm_stub.responses = [(401, "Unauthorized", {})]
+
+    response = await push_service.send_notification("Title", "Body", [{"id": 1, "push_token": "token"}])
+
+    assert response["status"] == "error"
+    assert response["failed_recipients"][0]["retryable"] is False
+    assert len(fcm_stub.requests) == 1
+
+def test_push_validate_recipients(push_service):
+    """Test that push recipients are identified by push_token."""
+    assert push_service.validate_recipients([{"push_token": "token"}]) is True
+    assert push_service.validate_recipients([{"device_token": "token"}]) is False
+
+def test_user_service_prunes_push_tokens():
+    """Test that pruned tokens are removed from the user store."""
+    from app.services.user_service import UserService
+    users = UserService()
+    assert users.prune_push_tokens(["fcm_token_alice_12345", "unknown"]) == 1
+    assert users.get_user_by_id(1)["push_token"] is None
+    assert users.get_user_by_id(4)["push_token"] == "fcm_token_david_54321"
+
+# Tests for SMSChannelService
+@pytest.fixture
+def twilio_stub():
+    """Local stand-in for the Twilio Messages API."""
+    with StubHTTPServer([(201, {"sid": "SM123", "status": "queued"}, {})]) as stub:
+        yield stub
+
+@pytest.fixture
+def sms_service(twilio_stub):
+    """Pytest fixture for an SMSChannelService pointed at the Twilio stand-in, without per-number pacing."""
+    with patch('app.services.channel_services.settings') as mock_settings:
+        mock_settings.TWILIO_ACCOUNT_SID = "AC123"
+        mock_settings.TWILIO_AUTH_TOKEN = "auth_token"
+        mock_settings.TWILIO_PHONE_NUMBER = "+15550000001, +15550000002"
+        mock_settings.TWILIO_API_BASE_URL = twilio_stub.url
+        mock_settings.TWILIO_STATUS_CALLBACK_URL = None
+        mock_settings.SMS_SENDER_CONCURRENCY = 4
+        service = SMSChannelService()
+    with patch.object(SMSChannelService, '_sender_limiter', return_value=None):
+        yield service
+
+def _form(request):
+    from urllib.parse import parse_qs
+    return {k: v[0] for k, v in parse_qs(request["body"]).items()}
+
+@pytest.mark.asyncio
+async def test_sms_send_captures_message_status(sms_service, twilio_stub):
+    """Test that each recipient gets its own message and the Twilio sid/status are captured."""
+    recipients = [{"id": i, "phone_number": f"+1555123000{i}"} for i in range(6)]
+
+    response = await sms_service.send_notification(None, "Your code is 1234", recipients)
+
+    assert response["status"] == "success"
+    assert all(r["message_sid"] == "SM123" and r["provider_status"] == "queued" for r in response["successful_recipients"])
+    assert len(twilio_stub.requests) == 6
+    assert twilio_stub.requests[0]["path"] == "/2010-04-01/Accounts/AC123/Messages.json"
+    assert twilio_stub.requests[0]["headers"]["Authorization"].startswith("Basic ")
+    forms = [_form(r) for r in twilio_stub.requests]
+    assert sorted(f["To"] for f in forms) == sorted(r["phone_number"] for r in recipients)
+    assert {f["Body"] for f in forms} == {"Your code is 1234"}
+    # A recipient always goes out from the same sender number
+    senders = {f["To"]: f["From"] for f in forms}
+    await sms_service.send_notification(None, "Again", recipients)
+    assert {_form(r)["To"]: _form(r)["From"] for r in twilio_stub.requests[6:]} == senders
+
+@pytest.mark.asyncio
+async def test_sms_invalid_number_is_not_retried(sms_service, twilio_stub):
+    """Test that a rejected number fails on its own and is not retryable."""
+    twilio_stub.responses = [(400, {"code": 21211, "message": "Invalid 'To' Phone Number"}, {})]
+
+    response = await sms_service.send_notification(None, "Hello", [{"id": 1, "phone_number": "+1"}])
+
+    assert response["status"] == "error"
+    assert response["failed_recipients"][0]["failed_reason"] == "Twilio error 21211: Invalid 'To' Phone Number"
+    assert response["failed_recipients"][0]["retryable"] is False
+
+@pytest.mark.asyncio
+async def test_sms_throttled_send_is_retryable(sms_service, twilio_stub):
+    """Test that a 429 with a long Retry-After is handed back for a later retry."""
+    twilio_stub.responses = [(429, {"code": 20429, "message": "Too Many Requests"}, {"Retry-After": "60"})]
+
+    with pytest.raises(ChannelServiceException) as exc_info:
+        await sms_service.send_notification(None, "Hello", [{"id": 1, "phone_number": "+15551230000"}])
+
+    assert exc_info.value.retry_after == 60
+
+@pytest.mark.asyncio
+async def test_sms_paced_per_sender_number(sms_service, twilio_stub):
+    """Test that messages from one sender number are paced by its token bucket."""
+    import time
+    from app.services.outbound_limiter import OutboundLimiter
+    sms_service.sender_numbers = ["+15550000001"]
+    limiter = OutboundLimiter("twilio_number", "+15550000001", rate_per_second=10.0, burst=1, max_wait=5)
+    recipients = [{"id": i, "phone_number": f"+1555123000{i}"} for i in range(3)]
+
+    with patch.object(SMSChannelService, '_sender_limiter', return_value=limiter):
+        started = time.monotonic()
+        response = await sms_service.send_notification(None, "Hello", recipients)
+        elapsed = time.monotonic() - started
+
+    assert response["status"] == "success"
+    assert elapsed >= 0.15  # three sends at 10/s with a burst of one
+
+@pytest.mark.asyncio
+async def test_sms_throttling_backs_off_the_sender_number(sms_service, twilio_stub):
+    """Test that Twilio's throttling reaches the sender number's limiter, not just the account's."""
+    limiter = MagicMock()
+    limiter.slot.return_value.__aenter__ = AsyncMock()
+    limiter.slot.return_value.__aexit__ = AsyncMock(return_value=False)
+    recipient = {"id": 1, "phone_number": "+15551230000"}
+
+    with patch.object(SMSChannelService, '_sender_limiter', return_value=limiter):
+        await sms_service.send_notification(None, "Hello", [recipient])
+        limiter.record_success.assert_called_once()
+
+        twilio_stub.responses = [(429, {"code": 20429, "message": "Too Many Requests"}, {"Retry-After": "60"})]
+        with pytest.raises(ChannelServiceException):
+            await sms_service.send_notification(None, "Hello", [recipient])
+
+    assert limiter.record_failure.call_args.args[0].retry_after == 60
+
+@pytest.mark.asyncio
+async def test_sms_sender_slot_is_released_during_retry_backoff(sms_service, twilio_stub):
+    """Test that each attempt takes its own sender-number slot, so the backoff sleep holds none."""
+    events = []
+    limiter = MagicMock()
+    limiter.slot.return_value.__aenter__ = AsyncMock(side_effect=lambda *args: events.append("acquire"))
+    limiter.slot.return_value.__aexit__ = AsyncMock(side_effect=lambda *args: events.append("release"))
+    twilio_stub.responses = [
+        (503, {"code": 20503, "message": "Service Unavailable"}, {}),
+        (201, {"sid": "SM123", "status": "queued"}, {}),
+    ]
+
+    with patch.object(SMSChannelService, '_sender_limiter', return_value=limiter), \
+            patch('app.utils.retries.asyncio.sleep', new_callable=AsyncMock,
+                  side_effect=lambda *args: events.append("backoff")):
+        response = await sms_service.send_notification(None, "Hello", [{"id": 1, "phone_number": "+15551230000"}])
+
+    assert response["status"] == "success"
+    assert events == ["acquire", "release", "backoff", "acquire", "release"]
+    limiter.record_failure.assert_called_once()
+    limiter.record_success.assert_called_once()
+
+def test_sms_validate_recipients():
+    """Test that SMS recipients are identified by phone_number."""
+    service = SMSChannelService()
+    assert service.validate_recipients([{"phone_number": "+15551230000"}]) is True
+    assert service.validate_recipients([{"phone": "+15551230000"}]) is False
+
+# Tests for SMTPEmailChannelService and SendGrid -> SMTP failover
+@pytest.fixture
+def smtp_sink():
+    """Local SMTP sink."""
+    with StubSMTPServer() as sink:
+        yield sink
+
+@pytest.fixture
+def smtp_service(smtp_sink):
+    """Pytest fixture for an SMTPEmailChannelService pointed at the sink."""
+    with patch('app.services.channel_services.settings') as mock_settings:
+        mock_settings.SMTP_HOST = smtp_sink.host
+        mock_settings.SMTP_PORT = smtp_sink.port
+        mock_settings.SMTP_USER = "user"
+        mock_settings.SMTP_PASSWORD = "secret"
+        mock_settings.SMTP_USE_TLS = False
+        mock_settings.SMTP_FROM_EMAIL = "relay@example.com"
+        mock_settings.SMTP_POOL_SIZE = 2
+        mock_settings.SMTP_TIMEOUT = 5
+        mock_settings.SMTP_MAX_MESSAGES_PER_CONNECTION = 100
+        service = SMTPEmailChannelService()
+    yield service
+    service.pool.close()
+
+@pytest.fixture
+def failover_service(email_service, smtp_service):
+    """SendGrid (stand-in) email service failing over to the SMTP sink."""
+    with patch('app.services.channel_services.settings') as mock_settings:
+        mock_settings.SENDGRID_API_KEY = "test_api_key"
+        mock_settings.SENDGRID_FROM_EMAIL = "from@example.com"
+        mock_settings.SENDGRID_API_BASE_URL = email_service.transport.base_url
+        mock_settings.SENDGRID_MAX_PERSONALIZATIONS = 1000
+        mock_settings.EMAIL_BATCH_CONCURRENCY = 4
+        yield FailoverEmailChannelService(fallback=smtp_service)
+
+@pytest.mark.asyncio
+async def test_smtp_send_one_message_per_recipient(smtp_service, smtp_sink):
+    """Test that each recipient gets a private message over a reused, authenticated session."""
+    recipients = [{"id": i, "email": f"user{i}@example.com"} for i in range(5)]
+
+    response = await smtp_service.send_notification("Subject", "<p>Hi</p>", recipients)
+
+    assert response["status"] == "success"
+    assert sorted(m["rcpt_to"][0] for m in smtp_sink.messages) == sorted(r["email"] for r in recipients)
+    assert all(len(m["rcpt_to"]) == 1 for m in smtp_sink.messages)
+    assert smtp_sink.messages[0]["message"]["Subject"] == "Subject"
+    assert smtp_sink.connections <= 2
+    assert set(smtp_sink.logins) == {("user", "secret")}
+
+@pytest.mark.asyncio
+async def test_smtp_rejected_recipient_is_not_retried(smtp_service, smtp_sink):
+    """Test that a 5xx refusal fails only that recipient."""
+    smtp_sink.reject.add("bounced@example.com")
+    recipients = [{"id": 1, "email": "ok@example.com"}, {"id": 2, "email": "bounced@example.com"}]
+
+    with pytest.raises(PartialFailureException) as exc_info:
+        await smtp_service.send_notification("Subject", "Body", recipients)
+
+    assert [r["id"] for r in exc_info.value.successful_recipients] == [1]
+    assert exc_info.value.failed_recipients[0]["retryable"] is False
+
+@pytest.mark.asyncio
+async def test_failover_when_sendgrid_circuit_open(failover_service, sendgrid_stub, smtp_sink):
+    """Test that email goes straight to SMTP while the SendGrid circuit is open."""
+    with patch.object(failover_service.circuit_breaker, 'is_open', return_value=True):
+        response = await failover_service.send_notification("Subject", "Body", [{"id": 1, "email": "to@example.com"}])
+
+    assert response["status"] == "success"
+    assert sendgrid_stub.requests == []
+    assert smtp_sink.messages[0]["rcpt_to"] == ["to@example.com"]
+
+@pytest.mark.asyncio
+async def test_failover_when_sendgrid_throttles(failover_service, sendgrid_stub, smtp_sink):
+    """Test that a SendGrid 429 sends the batch over SMTP instead."""
+    sendgrid_stub.responses = [(429, "Too Many Requests", {"Retry-After": "120"})]
+
+    response = await failover_service.send_notification("Subject", "Body", [{"id": 1, "email": "to@example.com"}])
+
+    assert response["status"] == "success"
+    assert len(sendgrid_stub.requests) == 1
+    assert len(smtp_sink.messages) == 1
+
+@pytest.mark.asyncio
+async def test_failover_resends_only_throttled_chunks(failover_service, sendgrid_stub, smtp_sink):
+    """Test that recipients of a throttled chunk are resent over SMTP and the rest are kept."""
+    failover_service.batch_size = 1
+    failover_service.batch_concurrency = 1
+    sendgrid_stub.responses = [(202, "", {}), (429, "Too Many Requests", {"Retry-After": "120"})]
+    recipients = [{"id": 1, "email": "a@example.com"}, {"id": 2, "email": "b@example.com"}]
+
+    response = await failover_service.send_notification("Subject", "Body", recipients)
+
+    assert response["status"] == "success"
+    assert [r["id"] for r in response["successful_recipients"]] == [1, 2]
+    assert [m["rcpt_to"] for m in smtp_sink.messages] == [["b@example.com"]]
+
+@pytest.mark.asyncio
+async def test_no_failover_for_rejected_request(failover_service, sendgrid_stub, smtp_sink):
+    """Test that a request SendGrid rejects outright is not resent over SMTP."""
+    sendgrid_stub.responses = [(400, "Bad request", {})]
+
+    response = await failover_service.send_notification("Subject", "Body", [{"id": 1, "email": "to@example.com"}])
+
+    assert response["status"] == "error"
+    assert smtp_sink.messages == []
+
+@pytest.mark.asyncio
+async def test_failover_send_is_recorded_once(failover_service, sendgrid_stub, smtp_sink):
+    """Test that a send that fails over to SMTP is counted and traced once, as the failover service's."""
+    from prometheus_client import REGISTRY
+
+    def sends(provider):
+        return REGISTRY.get_sample_value("channel_send_duration_seconds_count", {
+            "channel": "email", "provider": provider, "outcome": "success"
+        }) or 0
+
+    providers = ("FailoverEmailChannelService", "EmailChannelService", "SMTPEmailChannelService")
+    before = {provider: sends(provider) for provider in providers}
+    sendgrid_stub.responses = [(429, "Too Many Requests", {"Retry-After": "120"})]
+
+    await failover_service.send_notification("Subject", "Body", [{"id": 1, "email": "to@example.com"}])
+
+    assert {provider: sends(provider) - before[provider] for provider in providers} == {
+        "FailoverEmailChannelService": 1, "EmailChannelService": 0, "SMTPEmailChannelService": 0,
+    }
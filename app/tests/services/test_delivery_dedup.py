@@ -0,0 +1,40 @@
+import pytest
+import fakeredis
+import redis
+from unittest.mock import MagicMock
+from app.services.delivery_dedup import DeliveryDeduplicator
+
+
+@pytest.fixture
+def deduplicator():
+    """Pytest fixture for a DeliveryDeduplicator backed by an in-memory Redis."""
+    dedup = DeliveryDeduplicator(ttl_seconds=60)
+    dedup.redis = fakeredis.FakeRedis(decode_responses=True)
+    return dedup
+
+
+def test_filter_undelivered_skips_marked_recipients(deduplicator):
+    """Test that recipients marked as delivered are filtered out."""
+    recipients = [{"id": 1, "email": "a@example.com"}, {"id": 2, "email": "b@example.com"}]
+    deduplicator.mark_delivered("notif-1", recipients[:1])
+
+    assert deduplicator.filter_undelivered("notif-1", recipients) == recipients[1:]
+    assert deduplicator.filter_undelivered("notif-2", recipients) == recipients
+
+
+def test_markers_fall_back_to_address_and_expire(deduplicator):
+    """Test that recipients without an id are keyed by address and markers get a TTL."""
+    recipient = {"id": None, "phone_number": "+15551112222"}
+    deduplicator.mark_delivered("notif-1", [recipient])
+
+    assert deduplicator.filter_undelivered("notif-1", [recipient]) == []
+    assert 0 < deduplicator.redis.ttl("delivered:notif-1:+15551112222") <= 60
+
+
+def test_filter_undelivered_fails_open(deduplicator):
+    """Test that a Redis outage sends to everyone instead of dropping the notification."""
+    deduplicator.redis = MagicMock()
+    deduplicator.redis.mget.side_effect = redis.ConnectionError("down")
+    recipients = [{"id": 1, "email": "a@example.com"}]
+
+    assert deduplicator.filter_undelivered("notif-1", recipients) == recipients
@@ -0,0 +1,143 @@
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.core.auth import create_service_token
+from app.db.nosql.log_store import MongoDeliveryLogStore, SQLiteDeliveryLogStore
+from app.db.nosql.models import LogChannel, LogQuery, LogStatus, NotificationLogEntry
+from app.main import app
+from app.services.delivery_log import DeliveryEventLog, delivery_log
+
+
+def _entry(notification_id="n1", status=LogStatus.SENT, channel=LogChannel.EMAIL, minutes_ago=0, **fields):
+    return NotificationLogEntry(
+        notification_id=notification_id, channel=channel, status=status, message=f"{status.value}",
+        timestamp=datetime.now(timezone.utc) - timedelta(minutes=minutes_ago), **fields,
+    )
+
+
+@pytest.fixture
+def store():
+    store = SQLiteDeliveryLogStore(":memory:")
+    store.ensure_indexes()
+    yield store
+    store.close()
+
+
+def test_sqlite_store_filters_and_orders_newest_first(store):
+    """Test that LogQuery filters, time range and pagination are applied, newest first."""
+    store.insert_many([
+        _entry("n1", minutes_ago=3, recipient_id=1),
+        _entry("n1", LogStatus.FAILED, minutes_ago=2, recipient_id=2, error_message="bounced"),
+        _entry("n1", minutes_ago=1, recipient_id=3, response_data={"code": 202}),
+        _entry("n2", channel=LogChannel.SMS, minutes_ago=1),
+    ])
+
+    entries = store.query(LogQuery(notification_id="n1"))
+    assert [e.recipient_id for e in entries] == [3, 2, 1]
+    assert entries[0].response_data == {"code": 202}
+
+    assert [e.error_message for e in store.query(LogQuery(status=LogStatus.FAILED))] == ["bounced"]
+    assert [e.notification_id for e in store.query(LogQuery(channel=LogChannel.SMS))] == ["n2"]
+    recent = LogQuery(notification_id="n1", start_date=datetime.now(timezone.utc) - timedelta(minutes=2, seconds=30))
+    assert [e.recipient_id for e in store.query(recent)] == [3, 2]
+    assert [e.recipient_id for e in store.query(LogQuery(notification_id="n1", limit=1, offset=1))] == [2]
+
+
+def test_sqlite_store_queries_use_indexes(store):
+    """Test that the common LogQuery shapes are served by an index rather than a table scan."""
+    plans = {
+        "notification_id": "SELECT * FROM delivery_events WHERE notification_id = 'n1' ORDER BY timestamp DESC",
+        "channel_status": "SELECT * FROM delivery_events WHERE channel = 'sms' AND status = 'failed' "
+                          "AND timestamp >= 0 ORDER BY timestamp DESC",
+    }
+    for name, sql in plans.items():
+        plan = " ".join(row[-1] for row in store.connection.execute(f"EXPLAIN QUERY PLAN {sql}"))
+        assert "USING INDEX" in plan, (name, plan)
+
+
+def test_mongo_store_builds_filters_and_documents():
+    """Test that events are stored with plain enum values and queries filter on indexed fields."""
+    store = MongoDeliveryLogStore()
+    collection = MagicMock()
+    store._client = MagicMock()
+    store._client.__getitem__.return_value.__getitem__.return_value = collection
+
+    store.insert_many([_entry("n1", recipient_id=7)])
+    document = collection.insert_many.call_args.args[0][0]
+    assert (document["channel"], document["status"], document["recipient_id"]) == ("email", "sent", 7)
+    assert document["timestamp"].tzinfo is not None
+
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    store.query(LogQuery(notification_id="n1", status=LogStatus.FAILED, start_date=start, limit=10))
+    filters = collection.find.call_args.args[0]
+    assert filters == {"notification_id": "n1", "status": "failed", "timestamp": {"$gte": start}}
+    collection.find.return_value.sort.assert_called_once_with("timestamp", -1)
+
+
+def test_emit_never_blocks_on_a_slow_store():
+    """Test that events are queued while the store is slow and dropped once the buffer is full."""
+    store = MagicMock()
+    store.insert_many.side_effect = lambda entries: time.sleep(0.2)
+    log = DeliveryEventLog(store_factory=lambda: store, batch_size=10, flush_interval=0.01, buffer_size=2)
+    dropped = REGISTRY.get_sample_value("delivery_log_events_total", {"result": "dropped"}) or 0.0
+
+    started = time.perf_counter()
+    for i in range(20):
+        log.emit("n1", "email", LogStatus.SENT, "Sent", recipient_id=i)
+    assert time.perf_counter() - started < 0.1
+
+    assert REGISTRY.get_sample_value("delivery_log_events_total", {"result": "dropped"}) > dropped
+    log.close()
+
+
+def test_events_are_written_in_batches():
+    """Test that the writer bulk-inserts at most batch_size events per call and close() writes the rest."""
+    store = MagicMock()
+    log = DeliveryEventLog(store_factory=lambda: store, batch_size=3, flush_interval=0.05)
+
+    log.record_outcomes("n1", "sms", [{"id": i, "message_sid": f"SM{i}"} for i in range(5)],
+                        [{"id": 9, "failed_reason": "unreachable"}], attempt=1)
+    log.close()
+
+    batches = [call.args[0] for call in store.insert_many.call_args_list]
+    entries = [entry for batch in batches for entry in batch]
+    assert all(len(batch) <= 3 for batch in batches)
+    assert len(entries) == 6
+    assert entries[0].external_id == "SM0"
+    assert (entries[-1].status, entries[-1].error_message, entries[-1].retry_count) == (LogStatus.FAILED, "unreachable", 1)
+    store.ensure_indexes.assert_called_once()
+    store.close.assert_called_once()
+
+
+def test_retry_events_use_each_recipients_channel():
+    """Test that retries of a multi-channel payload are logged under each recipient's channel."""
+    store = MagicMock()
+    log = DeliveryEventLog(store_factory=lambda: store)
+
+    log.record_retry("n1", "all", [{"id": 1, "email": "a@example.com"}, {"id": 2, "phone_number": "+1555"}], 2, 4)
+    log.record_retry("n1", "all", [{"id": 1, "email": "a@example.com"}], 4, None)
+    log.close()
+
+    entries = [entry for call in store.insert_many.call_args_list for entry in call.args[0]]
+    assert [(e.channel, e.status) for e in entries] == [
+        (LogChannel.EMAIL, LogStatus.RETRY), (LogChannel.SMS, LogStatus.RETRY), (LogChannel.EMAIL, LogStatus.FAILED),
+    ]
+
+
+def test_logs_endpoint_serves_log_query():
+    """Test that the API answers LogQuery parameters from the event log."""
+    delivery_log.record_outcomes("api-n1", "email", [{"id": 1}], [{"id": 2, "failed_reason": "bounced"}])
+    delivery_log.flush()
+    token = create_service_token(service_id="logs-test", scope=["notifications:read"]).access_token
+    client = TestClient(app)
+
+    response = client.get("/api/v1/logs/", params={"notification_id": "api-n1", "status": "failed"},
+                          headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert [(e["recipient_id"], e["error_message"]) for e in response.json()] == [(2, "bounced")]
+    assert client.get("/api/v1/logs/", params={"limit": 5000},
+                      headers={"Authorization": f"Bearer {token}"}).status_code == 422
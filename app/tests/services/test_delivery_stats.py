@@ -0,0 +1,114 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+from app.core.auth import create_service_token
+from app.db.nosql.models import LogChannel, LogStatus, NotificationLogEntry
+from app.db.sql.instrumentation import record_queries
+from app.main import app
+from app.services.delivery_log import DeliveryEventLog, delivery_log
+from app.services.delivery_stats import DeliveryStats, delivery_stats, parse_period
+
+NOW = datetime(2026, 3, 2, 12, 30, 15, tzinfo=timezone.utc)
+
+
+def _entry(recipient_id, status=LogStatus.SENT, channel=LogChannel.EMAIL, ago=timedelta(), final=True):
+    return NotificationLogEntry(notification_id="n1", recipient_id=recipient_id, channel=channel, status=status,
+                                message=status.value, timestamp=NOW - ago, final=final)
+
+
+def test_parse_period():
+    """Test that periods are minutes, hours or days and never zero."""
+    assert parse_period("15m") == timedelta(minutes=15)
+    assert parse_period("7d") == timedelta(days=7)
+    for value in ("0h", "1w", "h", "-1h"):
+        with pytest.raises(ValueError):
+            parse_period(value)
+
+
+def test_rollups_answer_minute_and_hour_periods():
+    """Test that counts are summed from minute buckets for short periods and hour buckets for long ones."""
+    stats = DeliveryStats()
+    stats.record([
+        _entry(1), _entry(2), _entry(2, LogStatus.FAILED),
+        _entry(3, channel=LogChannel.SMS, ago=timedelta(minutes=20)),
+        _entry(4, LogStatus.RETRY, channel=LogChannel.SMS, ago=timedelta(hours=5)),
+    ])
+    now = NOW.timestamp()
+
+    recent = stats.stats(parse_period("5m"), "5m", now=now)
+    assert (recent.total_logs, recent.success_count, recent.failure_count) == (3, 2, 1)
+    assert recent.channel_breakdown == {"email": 3}
+    assert recent.status_breakdown == {"sent": 2, "failed": 1}
+    assert recent.unique_recipients == 2
+    assert recent.time_period == "5m"
+
+    day = stats.stats(parse_period("1d"), now=now)
+    assert day.total_logs == 5
+    assert day.channel_breakdown == {"email": 3, "sms": 2}
+    assert day.status_breakdown == {"sent": 3, "failed": 1, "retry": 1}
+    assert day.unique_recipients == 4
+
+
+def test_failures_count_recipients_not_attempts():
+    """Test that a recipient failing twice and then dead-lettered is one failure, not three."""
+    stats = DeliveryStats()
+    log = DeliveryEventLog(store_factory=lambda: None, stats=stats)
+    for attempt in range(2):
+        log.record_outcomes("n1", "sms", [], [{"id": 7, "failed_reason": "timeout", "retryable": True}], attempt)
+        log.record_retry("n1", "sms", [{"id": 7}], attempt + 1, 1)
+    log.record_retry("n1", "sms", [{"id": 7}], 3, None)
+    log.record_outcomes("n1", "sms", [{"id": 8}], [{"id": 9, "failed_reason": "invalid", "retryable": False}])
+    log.close()
+
+    summary = stats.stats(parse_period("5m"))
+    assert summary.failure_count == 2
+    assert summary.success_count == 1
+    assert summary.status_breakdown == {"failed": 4, "retry": 2, "sent": 1}
+
+
+def test_rollup_keys_expire():
+    """Test that minute and hour buckets carry their retention TTLs."""
+    stats = DeliveryStats()
+    stats.record([_entry(1)])
+
+    ttls = {key: stats.redis.ttl(key) for key in stats.redis.keys("stats:*")}
+    assert len(ttls) == 4  # counts and recipients, per minute and per hour
+    assert all(ttl > 0 for ttl in ttls.values())
+
+
+def test_event_log_updates_rollups_even_when_the_store_fails():
+    """Test that each written batch feeds the rollups, independently of the event store."""
+    store = MagicMock()
+    store.insert_many.side_effect = RuntimeError("store down")
+    stats = MagicMock()
+    log = DeliveryEventLog(store_factory=lambda: store, stats=stats)
+
+    log.record_outcomes("n1", "email", [{"id": 1}], [{"id": 2, "failed_reason": "bounced"}])
+    log.close()
+
+    entries = [entry for call in stats.record.call_args_list for entry in call.args[0]]
+    assert [(e.recipient_id, e.status) for e in entries] == [(1, LogStatus.SENT), (2, LogStatus.FAILED)]
+
+
+def test_stats_endpoint_reads_rollups_without_sql():
+    """Test that the stats endpoint is served from Redis and runs no SQL."""
+    delivery_log.record_outcomes("stats-n1", "sms", [{"id": 1}, {"id": 2}],
+                                [{"id": 3, "failed_reason": "x", "retryable": False}])
+    delivery_log.flush()
+    token = create_service_token(service_id="stats-test", scope=["notifications:read"]).access_token
+    client = TestClient(app)
+
+    with record_queries() as recorder:
+        response = client.get("/api/v1/logs/stats", params={"period": "15m"},
+                              headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total_logs"], body["success_count"], body["failure_count"]) == (3, 2, 1)
+    assert body["channel_breakdown"] == {"sms": 3}
+    assert body["unique_recipients"] == 3
+    assert recorder.count == 0
+    for period in ("1w", "0m", "90d"):
+        assert client.get("/api/v1/logs/stats", params={"period": period},
+                          headers={"Authorization": f"Bearer {token}"}).status_code == 422
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from app.main import app
+from app.services import health
+from app.services.health import HealthMonitor, RabbitMQProbe, check_database
+
+
+def _broken():
+    raise ConnectionError("connection refused")
+
+
+@pytest.mark.asyncio
+async def test_check_now_caches_results():
+    """Test that each dependency's status, error and latency are cached."""
+    monitor = HealthMonitor({"redis": lambda: {}, "rabbitmq": _broken}, interval=60, timeout=1)
+
+    await monitor.check_now()
+
+    assert monitor.results["redis"]["status"] == "up"
+    assert monitor.results["rabbitmq"]["status"] == "down"
+    assert monitor.results["rabbitmq"]["error"] == "connection refused"
+    assert "latency_ms" in monitor.results["redis"]
+
+
+@pytest.mark.asyncio
+async def test_check_times_out_as_down():
+    """Test that a hanging dependency is reported down after the check timeout."""
+    monitor = HealthMonitor({"database": lambda: time.sleep(1) or {}}, interval=60, timeout=0.1)
+
+    await monitor.check_now()
+
+    assert monitor.results["database"]["status"] == "down"
+    assert monitor.results["database"]["error"] == "timed out after 0.1s"
+
+
+@pytest.mark.asyncio
+async def test_readiness_reports_queue_depth_and_failures():
+    """Test that readiness fails on a down dependency and reports queue depth."""
+    depths = {"notifications": 12, "notifications.dead_letter": 0}
+    monitor = HealthMonitor({"redis": _broken, "rabbitmq": lambda: {"queue_depth": depths}}, interval=60, timeout=1)
+    await monitor.check_now()
+
+    with patch.object(health, "database_pool_stats", return_value=None):
+        readiness = monitor.readiness()
+
+    assert readiness["ready"] is False
+    assert readiness["reasons"] == ["redis down"]
+    assert readiness["queue_depth"] == depths
+
+
+@pytest.mark.asyncio
+async def test_readiness_fails_on_pool_saturation():
+    """Test that a replica whose DB pool is nearly exhausted reports not ready."""
+    monitor = HealthMonitor({"redis": lambda: {}}, interval=60, timeout=1)
+    await monitor.check_now()
+    pool = {"checked_out": 14, "capacity": 15, "saturation": 0.933}
+
+    with patch.object(health, "database_pool_stats", return_value=pool):
+        readiness = monitor.readiness()
+
+    assert readiness["ready"] is False
+    assert readiness["db_pool"] == pool
+    assert readiness["reasons"] == ["database pool saturation 0.933"]
+
+
+def test_readiness_without_monitor_checks_only_the_pool():
+    """Test that a disabled monitor doesn't leave the replica unready forever."""
+    monitor = HealthMonitor({"redis": lambda: {}}, interval=60, timeout=1)
+
+    with patch.object(health, "database_pool_stats", return_value=None), \
+         patch.object(health.settings, "HEALTH_MONITOR_ENABLED", False):
+        assert monitor.readiness()["ready"] is True
+    with patch.object(health, "database_pool_stats", return_value=None):
+        assert monitor.readiness()["reasons"] == ["dependencies not checked yet"]
+
+
+@pytest.mark.asyncio
+async def test_rabbitmq_probe_skips_round_while_previous_is_in_flight():
+    """Test that a round timed out on one thread never shares the connection with the next round."""
+    release = threading.Event()
+    probe = RabbitMQProbe(queues=["notifications"])
+    channel = MagicMock(is_closed=False)
+    channel.queue_declare.side_effect = lambda **kwargs: release.wait(5) and MagicMock(method=MagicMock(message_count=3))
+    probe._connection, probe._channel = MagicMock(is_closed=False), channel
+    monitor = HealthMonitor({"rabbitmq": probe}, interval=60, timeout=0.1)
+
+    await monitor.check_now()
+    assert monitor.results["rabbitmq"]["error"] == "timed out after 0.1s"
+    await monitor.check_now()
+    assert monitor.results["rabbitmq"]["error"] == "previous check still in progress"
+    assert channel.queue_declare.call_count == 1
+
+    release.set()
+    await asyncio.sleep(0.05)
+    await monitor.check_now()
+    assert monitor.results["rabbitmq"]["queue_depth"] == {"notifications": 3}
+
+
+def test_check_database_does_not_wait_on_exhausted_pool(tmp_path):
+    """Test that the probe reports an exhausted pool instead of queueing for a connection."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'health.db'}", pool_size=1, max_overflow=0, pool_timeout=5)
+    held = engine.connect()
+    with patch("app.db.sql.connection.get_engine", return_value=engine), \
+         patch.object(health.settings, "DB_MAX_OVERFLOW", 0):
+        started = time.monotonic()
+        result = check_database()
+
+    assert time.monotonic() - started < 1
+    assert result["status"] == "saturated"
+    assert result["pool"] == {"checked_out": 1, "capacity": 1, "saturation": 1.0}
+    held.close()
+    engine.dispose()
+
+
+def test_ready_and_deep_health_endpoints():
+    """Test that the probes answer from the cached results."""
+    client = TestClient(app)
+    up = {"status": "up", "latency_ms": 1.0}
+    down = {"status": "down", "error": "connection refused", "latency_ms": 2.0}
+
+    app.state.ready = False
+    assert client.get("/ready").status_code == 503
+
+    app.state.ready = True
+    with patch.object(health.health_monitor, "results", {"database": up, "redis": up, "rabbitmq": up}), \
+         patch.object(health, "database_pool_stats", return_value=None):
+        assert client.get("/ready").status_code == 200
+        assert client.get("/health/deep").json()["status"] == "healthy"
+
+    with patch.object(health.health_monitor, "results", {"database": up, "redis": down, "rabbitmq": up}), \
+         patch.object(health, "database_pool_stats", return_value=None):
+        assert client.get("/ready").json()["reasons"] == ["redis down"]
+        response = client.get("/health/deep")
+        assert response.status_code == 503
+        assert response.json()["checks"]["redis"]["error"] == "connection refused"
+    app.state.ready = False
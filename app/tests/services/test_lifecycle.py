@@ -0,0 +1,90 @@
+import threading
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from app.core.rate_limiter import TOKEN_BUCKET_SCRIPT
+from app.core.redis_client import get_redis_client
+from app.main import app
+from app.services import lifecycle
+from app.utils.circuit_breakers import ACQUIRE_SCRIPT, RECORD_SCRIPT
+
+
+@pytest.mark.asyncio
+async def test_warm_up_reports_each_step():
+    """Test that warm-up runs every step and reports failures without raising."""
+    def broken():
+        raise ConnectionError("connection refused")
+
+    results = await lifecycle.warm_up({"ok": lambda: None, "broken": broken})
+
+    assert results == {"ok": None, "broken": "connection refused"}
+
+
+@pytest.mark.asyncio
+async def test_warm_up_bounds_slow_steps():
+    """Test that a hanging dependency delays startup by at most the step timeout."""
+    started = time.monotonic()
+    results = await lifecycle.warm_up({"slow": lambda: time.sleep(1), "ok": lambda: None}, timeout=0.1)
+
+    assert time.monotonic() - started < 0.9
+    assert results["slow"] == "timed out after 0.1s"
+    assert results["ok"] is None
+
+
+@pytest.mark.asyncio
+async def test_warm_publisher_connects_on_the_loop_thread():
+    """Test that the publisher's connection is opened on the thread that publishes with it."""
+    from app.services.rabbitmq_publisher import publisher
+    threads = []
+
+    with patch.object(publisher, "connect", side_effect=lambda timeout: threads.append(threading.get_ident())):
+        results = await lifecycle.warm_up({"rabbitmq": lifecycle.warm_publisher})
+
+    assert results == {"rabbitmq": None}
+    assert threads == [threading.get_ident()]
+
+
+def test_warm_redis_preloads_lua_scripts():
+    """Test that every Lua script is cached server-side, so first calls run by EVALSHA."""
+    client = get_redis_client()
+    client.script_flush()
+    shas = [client.register_script(script).sha for script in (TOKEN_BUCKET_SCRIPT, ACQUIRE_SCRIPT, RECORD_SCRIPT)]
+    assert client.script_exists(*shas) == [False, False, False]
+
+    lifecycle.warm_redis()
+
+    assert client.script_exists(*shas) == [True, True, True]
+
+
+def test_warm_database_opens_minimum_connections(tmp_path):
+    """Test that warm-up leaves DB_POOL_MIN_CONNECTIONS open connections in the pool."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'warmup.db'}", pool_size=5)
+    with patch("app.db.sql.connection.get_engine", return_value=engine), \
+         patch.object(lifecycle.settings, "DB_POOL_MIN_CONNECTIONS", 3):
+        lifecycle.warm_database()
+
+    assert engine.pool.checkedin() == 3
+    assert engine.pool.checkedout() == 0
+    engine.dispose()
+
+
+def test_lifespan_is_ready_only_after_warm_up():
+    """Test that the app reports ready once warm-up finishes and tears down on exit."""
+    states = []
+
+    async def warm_up():
+        states.append(app.state.ready)
+        return {"database": None, "rabbitmq": "connection refused"}
+
+    with patch("app.main.warm_up", side_effect=warm_up), \
+         patch("app.main.shut_down", new_callable=AsyncMock) as shut_down:
+        with TestClient(app):
+            assert states == [False]
+            assert app.state.ready is True
+            assert app.state.warmup["rabbitmq"] == "connection refused"
+            shut_down.assert_not_called()
+
+    shut_down.assert_awaited_once()
+    assert app.state.ready is False
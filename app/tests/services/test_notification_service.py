@@ -1,8 +1,10 @@
+import asyncio
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
 from app.services.notification_service import NotificationService
 from app.api.schemas import NotificationCreate, Priority, Channel, Status
 from app.db.sql.models import Notification
+from app.utils.exceptions import PartialFailureException
 import uuid
 from datetime import datetime, timezone, timedelta
 
@@ -21,6 +23,9 @@ def notification_service(mock_db_session):
         service.notification_repository = MockRepository()
         service.recipient_resolver = MockResolver()
         service.validator = MockValidator()
+        service.deduplicator = MagicMock()
+        service.deduplicator.filter_undelivered.side_effect = lambda notification_id, recipients: recipients
+        service.delivery_log = MagicMock()
         yield service
 
 
@@ -223,3 +228,210 @@ async def test_create_notification_fails(notification_service, mock_db_session):
         await notification_service.create_notification(request)
     
     mock_db_session.rollback.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_process_notification_tracks_recipients(notification_service, mock_db_session):
+    """
+    Test that per-recipient outcomes are written in bulk and the parent status
+    is derived from the aggregate counts.
+    """
+    payload = {
+        "id": "notif-1",
+        "subject": "Subject",
+        "content": "Content",
+        "channel": Channel.EMAIL.value,
+        "recipients": [{"id": 1, "email": "a@example.com"}, {"id": 2, "email": "b@example.com"}],
+    }
+    email_service = MagicMock()
+    email_service.validate_recipients.return_value = True
+    email_service.send_notification = AsyncMock(return_value={"status": "success"})
+    repository = notification_service.notification_repository
+    repository.get_recipient_status_counts.return_value = {Status.SENT: 2}
+
+    with patch('app.services.notification_service.ChannelServiceFactory.create_service', return_value=email_service):
+        await notification_service.process_notification(payload)
+
+    repository.bulk_update_recipient_status.assert_called_once_with([1, 2], Status.SENT)
+    notification_service.deduplicator.mark_delivered.assert_called_once_with("notif-1", payload["recipients"])
+    repository.update_notification_status.assert_called_once_with("notif-1", Status.SENT)
+    mock_db_session.commit.assert_called_once()
+    notification_service.delivery_log.record_outcomes.assert_called_once_with(
+        "notif-1", "email", payload["recipients"], [], attempt=0
+    )
+
+@pytest.mark.asyncio
+async def test_process_notification_records_failed_batch(notification_service):
+    """
+    Test that a failing channel send marks its recipients FAILED with the reason.
+    """
+    payload = {
+        "id": "notif-2",
+        "subject": "Subject",
+        "content": "Content",
+        "channel": Channel.EMAIL.value,
+        "recipients": [{"id": 3, "email": "a@example.com"}],
+    }
+    email_service = MagicMock()
+    email_service.validate_recipients.return_value = True
+    email_service.send_notification = AsyncMock(side_effect=Exception("provider down"))
+    repository = notification_service.notification_repository
+    repository.get_recipient_status_counts.return_value = {Status.FAILED: 1}
+
+    with patch('app.services.notification_service.ChannelServiceFactory.create_service', return_value=email_service):
+        with pytest.raises(PartialFailureException) as exc_info:
+            await notification_service.process_notification(payload)
+
+    repository.bulk_fail_recipients.assert_called_once_with({3: "provider down"})
+    repository.update_notification_status.assert_called_once_with("notif-2", Status.FAILED)
+    assert [r["id"] for r in exc_info.value.failed_recipients] == [3]
+
+def test_derive_notification_status():
+    """Test parent status derivation from recipient counts."""
+    derive = NotificationService._derive_notification_status
+    assert derive({Status.SENT: 3}) == Status.SENT
+    assert derive({Status.SENT: 1, Status.FAILED: 2}) == Status.SENT
+    assert derive({Status.FAILED: 2}) == Status.FAILED
+    assert derive({Status.SENT: 1, Status.PENDING: 1}) == Status.PROCESSING
+
+@pytest.mark.asyncio
+async def test_process_notification_partial_failure(notification_service):
+    """
+    Test that a partial failure records both outcomes and carries only the
+    retryable failed recipients on the raised exception.
+    """
+    ok = {"id": 1, "email": "ok@example.com"}
+    throttled = {"id": 2, "email": "throttled@example.com"}
+    bounced = {"id": 3, "email": "bounced@example.com"}
+    payload = {
+        "id": "notif-3",
+        "subject": "Subject",
+        "content": "Content",
+        "channel": Channel.EMAIL.value,
+        "recipients": [ok, throttled, bounced],
+    }
+    email_service = MagicMock()
+    email_service.validate_recipients.return_value = True
+    email_service.send_notification = AsyncMock(side_effect=PartialFailureException(
+        [ok],
+        [
+            {**throttled, "failed_reason": "429", "retryable": True},
+            {**bounced, "failed_reason": "bounced", "retryable": False},
+        ],
+    ))
+    repository = notification_service.notification_repository
+    repository.get_recipient_status_counts.return_value = {Status.SENT: 1, Status.FAILED: 2}
+
+    with patch('app.services.notification_service.ChannelServiceFactory.create_service', return_value=email_service):
+        with pytest.raises(PartialFailureException) as exc_info:
+            await notification_service.process_notification(payload)
+
+    repository.bulk_update_recipient_status.assert_any_call([1], Status.SENT)
+    repository.bulk_fail_recipients.assert_called_once_with({2: "429", 3: "bounced"})
+    notification_service.deduplicator.mark_delivered.assert_called_once_with("notif-3", [ok])
+    assert [r["id"] for r in exc_info.value.failed_recipients] == [2]
+
+@pytest.mark.asyncio
+async def test_process_notification_skips_delivered_recipients(notification_service):
+    """
+    Test that recipients with a delivery marker are not sent to again.
+    """
+    delivered = {"id": 1, "email": "done@example.com"}
+    pending = {"id": 2, "email": "pending@example.com"}
+    payload = {
+        "id": "notif-4",
+        "subject": "Subject",
+        "content": "Content",
+        "channel": Channel.EMAIL.value,
+        "recipients": [delivered, pending],
+    }
+    notification_service.deduplicator.filter_undelivered.side_effect = None
+    notification_service.deduplicator.filter_undelivered.return_value = [pending]
+    email_service = MagicMock()
+    email_service.validate_recipients.return_value = True
+    email_service.send_notification = AsyncMock(return_value={"status": "success"})
+    notification_service.notification_repository.get_recipient_status_counts.return_value = {Status.SENT: 2}
+
+    with patch('app.services.notification_service.ChannelServiceFactory.create_service', return_value=email_service):
+        await notification_service.process_notification(payload)
+
+    email_service.send_notification.assert_awaited_once_with("Subject", "Content", [pending])
+
+@pytest.mark.asyncio
+async def test_create_notification_groups_recipients_by_channel(notification_service):
+    """Test that the published payload carries recipients already partitioned by channel."""
+    request = NotificationCreate(
+        user_ids=[1],
+        emails=[],
+        sms_numbers=[],
+        priority=Priority.HIGH,
+        channel=Channel.ALL,
+        subject="Test Subject",
+        content="Test Content"
+    )
+    notification_service.validator.validate_request.return_value = []
+    notification_service.recipient_resolver.resolve_recipients.side_effect = [
+        [{'user_id': 1, 'email': 'test@example.com'}],
+        [],
+        [{'user_id': 1, 'push_token': 'some_token'}],
+    ]
+    notification_service.notification_repository.create_notification.return_value = Notification(
+        id=str(uuid.uuid4()), status=Status.QUEUED, created_at=datetime.now(timezone.utc)
+    )
+    notification_service.notification_repository.create_recipients.return_value = [MagicMock(id=10), MagicMock(id=11)]
+
+    with patch('app.services.rabbitmq_publisher.publisher') as mock_publisher:
+        await notification_service.create_notification(request)
+
+    payload = mock_publisher.publish.call_args.args[0]
+    assert "recipients" not in payload
+    assert payload["recipients_by_channel"] == {
+        "email": [{'user_id': 1, 'email': 'test@example.com', 'id': 10}],
+        "push": [{'user_id': 1, 'push_token': 'some_token', 'id': 11}],
+    }
+
+@pytest.mark.asyncio
+async def test_process_notification_fans_out_channels_concurrently(notification_service):
+    """
+    Test that channels are sent at the same time and one channel's failure
+    does not affect the others.
+    """
+    email = {"id": 1, "email": "a@example.com"}
+    sms = {"id": 2, "phone_number": "+15550001111"}
+    push = {"id": 3, "push_token": "token"}
+    payload = {
+        "id": "notif-5",
+        "subject": "Subject",
+        "content": "Content",
+        "channel": Channel.ALL.value,
+        "recipients_by_channel": {"email": [email], "sms": [sms], "push": [push]},
+    }
+    push_sent = asyncio.Event()
+
+    async def slow_email(subject, content, recipients):
+        # Only finishes if push was sent while email was still in flight
+        await asyncio.wait_for(push_sent.wait(), timeout=1)
+        raise Exception("email provider down")
+
+    async def send_push(subject, content, recipients):
+        push_sent.set()
+        return {"status": "success"}
+
+    services = {}
+    for channel, send in ((Channel.EMAIL, slow_email), (Channel.PUSH, send_push),
+                          (Channel.SMS, AsyncMock(side_effect=ValueError("twilio misconfigured")))):
+        service = MagicMock()
+        service.validate_recipients.return_value = True
+        service.send_notification = send
+        services[channel] = service
+    repository = notification_service.notification_repository
+    repository.get_recipient_status_counts.return_value = {Status.SENT: 1, Status.FAILED: 2}
+
+    with patch('app.services.notification_service.ChannelServiceFactory.create_service', side_effect=services.get):
+        with pytest.raises(PartialFailureException) as exc_info:
+            await notification_service.process_notification(payload)
+
+    repository.bulk_update_recipient_status.assert_any_call([3], Status.SENT)
+    repository.bulk_fail_recipients.assert_any_call({1: "email provider down"})
+    repository.bulk_fail_recipients.assert_any_call({2: "twilio misconfigured"})
+    assert exc_info.value.successful_recipients == [push]
+    assert {r["id"] for r in exc_info.value.failed_recipients} == {1, 2}
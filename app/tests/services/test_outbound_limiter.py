@@ -0,0 +1,95 @@
+import time
+import pytest
+from app.services.outbound_limiter import AIMDConcurrencyLimiter, OutboundLimiter, outbound_limited
+from app.utils.exceptions import ChannelServiceException, OutboundRateLimitException
+
+
+def make_limiter(rate=10.0, burst=2, max_wait=5.0):
+    return OutboundLimiter("testprovider", "acct", rate_per_second=rate, burst=burst,
+                           min_concurrency=1, max_concurrency=8, max_wait=max_wait)
+
+
+def test_aimd_decreases_on_throttle_and_recovers():
+    limiter = AIMDConcurrencyLimiter(min_limit=1, max_limit=8, decrease_cooldown=0)
+    limiter.on_throttle()
+    assert int(limiter.limit) == 4
+    limiter.on_throttle()
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert int(limiter.limit) == 1  # never below min_limit
+
+    for _ in range(10):
+        limiter.on_success()
+    assert 1 < limiter.limit <= 8
+
+
+def test_aimd_decrease_cooldown():
+    limiter = AIMDConcurrencyLimiter(min_limit=1, max_limit=8, decrease_cooldown=60)
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert int(limiter.limit) == 4
+
+
+def test_token_bucket_shared_between_limiters():
+    first, second = make_limiter(burst=2), make_limiter(burst=2)
+    assert first._take_token()[0] is True
+    assert second._take_token()[0] is True
+    allowed, wait_ms = first._take_token()
+    assert allowed is False
+    assert wait_ms > 0
+
+
+@pytest.mark.asyncio
+async def test_wait_for_token_raises_when_wait_exceeds_max():
+    limiter = make_limiter(rate=0.1, burst=1, max_wait=0.5)
+    await limiter.wait_for_token()
+    with pytest.raises(OutboundRateLimitException) as exc_info:
+        await limiter.wait_for_token()
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after >= 1
+
+
+def test_retry_after_pauses_all_workers():
+    first, second = make_limiter(), make_limiter()
+    first.record_failure(ChannelServiceException("slow down", channel="email", status_code=429, retry_after=30))
+
+    allowed, wait_ms = second._take_token()
+    assert allowed is False
+    assert wait_ms > 25000
+    assert int(first.concurrency.limit) == 4
+
+
+def test_pause_expires_after_it_ends():
+    limiter = make_limiter()
+    limiter.pause(30)
+
+    ttl = limiter.redis.ttl(limiter._key())
+    assert 30 < ttl <= 30 + limiter._state_ttl()
+
+
+def test_non_throttle_failure_leaves_limits_alone():
+    limiter = make_limiter()
+    limiter.record_failure(ChannelServiceException("bad request", channel="email", status_code=400))
+    assert int(limiter.concurrency.limit) == 8
+    assert limiter._take_token()[0] is True
+
+
+@pytest.mark.asyncio
+async def test_outbound_limited_feeds_back_outcomes():
+    class Service:
+        def __init__(self):
+            self.outbound_limiter = make_limiter(burst=5)
+
+        @outbound_limited
+        async def send(self, fail):
+            assert self.outbound_limiter.concurrency.in_flight == 1
+            if fail:
+                raise ChannelServiceException("unavailable", channel="email", status_code=503)
+            return "ok"
+
+    service = Service()
+    assert await service.send(False) == "ok"
+    with pytest.raises(ChannelServiceException):
+        await service.send(True)
+    assert service.outbound_limiter.concurrency.in_flight == 0
+    assert int(service.outbound_limiter.concurrency.limit) == 4
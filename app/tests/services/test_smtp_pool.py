@@ -0,0 +1,79 @@
+import smtplib
+import threading
+import pytest
+from email.message import EmailMessage
+from app.services.smtp_pool import SMTPConnectionPool, close_smtp_pools
+from app.tests.stubs import StubSMTPServer
+
+
+@pytest.fixture
+def smtp_sink():
+    with StubSMTPServer() as sink:
+        yield sink
+
+
+def _message(to):
+    message = EmailMessage()
+    message["From"] = "from@example.com"
+    message["To"] = to
+    message["Subject"] = "Hello"
+    message.set_content("Body")
+    return message
+
+
+def test_pool_reuses_authenticated_connection(smtp_sink):
+    """Test that consecutive messages share one authenticated session."""
+    pool = SMTPConnectionPool(smtp_sink.host, smtp_sink.port, username="user", password="secret", use_tls=False)
+    for i in range(5):
+        pool.send_message(_message(f"user{i}@example.com"))
+    pool.close()
+
+    assert len(smtp_sink.messages) == 5
+    assert smtp_sink.connections == 1
+    assert smtp_sink.logins == [("user", "secret")]
+
+
+def test_pool_is_bounded_across_threads(smtp_sink):
+    """Test that concurrent senders never open more than `size` connections."""
+    pool = SMTPConnectionPool(smtp_sink.host, smtp_sink.port, use_tls=False, size=2)
+    threads = [threading.Thread(target=pool.send_message, args=(_message(f"user{i}@example.com"),)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.close()
+
+    assert len(smtp_sink.messages) == 8
+    assert smtp_sink.connections <= 2
+
+
+def test_pool_recycles_connections(smtp_sink):
+    """Test that a connection is replaced after max_messages."""
+    pool = SMTPConnectionPool(smtp_sink.host, smtp_sink.port, use_tls=False, max_messages=2)
+    for i in range(4):
+        pool.send_message(_message(f"user{i}@example.com"))
+
+    assert smtp_sink.connections == 2
+
+
+def test_refused_recipient_keeps_connection(smtp_sink):
+    """Test that a rejected recipient does not cost the pooled session."""
+    smtp_sink.reject.add("bounced@example.com")
+    pool = SMTPConnectionPool(smtp_sink.host, smtp_sink.port, use_tls=False)
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.send_message(_message("bounced@example.com"))
+    pool.send_message(_message("ok@example.com"))
+
+    assert smtp_sink.connections == 1
+    assert smtp_sink.messages[0]["rcpt_to"] == ["ok@example.com"]
+
+
+def test_close_smtp_pools_closes_idle_connections(smtp_sink):
+    """Test that shutdown closes the connections every pool kept open."""
+    pool = SMTPConnectionPool(smtp_sink.host, smtp_sink.port, use_tls=False)
+    pool.send_message(_message("user@example.com"))
+
+    close_smtp_pools()
+
+    assert pool._idle.empty()
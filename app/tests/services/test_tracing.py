@@ -0,0 +1,87 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from app.core import tracing
+from app.services.rabbitmq_publisher import RabbitMQPublisher
+from app.worker.consumer import NotificationConsumer
+
+_exporter = InMemorySpanExporter()
+
+
+@pytest.fixture
+def spans():
+    """Record spans in memory (the global provider can only be installed once per process)."""
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(_exporter))
+        trace.set_tracer_provider(provider)
+    _exporter.clear()
+    yield _exporter
+    _exporter.clear()
+
+
+def _span(exporter, name):
+    return next(span for span in exporter.get_finished_spans() if span.name == name)
+
+
+def test_trace_continues_from_publisher_to_consumer(spans):
+    """Test that the trace context travels in the AMQP headers to the consumer and its sends."""
+    publisher = RabbitMQPublisher()
+    publisher._channel = MagicMock()
+    with patch.object(publisher, "connect"), tracing.tracer.start_as_current_span("notification.create"):
+        publisher.publish({"id": "n1", "channel": "email", "recipients_by_channel": {}})
+    properties = publisher._channel.basic_publish.call_args.kwargs["properties"]
+    body = publisher._channel.basic_publish.call_args.kwargs["body"]
+    assert "traceparent" in properties.headers
+
+    consumer = NotificationConsumer(AsyncMock())
+    consumer._channel = MagicMock()
+    with patch.object(NotificationConsumer, "_already_sent", return_value=False):
+        consumer._process_message(MagicMock(), MagicMock(delivery_tag=1), properties, body)
+
+    create, publish, receive = (_span(spans, n) for n in ("notification.create", "queue.publish", "queue.receive"))
+    assert publish.context.trace_id == create.context.trace_id == receive.context.trace_id
+    assert receive.parent.span_id == publish.context.span_id
+    assert receive.attributes["notification.outcome"] == "success"
+    assert "messaging.queue_lag_ms" in receive.attributes
+
+
+def test_message_without_context_starts_new_trace(spans):
+    """Test that messages published before tracing (no headers) still process, in a new trace."""
+    consumer = NotificationConsumer(AsyncMock())
+    consumer._channel = MagicMock()
+    with patch.object(NotificationConsumer, "_already_sent", return_value=False):
+        consumer._process_message(MagicMock(), MagicMock(delivery_tag=1), None, json.dumps({"id": "n2", "channel": "sms"}))
+
+    assert _span(spans, "queue.receive").parent is None
+
+
+def test_extract_context_accepts_bytes_headers():
+    """Test that AMQP header values delivered as bytes are still parsed."""
+    traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+    context = tracing.extract_context({"traceparent": traceparent.encode()})
+
+    span_context = trace.get_current_span(context).get_span_context()
+    assert format(span_context.trace_id, "032x") == "0af7651916cd43dd8448eb211c80319c"
+
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    """Test that the file exporter appends one JSON span per line."""
+    path = tmp_path / "traces.jsonl"
+    with patch.object(tracing.settings, "TRACING_EXPORTER", "file"), \
+         patch.object(tracing.settings, "TRACING_FILE_PATH", str(path)):
+        exporter = tracing._create_exporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+
+    with provider.get_tracer("test").start_as_current_span("channel.send"):
+        pass
+    provider.shutdown()
+
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["channel.send"]
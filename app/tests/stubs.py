@@ -0,0 +1,169 @@
+"""Local stand-ins for provider APIs and an SMTP relay, served from a background thread."""
+import base64
+import json
+import socketserver
+import threading
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+class StubHTTPServer:
+    """
+    Minimal HTTP/1.1 server with keep-alive.
+    Every request is recorded in `requests` (with the client port, so tests
+    can tell whether connections were reused) and answered from `responses`
+    in order, repeating the last one. A response is (status, body, headers).
+    """
+
+    def __init__(self, responses: Optional[List[tuple]] = None):
+        self.requests: List[Dict[str, Any]] = []
+        self.responses = list(responses or [(202, "", {})])
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                with stub._lock:
+                    stub.requests.append({
+                        "method": self.command,
+                        "path": self.path,
+                        "headers": dict(self.headers),
+                        "body": raw.decode(),
+                        "client_port": self.client_address[1],
+                    })
+                    index = min(len(stub.requests), len(stub.responses)) - 1
+                    status, body, headers = stub.responses[index]
+                payload = body if isinstance(body, str) else json.dumps(body)
+                data = payload.encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, str(value))
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _handle
+            do_POST = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def json_bodies(self) -> List[Any]:
+        return [json.loads(r["body"]) for r in self.requests]
+
+    def __enter__(self) -> "StubHTTPServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class StubSMTPServer:
+    """
+    SMTP sink that accepts AUTH PLAIN and records every message.
+    `connections` counts sessions so tests can check connection reuse;
+    addresses in `reject` are refused with a 550 (or `reject_code`).
+    """
+
+    def __init__(self):
+        self.messages: List[Dict[str, Any]] = []
+        self.logins: List[tuple] = []
+        self.connections = 0
+        self.reject = set()
+        self.reject_code = 550
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str):
+                self.wfile.write(f"{line}\r\n".encode())
+
+            def handle(self):
+                with stub._lock:
+                    stub.connections += 1
+                self.reply("220 stub ESMTP")
+                mail_from, rcpt_to = None, []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode().rstrip("\r\n")
+                    verb = command.split(" ", 1)[0].upper()
+                    if verb in ("EHLO", "HELO"):
+                        self.wfile.write(b"250-stub\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+                    elif verb == "AUTH":
+                        _, username, password = base64.b64decode(command.split()[2]).split(b"\0")
+                        with stub._lock:
+                            stub.logins.append((username.decode(), password.decode()))
+                        self.reply("235 Authentication successful")
+                    elif verb == "MAIL":
+                        mail_from, rcpt_to = command.split(":", 1)[1].split()[0].strip("<>"), []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        address = command.split(":", 1)[1].split()[0].strip("<>")
+                        if address in stub.reject:
+                            self.reply(f"{stub.reject_code} Mailbox unavailable")
+                        else:
+                            rcpt_to.append(address)
+                            self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        data = b""
+                        while True:
+                            chunk = self.rfile.readline()
+                            if chunk in (b".\r\n", b""):
+                                break
+                            data += chunk[1:] if chunk.startswith(b"..") else chunk
+                        with stub._lock:
+                            stub.messages.append({
+                                "mail_from": mail_from,
+                                "rcpt_to": rcpt_to,
+                                "message": message_from_bytes(data),
+                            })
+                        self.reply("250 Queued")
+                    elif verb in ("RSET", "NOOP"):
+                        self.reply("250 OK")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def __enter__(self) -> "StubSMTPServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -106,3 +106,80 @@ async def test_update_notification_status(notification_repository: NotificationR
 
     updated = db_session.query(Notification).filter_by(id=notification.id).first()
     assert updated.status == Status.FAILED
+
+@pytest.mark.asyncio
+async def test_bulk_update_recipient_status(notification_repository: NotificationRepository, db_session):
+    notification = notification_repository.create_notification({
+        "subject": "Bulk Test",
+        "content": "Testing bulk recipient updates",
+        "channel": Channel.EMAIL,
+        "priority": Priority.MEDIUM,
+        "status": Status.QUEUED,
+    })
+    recipients = notification_repository.create_recipients(notification.id, [
+        {"email": "ok1@test.com"},
+        {"email": "ok2@test.com"},
+        {"email": "bad@test.com"},
+    ])
+    db_session.commit()
+    assert all(r.id is not None for r in recipients)
+
+    sent = notification_repository.bulk_update_recipient_status([recipients[0].id, recipients[1].id], Status.SENT)
+    failed = notification_repository.bulk_update_recipient_status([recipients[2].id], Status.FAILED, failure_reason="bounced")
+    db_session.commit()
+    db_session.expire_all()
+
+    assert sent == 2
+    assert failed == 1
+    assert recipients[0].delivered_at is not None
+    assert recipients[2].failed_reason == "bounced"
+    assert recipients[2].retry_count == 1
+
+    counts = notification_repository.get_recipient_status_counts(notification.id)
+    assert counts == {Status.SENT: 2, Status.FAILED: 1}
+
+@pytest.mark.asyncio
+async def test_bulk_fail_recipients_keeps_each_reason(notification_repository: NotificationRepository, db_session):
+    notification = notification_repository.create_notification({
+        "subject": "Bulk Failures",
+        "content": "Testing per-recipient failure reasons",
+        "channel": Channel.SMS,
+        "priority": Priority.MEDIUM,
+        "status": Status.QUEUED,
+    })
+    recipients = notification_repository.create_recipients(notification.id, [
+        {"phone_number": "+15550000001"},
+        {"phone_number": "+15550000002"},
+        {"phone_number": "+15550000003"},
+    ])
+    db_session.commit()
+
+    failed = notification_repository.bulk_fail_recipients({
+        recipients[0].id: "Twilio error 21211: Invalid 'To' Phone Number +15550000001",
+        recipients[1].id: None,
+    })
+    db_session.commit()
+    db_session.expire_all()
+
+    assert failed == 2
+    assert recipients[0].failed_reason == "Twilio error 21211: Invalid 'To' Phone Number +15550000001"
+    assert recipients[1].failed_reason is None
+    assert [r.status for r in recipients] == [Status.FAILED, Status.FAILED, Status.PENDING]
+    assert recipients[0].retry_count == 1
+
+@pytest.mark.asyncio
+async def test_notification_ids_are_uuid7_strings(notification_repository: NotificationRepository, db_session):
+    notification = notification_repository.create_notification({
+        "subject": "Id Test",
+        "content": "Testing generated ids",
+        "channel": Channel.SMS,
+        "priority": Priority.LOW,
+        "status": Status.QUEUED,
+    })
+    db_session.commit()
+
+    assert isinstance(notification.id, str)
+    assert uuid.UUID(notification.id).version == 7
+    assert notification_repository.get_notification_by_id(notification.id.upper()).id == notification.id
+    assert notification_repository.get_notification_by_id("not-a-uuid") is None
+    assert notification_repository.update_notification_status("not-a-uuid", Status.FAILED) is False
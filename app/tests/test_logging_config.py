@@ -0,0 +1,80 @@
+import io
+import json
+import logging
+import queue
+import sys
+from app.core import logging_config
+from app.core.logging_config import JSONFormatter, RateSampler, _BoundedQueueHandler
+
+
+def _record(level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_formatter_merges_extra_fields():
+    """Test that `extra={...}` fields appear at the top level of the JSON line."""
+    line = json.loads(JSONFormatter().format(_record(notification_id="n1", counts={"sent": 2})))
+
+    assert line["message"] == "hello world"
+    assert line["notification_id"] == "n1"
+    assert line["counts"] == {"sent": 2}
+    assert "args" not in line and "msg" not in line
+
+
+def test_queue_handler_renders_message_and_exception():
+    """Test that queued records carry the rendered message and traceback text only."""
+    handler = _BoundedQueueHandler(queue.Queue())
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = _record(level=logging.ERROR, msg="failed %d", args=(3,))
+        record.exc_info = sys.exc_info()
+
+    queued = handler.prepare(record)
+
+    assert (queued.msg, queued.args, queued.exc_info) == ("failed 3", None, None)
+    assert "ValueError: boom" in json.loads(JSONFormatter().format(queued))["exception"]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test that a full queue drops records and the next record reports the loss."""
+    log_queue = queue.Queue(maxsize=1)
+    handler = _BoundedQueueHandler(log_queue)
+
+    handler.handle(_record())
+    handler.handle(_record())
+    handler.handle(_record())
+    log_queue.get_nowait()
+    handler.handle(_record())
+
+    assert log_queue.get_nowait().log_records_dropped == 2
+
+
+def test_rate_sampler_limits_info_but_not_warnings():
+    """Test that info lines above the rate are skipped, warnings always pass, and skips are reported."""
+    sampler = RateSampler(rate=1.0, burst=2)
+
+    passed = [sampler.filter(_record()) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert sampler.filter(_record(level=logging.WARNING))
+
+    sampler._updated -= 1  # one second later
+    record = _record()
+    assert sampler.filter(record)
+    assert record.sampled_out == 3
+
+
+def test_configure_logging_writes_json_from_background_thread(monkeypatch):
+    """Test the full pipeline: log call -> queue -> listener -> JSON on stdout."""
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stdout)
+    logging_config.configure_logging("INFO")
+    logging.getLogger("app.test").info("Notification queued", extra={"notification_id": "n1"})
+    logging_config.stop_logging()
+    monkeypatch.undo()
+    logging_config.configure_logging()
+
+    lines = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert {"message": "Notification queued", "notification_id": "n1"}.items() <= lines[-1].items()
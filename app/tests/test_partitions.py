@@ -0,0 +1,157 @@
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+from app.db.sql import partitions
+from app.db.sql.partitions import (
+    PARTITIONED_TABLES, Partition, drop_expired_partitions, ensure_partitions, expired_partitions, is_partition_name,
+    month_start, upper_bound,
+)
+
+NOW = datetime(2026, 11, 20, 8, 0, tzinfo=timezone.utc)
+
+
+def _utc(year, month):
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def engine():
+    """A mock PostgreSQL engine whose tables are both partitioned."""
+    engine = MagicMock()
+    connection = engine.begin.return_value.__enter__.return_value
+    connection.dialect.name = "postgresql"
+    engine.connect.return_value.__enter__.return_value = connection
+    engine.connect.return_value.execution_options.return_value.__enter__.return_value = connection
+    with patch.object(partitions, "is_partitioned", return_value=True):
+        yield engine
+
+
+def _calls(engine):
+    connection = engine.begin.return_value.__enter__.return_value
+    return [(str(call.args[0]), *call.args[1:]) for call in connection.execute.call_args_list]
+
+
+def _statements(engine):
+    return [statement for statement, *_ in _calls(engine)]
+
+
+def test_month_bounds_and_partition_bounds():
+    """Test month arithmetic across a year end and parsing of PostgreSQL partition bounds."""
+    assert month_start(NOW) == _utc(2026, 11)
+    assert month_start(NOW, 2) == _utc(2027, 1)
+    assert upper_bound("FOR VALUES FROM (MINVALUE) TO ('2026-12-01 00:00:00+00')") == _utc(2026, 12)
+    assert upper_bound("FOR VALUES FROM ('2026-12-01 01:00:00+01') TO (MAXVALUE)") is None
+    assert upper_bound("DEFAULT") is None
+
+
+def test_ensure_partitions_continues_after_the_last_partition(engine):
+    """Test that only months beyond the existing partitions are created, up to the premake horizon."""
+    existing = [Partition("notifications_legacy", _utc(2026, 12))]
+    with patch.object(partitions, "list_partitions", return_value=existing):
+        created = ensure_partitions(engine, months_ahead=3, now=NOW)
+
+    assert created == [
+        "notification_recipients_p2026_12", "notification_recipients_p2027_01", "notification_recipients_p2027_02",
+        "notifications_p2026_12", "notifications_p2027_01", "notifications_p2027_02",
+    ]
+    assert ("CREATE TABLE IF NOT EXISTS notifications_p2027_01 PARTITION OF notifications "
+            "FOR VALUES FROM ('2027-01-01T00:00:00+00:00') TO ('2027-02-01T00:00:00+00:00')") in _statements(engine)
+
+
+def test_ensure_partitions_fills_missed_months_from_the_default_partition(engine):
+    """Test that months nobody created are added and their rows moved out of the default partition."""
+    existing = [Partition("notifications_p2026_09", _utc(2026, 10)), Partition("notifications_default", None, True)]
+    with patch.object(partitions, "list_partitions", side_effect=lambda connection, table: existing
+                      if table == "notifications" else []):
+        created = ensure_partitions(engine, months_ahead=0, now=NOW)
+
+    assert created == ["notification_recipients_p2026_11", "notifications_p2026_10", "notifications_p2026_11"]
+    in_range = "created_at >= :start AND created_at < :end"
+    bounds = {"start": _utc(2026, 10), "end": _utc(2026, 11)}
+    assert _calls(engine)[2:6] == [
+        ("CREATE TABLE IF NOT EXISTS notifications_p2026_10 (LIKE notifications INCLUDING DEFAULTS)",),
+        (f"INSERT INTO notifications_p2026_10 SELECT * FROM notifications_default WHERE {in_range}", bounds),
+        (f"DELETE FROM notifications_default WHERE {in_range}", bounds),
+        ("ALTER TABLE notifications ATTACH PARTITION notifications_p2026_10 "
+         "FOR VALUES FROM ('2026-10-01T00:00:00+00:00') TO ('2026-11-01T00:00:00+00:00')",),
+    ]
+
+
+def test_ensure_partitions_holds_the_maintenance_lock_before_listing(engine):
+    """Test that concurrent workers serialise on an advisory lock before deciding what is missing."""
+    order = []
+    connection = engine.begin.return_value.__enter__.return_value
+    connection.execute.side_effect = lambda statement, *args: order.append(str(statement))
+    with patch.object(partitions, "list_partitions", side_effect=lambda *args: order.append("list") or []):
+        ensure_partitions(engine, months_ahead=0, now=NOW)
+
+    assert order[0] == "SELECT pg_advisory_xact_lock(:key)"
+    assert order.index("list") > 0
+
+
+def test_partition_names_are_recognised():
+    """Test that partitions, but not the partitioned tables, are left out of autogenerate."""
+    assert is_partition_name("notifications_p2027_01")
+    assert is_partition_name("notification_recipients_legacy")
+    assert is_partition_name("notifications_default")
+    assert not is_partition_name("notifications")
+    assert not is_partition_name("notification_recipients")
+
+
+def test_retention_detaches_and_drops_only_expired_months(engine):
+    """Test that whole months past the retention age are detached concurrently and dropped."""
+    existing = [
+        Partition("notifications_legacy", _utc(2026, 6)),
+        Partition("notifications_p2026_06", _utc(2026, 7)),
+        Partition("notifications_p2026_07", _utc(2026, 8)),
+    ]
+    assert expired_partitions(existing + [Partition("notifications_default", None)], _utc(2026, 7)) == existing[:2]
+
+    with patch.object(partitions, "list_partitions", side_effect=lambda connection, table: existing
+                      if table == "notifications" else []):
+        assert drop_expired_partitions(engine, older_than_days=30, now=datetime(2026, 8, 1, tzinfo=timezone.utc),
+                                       dry_run=True) == ["notifications_legacy", "notifications_p2026_06"]
+        assert _statements(engine) == []
+
+        drop_expired_partitions(engine, older_than_days=30, now=datetime(2026, 8, 1, tzinfo=timezone.utc))
+    assert _statements(engine) == [
+        "ALTER TABLE notifications DETACH PARTITION notifications_legacy CONCURRENTLY",
+        "DROP TABLE notifications_legacy",
+        "ALTER TABLE notifications DETACH PARTITION notifications_p2026_06 CONCURRENTLY",
+        "DROP TABLE notifications_p2026_06",
+    ]
+    assert drop_expired_partitions(engine, older_than_days=0) == []
+
+
+def test_retention_detaches_in_a_transaction_when_there_is_a_default_partition(engine):
+    """Test that CONCURRENTLY, which PostgreSQL refuses alongside a default partition, isn't used then."""
+    existing = [Partition("notifications_legacy", _utc(2026, 6)), Partition("notifications_default", None, True)]
+    with patch.object(partitions, "list_partitions", side_effect=lambda connection, table: existing
+                      if table == "notifications" else []):
+        assert drop_expired_partitions(engine, older_than_days=30, now=datetime(2026, 8, 1, tzinfo=timezone.utc)) \
+            == ["notifications_legacy"]
+
+    assert _statements(engine) == [
+        "ALTER TABLE notifications DETACH PARTITION notifications_legacy",
+        "DROP TABLE notifications_legacy",
+    ]
+    engine.begin.assert_called_once_with()
+    engine.connect.return_value.execution_options.assert_not_called()
+
+
+def test_partition_maintenance_is_a_no_op_without_partitioned_tables():
+    """Test that SQLite (or PostgreSQL before the migration) is left untouched."""
+    engine = create_engine("sqlite://")
+    assert ensure_partitions(engine, now=NOW) == []
+    assert drop_expired_partitions(engine, older_than_days=1, now=NOW) == []
+
+
+def test_models_match_the_partitioned_schema():
+    """Test that the models declare the migrated keys, so autogenerate doesn't put the old ones back."""
+    from app.db.sql.models import Base
+
+    for table in PARTITIONED_TABLES:
+        metadata_table = Base.metadata.tables[table]
+        assert [c.name for c in metadata_table.primary_key.columns] == ["id", "created_at"]
+        assert not metadata_table.foreign_keys
@@ -0,0 +1,130 @@
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app.core import profiling
+from app.core.auth import create_service_token
+from app.db.sql.instrumentation import install_query_hooks, record_queries
+from app.main import app
+
+
+@pytest.fixture
+def profiling_settings(tmp_path):
+    with patch.object(profiling.settings, "PROFILING_ENABLED", True), \
+         patch.object(profiling.settings, "PROFILING_OUTPUT_DIR", str(tmp_path)), \
+         patch.object(profiling.settings, "PROFILING_SAMPLE_RATE", 0.0), \
+         patch.object(profiling.settings, "PROFILING_HEADER_SECRET", "let-me-profile"), \
+         patch.object(profiling.settings, "PROFILING_INTERVAL_MS", 1.0):
+        yield tmp_path
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    install_query_hooks(engine)
+    yield engine
+    engine.dispose()
+
+
+def _headers(scope):
+    token = create_service_token(service_id="profiling-test", scope=scope).access_token
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_record_queries_counts_statements_in_context(engine):
+    """Test that statements are counted and timed only while a recorder is active."""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        with record_queries() as queries:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+
+    summary = queries.summary()
+    assert summary["count"] == 3
+    assert {s["sql"]: s["count"] for s in summary["statements"]} == {"SELECT 1": 2, "SELECT 2": 1}
+    assert summary["total_ms"] >= 0
+
+
+def test_request_profile_selection(profiling_settings):
+    """Test that requests are profiled when sampled or when they send the secret header."""
+    assert profiling.request_profile("GET", "/", {}) is None
+    assert profiling.request_profile("GET", "/", {"X-Profile": "wrong"}) is None
+
+    profile = profiling.request_profile("GET", "/", {"X-Profile": "let-me-profile"})
+    assert profile is not None
+    assert profile.stop()["attributes"]["forced"] is True
+
+    with patch.object(profiling.settings, "PROFILING_SAMPLE_RATE", 1.0):
+        profile = profiling.request_profile("GET", "/", {})
+    assert profile is not None
+    profile.stop()
+
+    with patch.object(profiling.settings, "PROFILING_ENABLED", False):
+        assert profiling.request_profile("GET", "/", {"X-Profile": "let-me-profile"}) is None
+
+
+def test_message_profile_matches_filter(profiling_settings):
+    """Test that only worker messages matching every filter field are profiled."""
+    with patch.object(profiling.settings, "PROFILING_MESSAGE_FILTER", {"channel": "email"}):
+        assert profiling.message_profile({"id": "n1", "channel": "sms"}) is None
+        profile = profiling.message_profile({"id": "n1", "channel": "email"})
+
+    assert profile is not None
+    assert profile.stop()["name"] == "notification n1"
+    assert profiling.message_profile({"id": "n1", "channel": "email"}) is None  # no filter, no profiles
+
+
+def test_profile_report_has_stacks_and_sql(profiling_settings, engine):
+    """Test that a report carries stack samples of the busy function and the SQL it ran."""
+    def busy_work():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+
+    profile = profiling.Profile("message", "test").start()
+    busy_work()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    report = profile.stop(outcome="success")
+
+    assert report["samples"] > 0
+    assert any("busy_work" in entry["function"] for entry in report["top_functions"])
+    assert report["sql"]["count"] == 1
+    assert report["attributes"] == {"outcome": "success"}
+
+
+def test_saved_profiles_are_listed_and_pruned(profiling_settings):
+    """Test that reports round-trip through the output directory and old ones are deleted."""
+    with patch.object(profiling.settings, "PROFILING_MAX_FILES", 2):
+        ids = []
+        for _ in range(3):
+            report = profiling.Profile("request", "GET /").start().stop()
+            profiling.save_profile(report)
+            ids.append(report["id"])
+
+    listed = profiling.list_profiles()
+    assert [summary["id"] for summary in listed] == [ids[2], ids[1]]
+    assert profiling.load_profile(ids[2])["name"] == "GET /"
+    assert profiling.load_profile(ids[0]) is None
+    assert profiling.load_profile("../etc/passwd") is None
+
+
+def test_profiled_request_listed_by_admin_endpoint(profiling_settings):
+    """Test that a request sending the header is profiled and shows up for admins only."""
+    client = TestClient(app)
+    client.get("/health", headers={"X-Profile": "let-me-profile"})
+
+    assert client.get("/api/v1/admin/profiles", headers=_headers(["notifications:read"])).status_code == 403
+
+    response = client.get("/api/v1/admin/profiles", headers=_headers(["admin:profiles"]))
+    assert response.status_code == 200
+    profiles = response.json()["profiles"]
+    assert profiles[0]["name"] == "GET /health"
+    assert profiles[0]["attributes"]["route"] == "/health"
+
+    detail = client.get(f"/api/v1/admin/profiles/{profiles[0]['id']}", headers=_headers(["admin:profiles"]))
+    assert detail.status_code == 200
+    assert "stacks" in detail.json()
+    assert client.get("/api/v1/admin/profiles/missing", headers=_headers(["admin:profiles"])).status_code == 404
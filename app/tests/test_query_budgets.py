@@ -0,0 +1,149 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.api.schemas import NotificationCreate, Channel, Priority
+from app.db.sql import instrumentation
+from app.db.sql.instrumentation import check_query_budget, install_query_hooks, query_budget, record_queries
+from app.db.sql.models import Base
+from app.db.sql.repositories import NotificationRepository
+from app.main import app
+from app.services.notification_service import NotificationService
+from app.utils.exceptions import QueryBudgetExceededException
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    install_query_hooks(engine)
+    yield engine
+    engine.dispose()
+
+
+def _round_trips(recorder):
+    """
+    Statements as PostgreSQL would send them. SQLite can't return generated
+    ids from a multi-row INSERT, so there the ORM inserts recipients one row
+    at a time; on PostgreSQL the same flush is one batched statement.
+    """
+    batched = [sql for i, (sql, _) in enumerate(recorder.queries)
+               if not (sql.startswith("INSERT") and i and recorder.queries[i - 1][0] == sql)]
+    return len(batched)
+
+
+def test_nested_recorders_see_inner_queries(engine):
+    """Test that a recorder inside a request doesn't hide queries from the request's count."""
+    with engine.connect() as connection, record_queries() as outer:
+        connection.execute(text("SELECT 1"))
+        with record_queries() as inner:
+            connection.execute(text("SELECT 2"))
+
+    assert inner.count == 1
+    assert outer.count == 2
+
+
+def test_query_budget_flags_repeated_statements(engine):
+    """Test that a statement repeated in a loop fails the budget even when the total is allowed."""
+    with engine.connect() as connection:
+        with query_budget(3):
+            connection.execute(text("SELECT 1"))
+
+        with pytest.raises(QueryBudgetExceededException) as exc_info:
+            with query_budget(100, unit="loop"):
+                for _ in range(5):
+                    connection.execute(text("SELECT 1"))
+
+        with pytest.raises(QueryBudgetExceededException, match="4 queries"):
+            with query_budget(3):
+                for statement in ("SELECT 1", "SELECT 2", "SELECT 3", "SELECT 4"):
+                    connection.execute(text(statement))
+
+    assert exc_info.value.repeated == {"SELECT 1": 5}
+
+
+def test_check_query_budget_logs_or_raises(engine):
+    """Test that an over-budget unit is logged in production and raises in strict mode."""
+    with engine.connect() as connection, record_queries() as recorder:
+        connection.execute(text("SELECT 1"))
+        connection.execute(text("SELECT 2"))
+
+    with patch.object(instrumentation.settings, "SQL_QUERY_BUDGETS", {"GET /x": 1}), \
+         patch.object(instrumentation.settings, "SQL_BUDGET_STRICT", False), \
+         patch.object(instrumentation.logger, "warning") as warning:
+        check_query_budget(recorder, "request", "GET /x")
+        check_query_budget(recorder, "request", "GET /y")  # default budget
+    warning.assert_called_once()
+    assert warning.call_args.kwargs["extra"]["query_count"] == 2
+
+    with patch.object(instrumentation.settings, "SQL_QUERY_BUDGETS", {"GET /x": 1}), \
+         patch.object(instrumentation.settings, "SQL_BUDGET_STRICT", True):
+        with pytest.raises(QueryBudgetExceededException):
+            check_query_budget(recorder, "request", "GET /x")
+
+
+@pytest.mark.asyncio
+async def test_create_notification_round_trips_stay_constant(engine):
+    """Test that creating a notification costs the same round trips for 1 or 50 recipients, within budget."""
+    budget = instrumentation.settings.SQL_QUERY_BUDGETS["POST /api/v1/notifications/"]
+    round_trips = []
+    for count in (1, 50):
+        request = NotificationCreate(
+            user_ids=[1],
+            emails=[f"user{i}@example.com" for i in range(count)],
+            sms_numbers=[],
+            priority=Priority.HIGH,
+            channel=Channel.EMAIL,
+            subject="Budget",
+            content="Counting queries",
+        )
+        db = sessionmaker(bind=engine)()
+        with patch("app.services.rabbitmq_publisher.publisher.publish"), record_queries() as recorder:
+            await NotificationService(db).create_notification(request)
+        db.close()
+        round_trips.append(_round_trips(recorder))
+
+    assert round_trips[0] == round_trips[1]
+    assert round_trips[0] <= budget
+
+
+@pytest.mark.asyncio
+async def test_failures_with_distinct_reasons_cost_constant_statements(engine):
+    """Test that recording a batch's failures doesn't cost one UPDATE per distinct reason."""
+    db = sessionmaker(bind=engine)()
+    repository = NotificationRepository(db)
+    statements = []
+    for count in (2, 20):
+        notification = repository.create_notification({
+            "subject": "Budget", "content": "Counting queries", "channel": Channel.SMS, "priority": Priority.LOW,
+        })
+        recipients = repository.create_recipients(
+            notification.id, [{"phone_number": f"+1555000{i:04d}"} for i in range(count)])
+        db.commit()
+        failed = [{"id": r.id, "phone_number": r.phone_number, "retryable": False,
+                   "failed_reason": f"Twilio error 21211: Invalid 'To' Phone Number {r.phone_number}"}
+                  for r in recipients]
+        service = NotificationService(db)
+        with patch.object(service, "_send_channel", AsyncMock(return_value=([], failed))), \
+             patch.object(instrumentation.settings, "SQL_BUDGET_STRICT", True):
+            with record_queries() as recorder:
+                await service.process_notification({
+                    "id": notification.id, "content": "Hi", "channel": "sms", "recipients": failed,
+                })
+            check_query_budget(recorder, "message", "message sms")
+        statements.append(recorder.count)
+    db.close()
+
+    assert statements[0] == statements[1]
+
+
+def test_requests_are_checked_against_their_route_budget():
+    """Test that every request's queries are checked under its method and route template."""
+    with patch("app.main.check_query_budget") as check:
+        TestClient(app).get("/api/v1/notifications/abc")
+
+    recorder, kind, unit = check.call_args.args
+    assert (kind, unit) == ("request", "GET /api/v1/notifications/{notification_id}")
+    assert recorder.count == 0
@@ -0,0 +1,161 @@
+"""
+EXPLAIN regression suite: every statement the repository runs must be
+served by an index. Runs on SQLite, and also on PostgreSQL when
+EXPLAIN_POSTGRES_URL points at a scratch database (sequential scans are
+disabled there so the tiny test tables still show which index is chosen).
+"""
+import os
+import re
+import pytest
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.api.schemas import Channel, Priority, Status
+from app.db.sql.models import Base, Notification
+from app.db.sql.repositories import NotificationRepository
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+_SQLITE_TABLE_SCAN = re.compile(r"^SCAN (\w+)$")
+_SQLITE_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def engine(request):
+    if request.param == "sqlite":
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    else:
+        url = os.environ.get("EXPLAIN_POSTGRES_URL")
+        if not url:
+            pytest.skip("EXPLAIN_POSTGRES_URL not set")
+        engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def repository(engine):
+    db = sessionmaker(bind=engine)()
+    repository = NotificationRepository(db)
+    for i in range(20):
+        notification = repository.create_notification({
+            "subject": f"n{i}", "content": "plan", "channel": Channel.EMAIL, "priority": Priority.LOW,
+            "status": Status.SCHEDULED if i % 4 == 0 else Status.SENT,
+            "scheduled_at": NOW + timedelta(minutes=i - 10),
+        })
+        repository.create_recipients(notification.id, [{"email": f"u{i}-{j}@example.com"} for j in range(3)])
+    db.commit()
+    yield repository
+    db.close()
+
+
+@contextmanager
+def captured_statements(engine):
+    """Every SELECT/UPDATE/DELETE sent to the database, with its parameters."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def _pg_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _pg_nodes(child)
+
+
+def full_scans(engine, statement, parameters):
+    """The plan steps that read a whole table (or sort one) rather than use an index."""
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            return [f"Seq Scan on {node['Relation Name']}" for node in _pg_nodes(plan[0]["Plan"])
+                    if node["Node Type"] == "Seq Scan"]
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        details = [row[-1] for row in rows]
+    return [detail for detail in details
+            if "TEMP B-TREE" in detail or
+            (_SQLITE_TABLE_SCAN.match(detail) and _SQLITE_TABLE_SCAN.match(detail).group(1) in Base.metadata.tables)]
+
+
+def used_indexes(engine, statement, parameters):
+    """The indexes the plan reads."""
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            return {node["Index Name"] for node in _pg_nodes(plan[0]["Plan"]) if "Index Name" in node}
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    matches = (_SQLITE_INDEX.search(row[-1]) for row in rows)
+    return {match.group(1) for match in matches if match}
+
+
+def _some_notification(repository):
+    return repository.db.query(Notification.id).order_by(Notification.created_at).first()[0]
+
+
+OPERATIONS = {
+    "get_notification_by_id": lambda repo, nid, rid: repo.get_notification_by_id(nid),
+    "get_recipients_by_notification_id": lambda repo, nid, rid: repo.get_recipients_by_notification_id(nid),
+    "get_recipient_status_counts": lambda repo, nid, rid: repo.get_recipient_status_counts(nid),
+    "list_notifications": lambda repo, nid, rid: repo.list_notifications(page=2, page_size=5),
+    "update_notification_status": lambda repo, nid, rid: repo.update_notification_status(nid, Status.FAILED),
+    "update_recipient_status": lambda repo, nid, rid: repo.update_recipient_status(rid, Status.SENT),
+    "bulk_update_recipient_status":
+        lambda repo, nid, rid: repo.bulk_update_recipient_status([rid, rid + 1], Status.FAILED, "bounced"),
+    "bulk_fail_recipients": lambda repo, nid, rid: repo.bulk_fail_recipients({rid: "bounced", rid + 1: "550"}),
+}
+
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+def test_repository_queries_use_indexes(engine, repository, operation):
+    """Test that no repository query falls back to a full table scan or an unindexed sort."""
+    notification_id = _some_notification(repository)
+    recipient_id = repository.get_recipients_by_notification_id(notification_id)[0].id
+
+    with captured_statements(engine) as statements:
+        OPERATIONS[operation](repository, notification_id, recipient_id)
+        repository.db.rollback()
+
+    assert statements, f"{operation} ran no queries"
+    for statement, parameters in statements:
+        assert full_scans(engine, statement, parameters) == [], statement
+
+
+def test_every_index_serves_a_query(engine, repository):
+    """Test that each declared index is read by at least one repository query, so none is kept speculatively."""
+    notification_id = _some_notification(repository)
+    recipient_id = repository.get_recipients_by_notification_id(notification_id)[0].id
+
+    with captured_statements(engine) as statements:
+        for operation in OPERATIONS.values():
+            operation(repository, notification_id, recipient_id)
+            repository.db.rollback()
+
+    used = set().union(*(used_indexes(engine, statement, parameters) for statement, parameters in statements))
+    declared = {index.name for table in Base.metadata.tables.values() for index in table.indexes}
+    assert declared - used == set(), sorted(used)
+
+
+def test_no_redundant_indexes():
+    """Test that no index duplicates the primary key or a leading prefix of another index."""
+    for table in Base.metadata.tables.values():
+        keys = [(f"{table.name}_pkey", tuple(c.name for c in table.primary_key.columns), None)]
+        keys += [(index.name, tuple(c.name for c in index.columns),
+                  str(index.dialect_options["postgresql"]["where"])) for index in table.indexes]
+        for name, columns, where in keys:
+            for other, other_columns, other_where in keys:
+                if other != name and where == other_where and other_columns[:len(columns)] == columns:
+                    pytest.fail(f"{name} {columns} is redundant with {other} {other_columns}")
@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.api.schemas import Channel, Priority, Status
+from app.db.sql import connection
+from app.db.sql.connection import ReplicaMonitor, open_replica_session
+from app.db.sql.models import Base
+from app.db.sql.repositories import NotificationRepository
+
+
+def _engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def _add_notification(session, subject, notification_id=None):
+    notification = NotificationRepository(session).create_notification({
+        "id": notification_id, "subject": subject, "content": "replica", "channel": Channel.EMAIL,
+        "priority": Priority.LOW, "status": Status.SENT,
+    })
+    session.commit()
+    return notification.id
+
+
+@pytest.fixture
+def databases():
+    """A primary and a replica session factory; open_replica_session hands out replica sessions."""
+    primary, replica = sessionmaker(bind=_engine()), sessionmaker(bind=_engine())
+    with patch("app.db.sql.repositories.open_replica_session", side_effect=lambda: replica()):
+        yield primary, replica
+
+
+def test_status_and_list_reads_go_to_the_replica(databases):
+    """Test that lookups and listings read the replica while writes and counts stay on the primary."""
+    primary, replica = databases
+    notification_id = _add_notification(primary(), "primary copy")
+    _add_notification(replica(), "replica copy", notification_id)
+    repository = NotificationRepository(primary())
+
+    assert repository.get_notification_by_id(notification_id).subject == "replica copy"
+    notifications, total = repository.list_notifications(page=1, page_size=10)
+    assert ([n.subject for n in notifications], total) == (["replica copy"], 1)
+
+    assert repository.update_notification_status(notification_id, Status.FAILED)
+    repository.db.commit()
+    assert NotificationRepository(primary(), read_from_replica=False).get_notification_by_id(
+        notification_id).status == Status.FAILED
+
+
+def test_replica_miss_falls_back_to_the_primary(databases):
+    """Test that a notification the replica hasn't replayed yet is read from the primary."""
+    primary, _ = databases
+    notification_id = _add_notification(primary(), "just created")
+
+    assert NotificationRepository(primary()).get_notification_by_id(notification_id).subject == "just created"
+
+
+def test_replica_monitor_checks_lag_once_per_interval():
+    """Test that the replica is used only while reachable and within the lag limit, re-checked per interval."""
+    engine = _engine()
+    factory = MagicMock(return_value=engine)
+    monitor = ReplicaMonitor(factory)
+
+    with patch.object(connection.settings, "DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS", 60):
+        assert monitor.usable() and monitor.usable()
+    assert factory.call_count == 1
+
+    with patch.object(connection.settings, "DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS", 0), \
+         patch.object(connection, "replica_lag_seconds", return_value=30.0):
+        assert not monitor.usable()
+
+    factory.return_value = MagicMock(connect=MagicMock(side_effect=OSError("connection refused")))
+    with patch.object(connection.settings, "DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS", 0):
+        assert not monitor.usable()
+
+
+def test_no_replica_session_without_a_replica_url():
+    """Test that reads use the primary when no replica is configured."""
+    with patch.object(connection.settings, "DATABASE_REPLICA_URL", None):
+        assert open_replica_session() is None
@@ -0,0 +1,91 @@
+"""
+Cold-start budget. Each check runs in a fresh interpreter: import time of
+app.main (python -X importtime) and time from interpreter start to the first
+served request. Budgets can be tightened or relaxed per environment with
+STARTUP_IMPORT_BUDGET_MS / STARTUP_FIRST_REQUEST_BUDGET_MS.
+"""
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+pytestmark = pytest.mark.benchmark
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", 1500))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get("STARTUP_FIRST_REQUEST_BUDGET_MS", 3000))
+
+# Modules the API process must not import just to start
+HEAVY_MODULES = ["sendgrid", "pika", "motor", "celery", "app.services.channel_services"]
+
+
+def _run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    env = {
+        "DATABASE_URL": "sqlite:///:memory:",
+        "SENDGRID_API_KEY": "test",
+        "SENDGRID_FROM_EMAIL": "from@example.com",
+        **os.environ,
+    }
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True, timeout=60,
+    )
+
+
+def _result(stdout: str, key: str):
+    """The JSON line printed by the child that contains `key` (log lines may interleave)."""
+    for line in reversed(stdout.splitlines()):
+        if line.startswith("{") and f'"{key}"' in line:
+            return json.loads(line)
+    raise AssertionError(f"no {key!r} result in output: {stdout[-500:]}")
+
+
+def _parse_importtime(stderr: str):
+    """Parse `import time: self | cumulative | name` lines into (cumulative_us, name)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return rows
+
+
+def test_import_time_within_budget():
+    """Test that importing the API app stays within the import-time budget."""
+    rows = _parse_importtime(_run_python("import app.main", "-X", "importtime").stderr)
+    total_ms = next(cumulative for cumulative, name in rows if name == "app.main") / 1000
+    slowest = ", ".join(f"{name}={cumulative / 1000:.0f}ms" for cumulative, name in sorted(rows, reverse=True)[:8])
+    assert total_ms <= IMPORT_BUDGET_MS, f"import app.main took {total_ms:.0f}ms (budget {IMPORT_BUDGET_MS:.0f}ms): {slowest}"
+
+
+def test_import_creates_no_clients():
+    """Test that importing the API app opens no clients and loads no provider SDKs."""
+    code = (
+        "import json, sys, app.main\n"
+        "from app.core import redis_client\n"
+        "from app.db.sql import connection\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'heavy': heavy, 'redis': redis_client._redis_client is not None,"
+        " 'engine': connection._engine is not None}))"
+    )
+    state = _result(_run_python(code).stdout, "heavy")
+    assert state == {"heavy": [], "redis": False, "engine": False}
+
+
+def test_time_to_first_request_within_budget():
+    """Test that a fresh process serves its first request within the budget."""
+    code = (
+        "import time\n"
+        "started = time.perf_counter()\n"
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "response = TestClient(app).get('/health')\n"
+        "assert response.status_code == 200, response.text\n"
+        "import json\n"
+        "print(json.dumps({'elapsed_ms': (time.perf_counter() - started) * 1000}))"
+    )
+    elapsed_ms = _result(_run_python(code).stdout, "elapsed_ms")["elapsed_ms"]
+    assert elapsed_ms <= FIRST_REQUEST_BUDGET_MS, \
+        f"first request after {elapsed_ms:.0f}ms (budget {FIRST_REQUEST_BUDGET_MS:.0f}ms)"
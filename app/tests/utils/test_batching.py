@@ -0,0 +1,32 @@
+import asyncio
+import pytest
+from app.utils.batching import chunked, run_batches
+
+
+def test_chunked():
+    assert chunked([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+    assert chunked([], 3) == []
+    with pytest.raises(ValueError):
+        chunked([1], 0)
+
+
+@pytest.mark.asyncio
+async def test_run_batches_limits_concurrency_and_keeps_failures():
+    in_flight = 0
+    peak = 0
+
+    async def send(batch):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if batch == [3]:
+            raise RuntimeError("boom")
+        return sum(batch)
+
+    results = await run_batches(send, [[1], [2], [3], [4]], concurrency=2)
+
+    assert peak == 2
+    assert results[:2] == [1, 2] and results[3] == 4
+    assert isinstance(results[2], RuntimeError)
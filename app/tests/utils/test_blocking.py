@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from app.utils import blocking
+
+
+@pytest.fixture(autouse=True)
+def small_pool():
+    blocking.shutdown_blocking_executor()
+    with patch.object(blocking.settings, "BLOCKING_POOL_MAX_WORKERS", 2):
+        yield
+    blocking.shutdown_blocking_executor()
+
+
+@pytest.mark.asyncio
+async def test_run_blocking_returns_result_off_the_event_loop():
+    main_thread = threading.get_ident()
+    result, thread = await blocking.run_blocking(lambda x, y=0: (x + y, threading.get_ident()), 1, y=2)
+    assert result == 3
+    assert thread != main_thread
+
+
+@pytest.mark.asyncio
+async def test_run_blocking_is_bounded():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    await asyncio.gather(*(blocking.run_blocking(work) for _ in range(6)), ticker())
+    assert peak == 2
+    assert ticks == 5  # the loop kept running while the pool was busy
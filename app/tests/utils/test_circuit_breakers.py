@@ -0,0 +1,93 @@
+import pytest
+import fakeredis
+from unittest.mock import patch, AsyncMock
+from app.utils.circuit_breakers import CircuitBreaker, CircuitBreakerState
+from app.utils.exceptions import ChannelServiceException, CircuitOpenException
+from app.utils.retries import retry_with_exponential_backoff
+
+
+@pytest.fixture
+def shared_redis():
+    """One in-memory Redis shared by breakers standing in for separate worker processes."""
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def _breaker(shared_redis, **kwargs):
+    breaker = CircuitBreaker("provider", channel="email", **kwargs)
+    breaker.redis = shared_redis
+    return breaker
+
+
+async def _fail():
+    raise ChannelServiceException("provider down", channel="email", status_code=503)
+
+
+@pytest.mark.asyncio
+async def test_failures_open_circuit_for_all_processes(shared_redis):
+    """Test that failures recorded by one process open the circuit for another."""
+    worker_a = _breaker(shared_redis, failure_threshold=2, recovery_timeout=30)
+    worker_b = _breaker(shared_redis, failure_threshold=2, recovery_timeout=30)
+    send = AsyncMock(return_value="ok")
+
+    for _ in range(2):
+        with pytest.raises(ChannelServiceException):
+            await worker_a(_fail)()
+
+    with pytest.raises(CircuitOpenException) as exc_info:
+        await worker_b(send)()
+    send.assert_not_awaited()
+    assert 0 < exc_info.value.retry_after <= 30
+    assert worker_b.state() == CircuitBreakerState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_half_open_limits_probes_and_closes_on_success(shared_redis):
+    """Test that only half_open_max_calls probes pass and a successful probe closes the circuit."""
+    breaker = _breaker(shared_redis, failure_threshold=1, recovery_timeout=10, half_open_max_calls=1)
+    other = _breaker(shared_redis, failure_threshold=1, recovery_timeout=10, half_open_max_calls=1)
+    with patch("app.utils.circuit_breakers.time.time", return_value=1000.0):
+        with pytest.raises(ChannelServiceException):
+            await breaker(_fail)()
+
+    with patch("app.utils.circuit_breakers.time.time", return_value=1011.0):
+        breaker.before_call()  # takes the only probe slot
+        with pytest.raises(CircuitOpenException):
+            other.before_call()
+        breaker.record_success()
+        assert other.state() == CircuitBreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_circuit(shared_redis):
+    """Test that a failing half-open probe re-opens the circuit."""
+    breaker = _breaker(shared_redis, failure_threshold=1, recovery_timeout=10)
+    with patch("app.utils.circuit_breakers.time.time", return_value=1000.0):
+        with pytest.raises(ChannelServiceException):
+            await breaker(_fail)()
+    with patch("app.utils.circuit_breakers.time.time", return_value=1011.0):
+        with pytest.raises(ChannelServiceException):
+            await breaker(_fail)()
+        assert breaker.state() == CircuitBreakerState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_retry_does_not_retry_open_circuit():
+    """Test that the backoff decorator gives up immediately on an open circuit."""
+    send = AsyncMock(side_effect=CircuitOpenException("open", channel="email", retry_after=30))
+    wrapped = retry_with_exponential_backoff(max_retries=3, base_delay=0)(send)
+
+    with pytest.raises(CircuitOpenException):
+        await wrapped()
+    assert send.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_retries_provider_errors_with_backoff():
+    """Test that 5xx errors are retried with jittered backoff until success."""
+    send = AsyncMock(side_effect=[ChannelServiceException("busy", channel="email", status_code=503), "ok"])
+    wrapped = retry_with_exponential_backoff(max_retries=2, base_delay=0.01)(send)
+
+    with patch("app.utils.retries.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        assert await wrapped() == "ok"
+    assert send.await_count == 2
+    assert 0.005 <= mock_sleep.await_args.args[0] <= 0.01
@@ -0,0 +1,21 @@
+import time
+import uuid
+from app.utils.ids import canonical_uuid, uuid7
+
+
+def test_uuid7_is_versioned_and_time_ordered():
+    first = uuid7()
+    time.sleep(0.002)
+    second = uuid7()
+
+    assert (first.version, first.variant) == (7, uuid.RFC_4122)
+    assert abs((first.int >> 80) - time.time_ns() // 1_000_000) < 1000
+    assert first < second and str(first) < str(second)
+
+
+def test_canonical_uuid():
+    value = uuid7()
+    assert canonical_uuid(str(value).upper()) == str(value)
+    assert canonical_uuid(value.hex) == str(value)
+    assert canonical_uuid("abc") is None
+    assert canonical_uuid(None) is None
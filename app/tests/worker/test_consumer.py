@@ -0,0 +1,189 @@
+import asyncio
+import time
+import json
+import pytest
+from unittest.mock import MagicMock, AsyncMock, patch
+from app.worker.consumer import NotificationConsumer
+from app.utils.exceptions import PartialFailureException
+
+
+@pytest.fixture
+def consumer():
+    """Pytest fixture for a consumer with a mocked channel and no idempotency lookup."""
+    consumer = NotificationConsumer(AsyncMock())
+    consumer._channel = MagicMock()
+    with patch.object(NotificationConsumer, '_already_sent', return_value=False):
+        yield consumer
+
+
+def _published(consumer):
+    kwargs = consumer._channel.basic_publish.call_args.kwargs
+    return kwargs["routing_key"], json.loads(kwargs["body"])
+
+
+def _deliver(consumer, payload):
+    ch = MagicMock()
+    method = MagicMock(delivery_tag=7)
+    consumer._process_message(ch, method, None, json.dumps(payload))
+    return ch
+
+
+def test_success_acks_without_retry(consumer):
+    """Test that a processed message is acked and nothing is republished."""
+    ch = _deliver(consumer, {"id": "n1", "channel": "email", "recipients": [{"id": 1}]})
+
+    ch.basic_ack.assert_called_once_with(delivery_tag=7)
+    consumer._channel.basic_publish.assert_not_called()
+
+
+def test_partial_failure_retries_only_failed_recipients(consumer):
+    """Test that a partial failure republishes a reduced payload to the first retry queue."""
+    consumer._process.side_effect = PartialFailureException(
+        [{"id": 1}], [{"id": 2, "failed_reason": "timeout", "retryable": True}]
+    )
+    ch = _deliver(consumer, {"id": "n1", "channel": "email", "recipients": [{"id": 1}, {"id": 2}]})
+
+    routing_key, body = _published(consumer)
+    assert routing_key == "notifications.retry.1s"
+    assert body["attempt"] == 1
+    assert body["recipients"] == [{"id": 2}]
+    ch.basic_ack.assert_called_once_with(delivery_tag=7)
+
+
+def test_unexpected_error_retries_whole_payload(consumer):
+    """Test that an unexpected error retries all recipients with the next delay."""
+    consumer._process.side_effect = RuntimeError("db down")
+    _deliver(consumer, {"id": "n1", "channel": "email", "attempt": 1, "recipients": [{"id": 1}, {"id": 2}]})
+
+    routing_key, body = _published(consumer)
+    assert routing_key == "notifications.retry.2s"
+    assert body["attempt"] == 2
+    assert body["recipients"] == [{"id": 1}, {"id": 2}]
+
+
+def test_failed_retry_publish_requeues_the_original(consumer):
+    """Test that a retry the broker didn't take leaves the original to be redelivered rather than acked."""
+    consumer._process.side_effect = RuntimeError("db down")
+    consumer._channel.basic_publish.side_effect = ConnectionError("channel closed")
+    with patch('app.worker.consumer.delivery_log') as delivery_log:
+        ch = _deliver(consumer, {"id": "n1", "channel": "email", "attempt": 1, "recipients": [{"id": 1}]})
+
+    ch.basic_nack.assert_called_once_with(delivery_tag=7, requeue=True)
+    ch.basic_ack.assert_not_called()
+    delivery_log.record_retry.assert_not_called()
+
+
+def test_exhausted_retries_go_to_dead_letter(consumer):
+    """Test that the last failed attempt is dead-lettered with the remaining recipients."""
+    consumer._process.side_effect = PartialFailureException([], [{"id": 2, "retryable": True}])
+    _deliver(consumer, {"id": "n1", "channel": "email", "attempt": 3, "recipients": [{"id": 2}]})
+
+    routing_key, body = _published(consumer)
+    assert routing_key == "notifications.dead_letter"
+    assert body["recipients"] == [{"id": 2}]
+
+
+def test_retry_after_defers_to_longer_retry_queue(consumer):
+    """Test that an open circuit's retry_after pushes the retry past the circuit's recovery window."""
+    consumer._process.side_effect = PartialFailureException(
+        [], [{"id": 2, "retryable": True, "retry_after": 45}]
+    )
+    with patch('app.worker.consumer.settings') as mock_settings:
+        mock_settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT = 60
+        _deliver(consumer, {"id": "n1", "channel": "email", "recipients": [{"id": 2}]})
+
+    routing_key, body = _published(consumer)
+    assert routing_key == "notifications.retry.60s"
+    assert body["recipients"] == [{"id": 2}]
+
+
+def test_messages_share_one_event_loop():
+    """Test that messages run on one long-lived loop so pooled connections survive between them."""
+    loops = []
+
+    async def process(payload):
+        loops.append(asyncio.get_running_loop())
+
+    consumer = NotificationConsumer(process)
+    consumer._channel = MagicMock()
+    with patch.object(NotificationConsumer, '_already_sent', return_value=False):
+        _deliver(consumer, {"id": "n1", "channel": "email", "recipients": [{"id": 1}]})
+        _deliver(consumer, {"id": "n2", "channel": "email", "recipients": [{"id": 2}]})
+
+    assert len(loops) == 2 and loops[0] is loops[1]
+    with patch("app.services.smtp_pool.close_smtp_pools") as close_smtp_pools:
+        consumer.stop()
+    assert loops[0].is_closed()
+    close_smtp_pools.assert_called_once()
+
+
+def test_partial_retry_keeps_channel_grouping(consumer):
+    """Test that a retry of a grouped payload regroups only the failed recipients by channel."""
+    email = {"id": 1, "email": "a@example.com"}
+    sms = {"id": 2, "phone_number": "+15550001111"}
+    consumer._process.side_effect = PartialFailureException([email], [{**sms, "failed_reason": "503", "retryable": True}])
+
+    _deliver(consumer, {"id": "n1", "channel": "all", "recipients_by_channel": {"email": [email], "sms": [sms]}})
+
+    _, body = _published(consumer)
+    assert body["recipients_by_channel"] == {"sms": [sms]}
+    assert "recipients" not in body
+
+
+def test_processing_lag_and_retries_recorded(consumer):
+    """Test that queue lag, processing time and retries are exported per channel."""
+    from prometheus_client import REGISTRY
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    lag = sample("consumer_queue_lag_seconds_count", channel="sms")
+    partial = sample("consumer_processing_duration_seconds_count", channel="sms", outcome="partial")
+    retries = sample("consumer_retries_total", channel="sms")
+    consumer._process.side_effect = PartialFailureException(
+        "1 failed", failed_recipients=[{"id": 2, "phone_number": "+15550000002"}]
+    )
+
+    ch, method = MagicMock(), MagicMock(delivery_tag=7)
+    properties = MagicMock(headers={"published_at": time.time() - 5})
+    consumer._process_message(ch, method, properties, json.dumps({"id": "n1", "channel": "sms", "recipients": []}))
+
+    assert sample("consumer_queue_lag_seconds_count", channel="sms") == lag + 1
+    assert sample("consumer_queue_lag_seconds_sum", channel="sms") >= 5
+    assert sample("consumer_processing_duration_seconds_count", channel="sms", outcome="partial") == partial + 1
+    assert sample("consumer_retries_total", channel="sms") == retries + 1
+
+
+def test_message_queries_checked_against_channel_budget(consumer):
+    """Test that the SQL a message runs is counted against its channel's budget."""
+    from sqlalchemy import create_engine, text
+    from app.db.sql import instrumentation
+    from app.utils.exceptions import QueryBudgetExceededException
+
+    engine = create_engine("sqlite://")
+    instrumentation.install_query_hooks(engine)
+
+    async def process(payload):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+    consumer._process.side_effect = process
+
+    with patch.object(instrumentation.settings, "SQL_QUERY_BUDGETS", {"message email": 1}), \
+         patch.object(instrumentation.settings, "SQL_BUDGET_STRICT", True):
+        with pytest.raises(QueryBudgetExceededException) as exc_info:
+            _deliver(consumer, {"id": "n1", "channel": "email", "recipients": [{"id": 1}]})
+
+    assert (exc_info.value.unit, exc_info.value.count) == ("message email", 2)
+    engine.dispose()
+
+
+def test_partition_maintenance_reschedules_after_a_failure(consumer):
+    """Test that a failed partition check is logged and tried again on the next interval."""
+    consumer._connection = MagicMock()
+    with patch("app.db.sql.partitions.ensure_partitions", side_effect=RuntimeError("db down")) as ensure:
+        consumer._maintain_partitions()
+
+    ensure.assert_called_once()
+    delay, callback = consumer._connection.call_later.call_args.args
+    assert delay > 0 and callback == consumer._maintain_partitions
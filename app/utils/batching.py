@@ -0,0 +1,27 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def chunked(items: Sequence[T], size: int) -> List[List[T]]:
+    """Split items into consecutive chunks of at most `size`."""
+    if size < 1:
+        raise ValueError("Chunk size must be at least 1")
+    return [list(items[i:i + size]) for i in range(0, len(items), size)]
+
+
+async def run_batches(send: Callable[[List[T]], Awaitable[Any]], batches: List[List[T]],
+                      concurrency: int) -> List[Any]:
+    """
+    Run `send` over every batch with at most `concurrency` in flight.
+    Returns one entry per batch, in order: the result, or the exception the
+    batch raised, so one failed batch never hides the others' outcomes.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(batch: List[T]) -> Any:
+        async with semaphore:
+            return await send(batch)
+
+    return await asyncio.gather(*(run(batch) for batch in batches), return_exceptions=True)
@@ -0,0 +1,36 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+from app.core.config import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """Get or create the bounded thread pool used for blocking calls."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BLOCKING_POOL_MAX_WORKERS,
+            thread_name_prefix="blocking",
+        )
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking function (e.g. a synchronous SDK call) without blocking the
+    event loop. At most BLOCKING_POOL_MAX_WORKERS calls run at once; the rest
+    queue for a free thread.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_blocking_executor(), partial(func, *args, **kwargs))
+
+
+def shutdown_blocking_executor(wait: bool = True):
+    """Shut the thread pool down on exit."""
+    global _executor
+    if _executor:
+        _executor.shutdown(wait=wait)
+        _executor = None
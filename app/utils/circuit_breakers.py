@@ -1,11 +1,11 @@
-import asyncio
 import time
-import random
-from typing import Callable, Any, Dict, List
+from typing import Optional, Tuple
 from functools import wraps
 from enum import Enum
 import logging
-from .exceptions import ChannelServiceException
+import redis
+from app.core.redis_client import LazyRedis
+from .exceptions import ChannelServiceException, CircuitOpenException, OutboundRateLimitException
 logger = logging.getLogger(__name__)
 
 class CircuitBreakerState(Enum):
@@ -13,54 +13,191 @@ class CircuitBreakerState(Enum):
     OPEN = "open"
     HALF_OPEN = "half_open"
 
+
+# Decide whether a call may proceed. Returns {allowed, state, retry_after}.
+# An OPEN circuit turns HALF_OPEN once recovery_timeout has passed; HALF_OPEN
+# admits at most half_open_max_calls probes. Probe slots held longer than
+# recovery_timeout (e.g. by a crashed worker) are reclaimed.
+ACQUIRE_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local recovery_timeout = tonumber(ARGV[2])
+local half_open_max_calls = tonumber(ARGV[3])
+
+local state = redis.call('HGET', key, 'state') or 'closed'
+if state == 'closed' then
+    return {1, state, 0}
+end
+
+if state == 'open' then
+    local opened_at = tonumber(redis.call('HGET', key, 'opened_at') or '0')
+    local remaining = opened_at + recovery_timeout - now
+    if remaining > 0 then
+        return {0, state, math.ceil(remaining)}
+    end
+    state = 'half_open'
+    redis.call('HSET', key, 'state', state, 'probes', 0, 'half_open_at', now)
+end
+
+local probes = tonumber(redis.call('HGET', key, 'probes') or '0')
+local half_open_at = tonumber(redis.call('HGET', key, 'half_open_at') or '0')
+if probes >= half_open_max_calls and now - half_open_at >= recovery_timeout then
+    probes = 0
+    redis.call('HSET', key, 'probes', 0, 'half_open_at', now)
+end
+if probes >= half_open_max_calls then
+    return {0, state, 1}
+end
+redis.call('HINCRBY', key, 'probes', 1)
+return {1, state, 0}
+"""
+
+# Record the outcome of a call. Returns the resulting state.
+RECORD_SCRIPT = """
+local key = KEYS[1]
+local success = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+local failure_threshold = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[4])
+
+local state = redis.call('HGET', key, 'state') or 'closed'
+if success == 1 then
+    if state == 'half_open' then
+        redis.call('HSET', key, 'state', 'closed', 'failures', 0, 'probes', 0)
+        state = 'closed'
+    elseif state == 'closed' and tonumber(redis.call('HGET', key, 'failures') or '0') > 0 then
+        redis.call('HSET', key, 'failures', 0)
+    end
+    return state
+end
+
+if state == 'half_open' then
+    state = 'open'
+    redis.call('HSET', key, 'state', state, 'opened_at', now, 'probes', 0)
+elseif state == 'closed' then
+    local failures = redis.call('HINCRBY', key, 'failures', 1)
+    if failures >= failure_threshold then
+        state = 'open'
+        redis.call('HSET', key, 'state', state, 'opened_at', now, 'failures', 0)
+    end
+end
+redis.call('EXPIRE', key, ttl)
+return state
+"""
+
+
 class CircuitBreaker:
-    """Circuit breaker pattern implementation"""
-    
-    def __init__(self, failure_threshold: int = 5, recovery_timeout: int = 60, expected_exception: Exception = Exception):
+    """
+    Circuit breaker pattern implementation.
+
+    State lives in a Redis hash keyed by name, so every worker process shares
+    one view of a provider: once failure_threshold consecutive failures are
+    recorded anywhere, all processes stop calling it for recovery_timeout
+    seconds, then let at most half_open_max_calls probes through. Fails open
+    (calls proceed) if Redis is unavailable.
+    """
+
+    STATE_TTL_SECONDS = 86400
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: int = 60,
+        half_open_max_calls: int = 1,
+        expected_exception: Tuple[type, ...] = (ChannelServiceException, ConnectionError, TimeoutError),
+        channel: str = "unknown",
+    ):
+        self.name = name
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
         self.expected_exception = expected_exception
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.state = CircuitBreakerState.CLOSED
-    
+        self.channel = channel
+        self._acquire_script = None
+        self._record_script = None
+
+    def _register_scripts(self, client: redis.Redis) -> None:
+        self._acquire_script = client.register_script(ACQUIRE_SCRIPT)
+        self._record_script = client.register_script(RECORD_SCRIPT)
+
+    redis = LazyRedis(on_change=_register_scripts)
+
+    def _key(self) -> str:
+        return f"circuit:{self.name}"
+
     def __call__(self, func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            if self.state == CircuitBreakerState.OPEN:
-                if self._should_attempt_reset():
-                    self.state = CircuitBreakerState.HALF_OPEN
-                else:
-                    raise ChannelServiceException(
-                        "Circuit breaker is OPEN. Service unavailable.", 
-                        channel="unknown",
-                        retry_after=self.recovery_timeout
-                    )
-            
+            self.before_call()
             try:
                 result = await func(*args, **kwargs)
-                self._record_success()
-                return result
+            except (CircuitOpenException, OutboundRateLimitException):
+                # The provider was never called
+                raise
             except self.expected_exception as e:
-                self._record_failure()
+                self.record_failure()
                 raise e
-        
+            except Exception:
+                # Anything else (e.g. a partial failure) means the provider answered
+                self.record_success()
+                raise
+            self.record_success()
+            return result
+
         return wrapper
-    
-    def _should_attempt_reset(self) -> bool:
-        return (
-            self.last_failure_time and 
-            time.time() - self.last_failure_time >= self.recovery_timeout
-        )
-    
-    def _record_success(self):
-        self.failure_count = 0
-        self.state = CircuitBreakerState.CLOSED
-    
-    def _record_failure(self):
-        self.failure_count += 1
-        self.last_failure_time = time.time()
-        
-        if self.failure_count >= self.failure_threshold:
-            self.state = CircuitBreakerState.OPEN
 
+    def before_call(self) -> None:
+        """Raise CircuitOpenException unless the circuit admits this call."""
+        try:
+            client = self.redis
+            allowed, state, retry_after = self._acquire_script(
+                client=client,
+                keys=[self._key()],
+                args=[time.time(), self.recovery_timeout, self.half_open_max_calls],
+            )
+        except redis.RedisError as e:
+            logger.warning("Circuit breaker Redis error, allowing call", extra={"circuit": self.name, "error": str(e)})
+            return  # Fail open
+
+        if not allowed:
+            raise CircuitOpenException(
+                f"Circuit breaker {self.name} is {state.upper()}. Service unavailable.",
+                channel=self.channel,
+                retry_after=int(retry_after),
+            )
+
+    def record_success(self) -> None:
+        self._record(1)
+
+    def record_failure(self) -> None:
+        state = self._record(0)
+        if state == CircuitBreakerState.OPEN:
+            logger.warning("Circuit breaker open", extra={"circuit": self.name, "recovery_timeout": self.recovery_timeout})
+
+    def _record(self, success: int) -> Optional[CircuitBreakerState]:
+        try:
+            client = self.redis
+            state = self._record_script(
+                client=client,
+                keys=[self._key()],
+                args=[success, time.time(), self.failure_threshold, self.STATE_TTL_SECONDS],
+            )
+            return CircuitBreakerState(state)
+        except redis.RedisError as e:
+            logger.warning("Circuit breaker Redis error", extra={"circuit": self.name, "error": str(e)})
+            return None
+
+    def state(self) -> CircuitBreakerState:
+        """Current shared state, without taking a probe slot."""
+        try:
+            state, opened_at = self.redis.hmget(self._key(), "state", "opened_at")
+        except redis.RedisError:
+            return CircuitBreakerState.CLOSED
+        state = CircuitBreakerState(state or CircuitBreakerState.CLOSED.value)
+        if state == CircuitBreakerState.OPEN and time.time() - float(opened_at or 0) >= self.recovery_timeout:
+            return CircuitBreakerState.HALF_OPEN
+        return state
+
+    def is_open(self) -> bool:
+        return self.state() == CircuitBreakerState.OPEN
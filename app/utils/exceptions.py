@@ -22,10 +22,21 @@ class RecipientResolutionException(NotificationException):
 
 class ChannelServiceException(NotificationException):
     """Raised when channel service operations fail"""
-    def __init__(self, message: str, channel: str, retry_after: int = None):
+    def __init__(self, message: str, channel: str, retry_after: int = None, status_code: int = None):
         super().__init__(message)
         self.channel = channel
         self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class CircuitOpenException(ChannelServiceException):
+    """Raised when a provider's circuit breaker rejects a call without attempting it"""
+    pass
+
+
+class OutboundRateLimitException(ChannelServiceException):
+    """Raised when our own outbound rate limit holds a send back before it reaches the provider"""
+    pass
 
 
 class PartialFailureException(NotificationException):
@@ -51,4 +62,22 @@ class ExternalServiceException(NotificationException):
 class DatabaseException(NotificationException):
     """
     Raised when database operations fail"""
-    pass
\ No newline at end of file
+    pass
+
+
+class QueryBudgetExceededException(DatabaseException):
+    """Raised (when SQL_BUDGET_STRICT) when a request or message runs more SQL than its budget allows"""
+    def __init__(self, unit: str, count: int, budget: int, repeated: Dict[str, int]):
+        self.unit = unit
+        self.count = count
+        self.budget = budget
+        self.repeated = repeated
+        problems = []
+        if count > budget:
+            problems.append(f"{count} queries (budget {budget})")
+        problems.extend(f"{times}x {sql!r}" for sql, times in repeated.items())
+        super().__init__(f"Query budget exceeded for {unit}: {'; '.join(problems)}", "QUERY_BUDGET_EXCEEDED", {
+            "count": count,
+            "budget": budget,
+            "repeated": repeated,
+        })
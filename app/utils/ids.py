@@ -0,0 +1,30 @@
+import os
+import time
+import uuid
+from typing import Any, Optional
+
+
+def uuid7() -> uuid.UUID:
+    """
+    A time-ordered UUID (RFC 9562 version 7): a 48-bit Unix millisecond
+    timestamp followed by 74 random bits. New keys sort after older ones, so
+    inserts land at the right edge of the primary key index.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
+def new_notification_id() -> str:
+    return str(uuid7())
+
+
+def canonical_uuid(value: Any) -> Optional[str]:
+    """`value` as a lowercase hyphenated UUID string, or None if it isn't a UUID."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 from app.db.sql.models import Notification, NotificationRecipient
+from app.db.nosql.models import NotificationLogEntry, LogQuery
 from app.api.schemas import Status, Channel, Priority
 
 
@@ -55,3 +56,41 @@ class INotificationRepository(ABC):
     def update_recipient_status(self, recipient_id: int, status: Status, failure_reason: Optional[str] = None) -> bool:
         """Update recipient status and failure reason if provided"""
         pass
+
+    @abstractmethod
+    def bulk_update_recipient_status(self, recipient_ids: List[int], status: Status, failure_reason: Optional[str] = None) -> int:
+        """Update status for many recipients at once, returning the number updated"""
+        pass
+
+    @abstractmethod
+    def bulk_fail_recipients(self, failure_reasons: Dict[int, Optional[str]]) -> int:
+        """Mark many recipients failed, each with its own reason, returning the number updated"""
+        pass
+
+    @abstractmethod
+    def get_recipient_status_counts(self, notification_id: str) -> Dict[Status, int]:
+        """Count recipients of a notification grouped by status"""
+        pass
+
+
+class IDeliveryLogStore(ABC):
+    """Interface for the delivery event log backend"""
+
+    @abstractmethod
+    def ensure_indexes(self) -> None:
+        """Create the indexes LogQuery filters and sorts on"""
+        pass
+
+    @abstractmethod
+    def insert_many(self, entries: List[NotificationLogEntry]) -> None:
+        """Write a batch of events"""
+        pass
+
+    @abstractmethod
+    def query(self, query: LogQuery) -> List[NotificationLogEntry]:
+        """Events matching the query, newest first"""
+        pass
+
+    def close(self) -> None:
+        """Release connections"""
+        pass
@@ -4,7 +4,7 @@ from typing import Callable, Any
 from functools import wraps
 
 # Make sure to import or define ChannelServiceException and logger if not already done
-from  .exceptions import ChannelServiceException
+from  .exceptions import ChannelServiceException, CircuitOpenException
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,7 +18,12 @@ def retry_with_exponential_backoff(
     backoff_multiplier: float = 2.0,
     jitter: bool = True
 ):
-    """Decorator for retry logic with exponential backoff"""
+    """
+    Decorator for retry logic with exponential backoff.
+
+    Open circuits and client errors (4xx other than 429) are raised at once,
+    and a provider's retry_after is honored unless it exceeds max_delay.
+    """
     
     def decorator(func: Callable) -> Callable:
         @wraps(func)
@@ -28,10 +33,17 @@ def retry_with_exponential_backoff(
             for attempt in range(max_retries + 1):
                 try:
                     return await func(*args, **kwargs)
+                except CircuitOpenException:
+                    raise
                 except (ChannelServiceException, ConnectionError, TimeoutError) as e:
                     last_exception = e
-                    
-                    if attempt == max_retries:
+                    status_code = getattr(e, "status_code", None)
+                    retry_after = getattr(e, "retry_after", None)
+
+                    if status_code is not None and status_code != 429 and status_code < 500:
+                        raise e
+
+                    if attempt == max_retries or (retry_after and retry_after > max_delay):
                         logger.error(f"Max retries ({max_retries}) exceeded for {func.__name__}")
                         raise e
                     
@@ -41,6 +53,9 @@ def retry_with_exponential_backoff(
                     # Add jitter to prevent thundering herd
                     if jitter:
                         delay = delay * (0.5 + random.random() * 0.5)
+
+                    if retry_after:
+                        delay = max(delay, retry_after)
                     
                     logger.warning(
                         f"Attempt {attempt + 1} failed for {func.__name__}: {str(e)}. "
@@ -2,8 +2,23 @@ import pika
 import json
 import asyncio
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional
 from app.core.config import settings
+from app.core.metrics import (
+    CONSUMER_DEAD_LETTERS,
+    CONSUMER_PROCESSING_DURATION,
+    CONSUMER_QUEUE_LAG,
+    CONSUMER_RETRIES,
+)
+from app.core.profiling import message_profile, save_profile
+from app.db.sql.instrumentation import check_query_budget, start_recording, stop_recording
+from app.core.tracing import extract_context, inject_context, shutdown_tracing, tracer
+from opentelemetry.trace import SpanKind
+from app.api.schemas import Status, Channel
+from app.services.delivery_log import delivery_log
+from app.services.recipient_resolver import payload_recipients_by_channel, group_recipients_by_channel
+from app.utils.exceptions import PartialFailureException
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +26,8 @@ logger = logging.getLogger(__name__)
 class NotificationConsumer:
     """Consumes messages directly from RabbitMQ and sends via channel services."""
 
+    QUEUE = "notifications"
+    DEAD_LETTER_QUEUE = "notifications.dead_letter"
     MAX_RETRIES = 3
     RETRY_DELAYS = [1, 2, 4]  # seconds
 
@@ -18,76 +35,235 @@ class NotificationConsumer:
         self._connection = None
         self._channel = None
         self._process = process_callback
+        self._loop = None
+
+    def _run(self, coro):
+        """
+        Run a coroutine on the consumer's long-lived event loop.
+        Reusing one loop keeps loop-bound resources (the HTTP connection pool,
+        asyncio locks) alive across messages.
+        """
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+        return self._loop.run_until_complete(coro)
+
+    @classmethod
+    def retry_queue(cls, delay: int) -> str:
+        return f"{cls.QUEUE}.retry.{delay}s"
+
+    @classmethod
+    def retry_queue_delays(cls) -> List[int]:
+        """Delays with a declared retry queue, including one that outlasts an open circuit."""
+        return sorted(set(cls.RETRY_DELAYS + [settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT]))
 
     def _connect(self):
         if self._connection is None or self._connection.is_closed:
             params = pika.URLParameters(settings.CELERY_BROKER_URL)
             self._connection = pika.BlockingConnection(params)
             self._channel = self._connection.channel()
-            self._channel.queue_declare(queue="notifications", durable=True)
+            self._channel.queue_declare(queue=self.QUEUE, durable=True)
+            self._channel.queue_declare(queue=self.DEAD_LETTER_QUEUE, durable=True)
+            # Retry queues hold a message for their TTL, then dead-letter it
+            # back onto the main queue
+            for delay in self.retry_queue_delays():
+                self._channel.queue_declare(queue=self.retry_queue(delay), durable=True, arguments={
+                    "x-message-ttl": delay * 1000,
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": self.QUEUE,
+                })
             self._channel.basic_qos(prefetch_count=1)
 
+    def _already_sent(self, notification_id: str) -> bool:
+        """Check if the notification is already SENT."""
+        from app.db.sql.connection import SessionLocal
+        from app.db.sql.repositories import NotificationRepository
+        with tracer.start_as_current_span("db.idempotency_check"):
+            db = SessionLocal()
+            try:
+                # Primary only: a lagging replica could miss a send that just finished
+                notification = NotificationRepository(db, read_from_replica=False).get_notification_by_id(notification_id)
+                return notification is not None and notification.status == Status.SENT
+            finally:
+                db.close()
+
+    @staticmethod
+    def _published_at(properties) -> Optional[float]:
+        headers = getattr(properties, "headers", None)
+        published_at = headers.get("published_at") if isinstance(headers, dict) else None
+        return published_at if isinstance(published_at, (int, float)) else None
+
     def _process_message(self, ch, method, properties, body):
         """Synchronous message handler with retry logic."""
+        started = time.perf_counter()
         payload = json.loads(body)
+        channel = str(payload.get("channel"))
+        attributes = {
+            "messaging.system": "rabbitmq",
+            "notification.id": str(payload.get("id")),
+            "notification.channel": channel,
+            "notification.attempt": payload.get("attempt", 0) + 1,
+        }
+        published_at = self._published_at(properties)
+        if published_at is not None:
+            lag = max(0.0, time.time() - published_at)
+            CONSUMER_QUEUE_LAG.labels(channel).observe(lag)
+            attributes["messaging.queue_lag_ms"] = round(lag * 1000, 1)
+
+        queries, queries_token = start_recording()
+        # Opt-in: messages matching PROFILING_MESSAGE_FILTER
+        profile = message_profile(payload)
+        outcome = "error"
+        try:
+            # Continue the publisher's trace, so API time, queue wait and the
+            # provider calls show up in one trace
+            with tracer.start_as_current_span(
+                "queue.receive",
+                context=extract_context(getattr(properties, "headers", None)),
+                kind=SpanKind.CONSUMER,
+                attributes=attributes,
+            ) as span:
+                outcome = self._handle_message(payload)
+                span.set_attributes({"notification.outcome": outcome, "db.query_count": queries.count})
+        finally:
+            if profile is not None:
+                save_profile(profile.stop(outcome=outcome))
+            stop_recording(queries_token)
+        if outcome == "requeued":
+            # The retry couldn't be published; hand the original back to the broker
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+        else:
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+        CONSUMER_PROCESSING_DURATION.labels(channel, outcome).observe(time.perf_counter() - started)
+        check_query_budget(queries, "message", f"message {channel}")
+
+    def _handle_message(self, payload: Dict[str, Any]) -> str:
+        """Send one message, scheduling a retry on failure. Returns the outcome."""
         notification_id = payload.get("id")
+        attempt = payload.get("attempt", 0)
 
         logger.info("Received notification", extra={
             "notification_id": str(notification_id),
-            "channel": str(payload.get("channel"))
+            "channel": str(payload.get("channel")),
+            "attempt": attempt + 1,
         })
 
-        # Retry loop
-        last_error = None
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                # Check if already processed — skip if SENT
-                from app.db.sql.connection import SessionLocal
-                db = SessionLocal()
-                try:
-                    from app.db.sql.repositories import NotificationRepository
-                    repo = NotificationRepository(db)
-                    notification = repo.get_notification_by_id(notification_id)
-                    if notification and notification.status.value == "SENT":
-                        logger.info("Notification already sent, skipping", extra={
-                            "notification_id": str(notification_id)
-                        })
-                        ch.basic_ack(delivery_tag=method.delivery_tag)
-                        return
-                finally:
-                    db.close()
-
-                asyncio.run(self._process(payload))
-                ch.basic_ack(delivery_tag=method.delivery_tag)
-                logger.info("Notification processed successfully", extra={
-                    "notification_id": str(notification_id),
-                    "attempt": attempt + 1
-                })
-                return
-            except Exception as e:
-                last_error = e
-                logger.warning("Send attempt failed", extra={
-                    "notification_id": str(notification_id),
-                    "attempt": attempt + 1,
-                    "error": str(e)
+        try:
+            # Redelivered originals of finished notifications are skipped;
+            # retries carry only unsent recipients and are deduplicated per
+            # recipient by the service
+            if attempt == 0 and self._already_sent(notification_id):
+                logger.info("Notification already sent, skipping", extra={
+                    "notification_id": str(notification_id)
                 })
-                if attempt < self.MAX_RETRIES - 1:
-                    import time
-                    time.sleep(self.RETRY_DELAYS[attempt])
+                return "skipped"
 
-        # All retries exhausted
-        logger.error("All retry attempts failed", extra={
-            "notification_id": str(notification_id),
-            "error": str(last_error)
-        })
-        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            self._run(self._process(payload))
+            logger.info("Notification processed successfully", extra={
+                "notification_id": str(notification_id),
+                "attempt": attempt + 1
+            })
+            return "success"
+        except PartialFailureException as e:
+            logger.warning("Send attempt partially failed", extra={
+                "notification_id": str(notification_id),
+                "attempt": attempt + 1,
+                "failed_count": len(e.failed_recipients),
+            })
+            return "partial" if self._schedule_retry(payload, e.failed_recipients) else "requeued"
+        except Exception as e:
+            logger.warning("Send attempt failed", extra={
+                "notification_id": str(notification_id),
+                "attempt": attempt + 1,
+                "error": str(e)
+            })
+            all_recipients = [r for rs in payload_recipients_by_channel(payload).values() for r in rs]
+            return "failed" if self._schedule_retry(payload, all_recipients) else "requeued"
+
+    def _schedule_retry(self, payload: Dict[str, Any], recipients: List[Dict[str, Any]]) -> bool:
+        """
+        Republish a reduced payload holding only the recipients that still
+        need the message, or dead-letter it once retries are exhausted.
+        A provider's retry_after (e.g. an open circuit) pushes the retry out
+        to the first retry queue that waits at least that long. Returns
+        False if the publish failed, so the caller can requeue the original.
+        """
+        attempt = payload.get("attempt", 0) + 1
+        retry_after = max((r.get("retry_after") or 0 for r in recipients), default=0)
+        remaining = [
+            {k: v for k, v in r.items() if k not in ("failed_reason", "retryable", "retry_after")}
+            for r in recipients
+        ]
+        retry_payload = {**payload, "attempt": attempt}
+        if "recipients_by_channel" in payload:
+            retry_payload["recipients_by_channel"] = group_recipients_by_channel(remaining, Channel(payload.get("channel")))
+        else:
+            retry_payload["recipients"] = remaining
+
+        if attempt <= self.MAX_RETRIES:
+            delay = self.RETRY_DELAYS[attempt - 1]
+            if retry_after > delay:
+                delays = self.retry_queue_delays()
+                delay = next((d for d in delays if d >= retry_after), delays[-1])
+            queue = self.retry_queue(delay)
+            # Lag is measured from when the retry is due, not from the intended wait
+            available_at = time.time() + delay
+        else:
+            delay = None
+            queue = self.DEAD_LETTER_QUEUE
+            available_at = time.time()
+
+        try:
+            self._channel.basic_publish(
+                exchange="",
+                routing_key=queue,
+                body=json.dumps(retry_payload, default=str),
+                properties=pika.BasicProperties(
+                    delivery_mode=2,  # persistent
+                    content_type="application/json",
+                    headers=inject_context({"published_at": available_at}),
+                ),
+            )
+        except Exception as e:
+            logger.error("Failed to publish retry", extra={
+                "notification_id": str(payload.get("id")),
+                "queue": queue,
+                "error": str(e),
+            })
+            return False
+
+        delivery_log.record_retry(payload.get("id"), str(payload.get("channel")), remaining, attempt, delay)
+        if delay is not None:
+            CONSUMER_RETRIES.labels(str(payload.get("channel"))).inc()
+        else:
+            CONSUMER_DEAD_LETTERS.labels(str(payload.get("channel"))).inc()
+            logger.error("All retry attempts failed", extra={
+                "notification_id": str(payload.get("id")),
+                "failed_count": len(recipients),
+            })
+        return True
+
+    def _maintain_partitions(self):
+        """
+        Create the coming months' notification partitions if missing, then
+        reschedule on the connection (callbacks run between messages).
+        """
+        from app.db.sql.partitions import ensure_partitions
+
+        try:
+            ensure_partitions()
+        except Exception as e:
+            logger.warning("Partition maintenance failed", extra={"error": str(e)})
+        if settings.DB_PARTITION_MAINTENANCE_INTERVAL_SECONDS > 0 and self._connection is not None:
+            self._connection.call_later(settings.DB_PARTITION_MAINTENANCE_INTERVAL_SECONDS, self._maintain_partitions)
 
     def start(self):
         """Start consuming messages."""
         self._connect()
+        self._maintain_partitions()
         logger.info("Starting notification consumer")
         self._channel.basic_consume(
-            queue="notifications",
+            queue=self.QUEUE,
             on_message_callback=self._process_message,
             auto_ack=False,
         )
@@ -99,29 +275,40 @@ class NotificationConsumer:
             self._channel.stop_consuming()
         if self._connection and not self._connection.is_closed:
             self._connection.close()
+        if self._loop and not self._loop.is_closed():
+            from app.core.http_client import close_http_client
+            self._loop.run_until_complete(close_http_client())
+            self._loop.close()
+        from app.services.smtp_pool import close_smtp_pools
+        close_smtp_pools()
+        from app.utils.blocking import shutdown_blocking_executor
+        shutdown_blocking_executor(wait=False)
+        delivery_log.close()
+        shutdown_tracing()
         logger.info("Consumer stopped")
 
 
 def main():
     """Standalone entry point for running the consumer."""
     from app.core.logging_config import configure_logging
+    from app.core.metrics import start_metrics_server
+    from app.core.tracing import configure_tracing
     from app.db.sql.connection import SessionLocal
     from app.services.notification_service import NotificationService
-    from app.services.channel_services import ChannelServiceFactory
+    from app.services.channel_registry import channel_registry
 
     configure_logging()
     logger.info("Starting notification worker")
+    start_metrics_server(settings.WORKER_METRICS_PORT)
+    configure_tracing("notification-worker")
+    # Load providers before the first message instead of on it
+    channel_registry.warm_up()
 
-    def get_service():
+    async def handle_message(payload: Dict[str, Any]):
         db = SessionLocal()
-        return NotificationService(db)
-
-    def handle_message(payload: Dict[str, Any]):
-        service = get_service()
         try:
-            asyncio.run(service.process_notification(payload))
+            await NotificationService(db).process_notification(payload)
         finally:
-            db = SessionLocal()
             db.close()
 
     consumer = NotificationConsumer(handle_message)
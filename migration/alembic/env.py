@@ -14,6 +14,7 @@ sys.path.insert(0, str(project_root))
 # Import your models and database configuration
 # This import is crucial for Alembic to detect the models
 from app.db.sql import models
+from app.db.sql.partitions import is_partition_name
 
 if settings.DATABASE_URL is None:
     raise ValueError("DATABASE_URL must be set")
@@ -34,6 +35,10 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+def include_name(name, type_, parent_names) -> bool:
+    """Leave the monthly partitions out of autogenerate; only their parent tables are modelled."""
+    return not (type_ == "table" and is_partition_name(name))
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
@@ -42,6 +47,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -57,7 +63,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
@@ -0,0 +1,130 @@
+"""Partition notification tables by month on created_at
+
+Revision ID: 4c3a98c5e713
+Revises: 9fafd0416d68
+Create Date: 2026-10-19 10:12:41.208315
+
+Each table becomes a partitioned table with the same columns and indexes.
+The existing table is attached as its first partition (`<table>_legacy`),
+covering everything up to the end of the current month, so no rows are
+copied. Monthly partitions follow from next month, and a DEFAULT partition
+(`<table>_default`) takes rows for any later month nobody created a
+partition for yet. The retention command drops `<table>_legacy` once its
+newest month has expired.
+
+Partitioned tables need the partition key in the primary key, so the keys
+become (id, created_at). The database-level foreign key from
+notification_recipients to notifications is dropped, since detaching a
+referenced partition would have to check every referencing row. The ORM
+relationship is unchanged. PostgreSQL only; other databases are left as
+they are.
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c3a98c5e713'
+down_revision: Union[str, None] = '9fafd0416d68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREMADE_MONTHS = 3
+
+# Secondary indexes as declared on the models at this revision
+INDEXES = {
+    "notifications": {
+        "ix_notifications_id": "id",
+        "ix_notifications_sender_user_id": "sender_user_id",
+        "ix_notifications_priority": "priority",
+        "ix_notifications_status": "status",
+        "ix_notifications_scheduled_at": "scheduled_at",
+        "idx_notification_status_priority": "status, priority",
+        "idx_notification_scheduled_at": "scheduled_at",
+        "idx_notification_sender": "sender_user_id",
+    },
+    "notification_recipients": {
+        "ix_notification_recipients_id": "id",
+        "ix_notification_recipients_user_id": "user_id",
+        "ix_notification_recipients_email": "email",
+        "ix_notification_recipients_phone_number": "phone_number",
+        "ix_notification_recipients_status": "status",
+        "idx_recipient_notification_status": "notification_id, status",
+        "idx_recipient_user_id": "user_id",
+    },
+}
+
+RECIPIENT_FK = "notification_recipients_notification_id_fkey"
+RECIPIENT_ID_SEQUENCE = "notification_recipients_id_seq"
+
+
+def _month_start(offset: int) -> datetime:
+    now = datetime.now(timezone.utc)
+    months = now.year * 12 + now.month - 1 + offset
+    return datetime(months // 12, months % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute(f"ALTER TABLE notification_recipients DROP CONSTRAINT IF EXISTS {RECIPIENT_FK}")
+    legacy_end = _month_start(1)
+    for table, indexes in INDEXES.items():
+        legacy = f"{table}_legacy"
+        op.execute(f"UPDATE {table} SET created_at = now() WHERE created_at IS NULL")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL")
+
+        # Free the index names for the partitioned table; ATTACH below
+        # adopts the renamed indexes instead of building new ones
+        op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        # A partition can't keep a primary key of its own: it needs the
+        # parent's (id, created_at), which ATTACH then adopts
+        op.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {table}_pkey")
+        op.execute(f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_pkey PRIMARY KEY (id, created_at)")
+        for name in indexes:
+            op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_legacy")
+
+        op.execute(f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)")
+        for name, columns in indexes.items():
+            op.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+        op.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {legacy} "
+            f"FOR VALUES FROM (MINVALUE) TO ('{legacy_end.isoformat()}')"
+        )
+        for offset in range(1, PREMADE_MONTHS + 1):
+            start, end = _month_start(offset), _month_start(offset + 1)
+            op.execute(
+                f"CREATE TABLE {table}_p{start:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    # The id sequence must outlive the legacy partition it was created with
+    op.execute(f"ALTER SEQUENCE {RECIPIENT_ID_SEQUENCE} OWNED BY notification_recipients.id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table, indexes in INDEXES.items():
+        flat = f"{table}_unpartitioned"
+        op.execute(f"CREATE TABLE {flat} (LIKE {table} INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {flat} SELECT * FROM {table}")
+        if table == "notification_recipients":
+            op.execute(f"ALTER SEQUENCE {RECIPIENT_ID_SEQUENCE} OWNED BY {flat}.id")
+        op.execute(f"DROP TABLE {table}")
+        op.execute(f"ALTER TABLE {flat} RENAME TO {table}")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+        for name, columns in indexes.items():
+            op.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+    op.create_foreign_key(RECIPIENT_FK, "notification_recipients", "notifications", ["notification_id"], ["id"])
@@ -0,0 +1,43 @@
+"""Store notification ids as native UUID
+
+Revision ID: b7e2d0c41a9f
+Revises: 4c3a98c5e713
+Create Date: 2026-10-19 14:03:27.551902
+
+notifications.id and notification_recipients.notification_id change from
+VARCHAR(36) (37 bytes per value) to the 16-byte uuid type. Existing keys
+keep their values, so ids that clients already hold stay valid. New ids
+are time-ordered UUIDv7 values generated by the application.
+
+Both tables are rewritten under an ACCESS EXCLUSIVE lock, so run this in a
+maintenance window. PostgreSQL only; other databases keep string ids.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d0c41a9f'
+down_revision: Union[str, None] = '4c3a98c5e713'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (("notifications", "id"), ("notification_recipients", "notification_id"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column in COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE uuid USING {column}::uuid")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column in COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE varchar(36) USING {column}::text")
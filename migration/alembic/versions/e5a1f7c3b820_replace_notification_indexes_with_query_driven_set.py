@@ -0,0 +1,106 @@
+"""Replace notification indexes with a query-driven set
+
+Revision ID: e5a1f7c3b820
+Revises: b7e2d0c41a9f
+Create Date: 2026-10-19 16:41:09.734120
+
+This migration adds the index the repository's queries need on
+created_at, for listing newest first.
+
+It then drops indexes that duplicate the primary key or another index,
+plus single-column indexes on enums, contact fields and user ids that no
+query filters on. app/tests/test_query_plans.py checks the resulting set with
+EXPLAIN.
+
+Indexes are built with CREATE INDEX CONCURRENTLY, so writes are not
+blocked. PostgreSQL can't build an index concurrently on a partitioned
+table. For those tables, the parent index is created ON ONLY the parent.
+Each partition's index is then built concurrently and attached to it.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1f7c3b820'
+down_revision: Union[str, None] = 'b7e2d0c41a9f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name: (table, columns, partial index predicate)
+Index = Tuple[str, str, Optional[str]]
+
+NEW_INDEXES: Dict[str, Index] = {
+    "idx_notification_created_at": ("notifications", "created_at", None),
+}
+
+REDUNDANT_INDEXES: Dict[str, Index] = {
+    "ix_notifications_id": ("notifications", "id", None),
+    "ix_notifications_sender_user_id": ("notifications", "sender_user_id", None),
+    "idx_notification_sender": ("notifications", "sender_user_id", None),
+    "ix_notifications_priority": ("notifications", "priority", None),
+    "ix_notifications_status": ("notifications", "status", None),
+    "ix_notifications_scheduled_at": ("notifications", "scheduled_at", None),
+    "idx_notification_status_priority": ("notifications", "status, priority", None),
+    "idx_notification_scheduled_at": ("notifications", "scheduled_at", None),
+    "ix_notification_recipients_id": ("notification_recipients", "id", None),
+    "ix_notification_recipients_user_id": ("notification_recipients", "user_id", None),
+    "idx_recipient_user_id": ("notification_recipients", "user_id", None),
+    "ix_notification_recipients_email": ("notification_recipients", "email", None),
+    "ix_notification_recipients_phone_number": ("notification_recipients", "phone_number", None),
+    "ix_notification_recipients_status": ("notification_recipients", "status", None),
+}
+
+
+def _partitions(table: str) -> List[str]:
+    return list(op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+    ), {"table": table}).scalars())
+
+
+def _create_index(name: str, table: str, columns: str, where: Optional[str]) -> None:
+    predicate = f" WHERE {where}" if where else ""
+    partitions = _partitions(table)
+    if not partitions:
+        op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns}){predicate}")
+        return
+    op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} ({columns}){predicate}")
+    for partition in partitions:
+        # e.g. idx_notification_created_at_p2026_11, idx_notification_created_at_legacy
+        child = f"{name}_{partition[len(table) + 1:]}"
+        op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {child} ON {partition} ({columns}){predicate}")
+        op.execute(f"ALTER INDEX {name} ATTACH PARTITION {child}")
+
+
+def _drop_index(name: str, table: str) -> None:
+    # Indexes on a partitioned table can't be dropped concurrently
+    concurrently = "" if _partitions(table) else " CONCURRENTLY"
+    op.execute(f"DROP INDEX{concurrently} IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        # Build the new indexes before dropping anything queries rely on
+        for name, (table, columns, where) in NEW_INDEXES.items():
+            _create_index(name, table, columns, where)
+        for name, (table, _, _) in REDUNDANT_INDEXES.items():
+            _drop_index(name, table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        for name, (table, columns, where) in REDUNDANT_INDEXES.items():
+            _create_index(name, table, columns, where)
+        for name, (table, _, _) in NEW_INDEXES.items():
+            _drop_index(name, table)